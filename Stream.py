@@ -1,114 +1,227 @@
+import csv
+import io
 import json
 import os
-from typing import List, Dict, Tuple
+import tempfile
+from datetime import date
+from typing import TYPE_CHECKING, BinaryIO, Callable, List, Optional, Tuple
 
 import streamlit as st
 
+from attendance import AttendanceStore, open_attendance
+from attendance_core import ConflictError, Row, SharedRoster, Student, StudentService
+from exporter import FORMATS
+from importer import ImportReport
+from profiling import recorder, timed
+from repository import open_repository
+from snapshot import mapped_path, snapshot_path
+
+if TYPE_CHECKING:
+    from analytics import AttendanceReport
+
 
 DATA_FILE = "storage.json"
+ROWS_PER_PAGE = 25
+TABLE_ROWS = 100  # rows per page of the read-only table
+SORT_OPTIONS = {
+    "Roster order": None,
+    "Student Name": "name",
+    "Enrollment No.": "enrollment",
+    "Courses": "courses",
+    "Phone": "phone",
+}
+REFRESH_SECONDS = 5  # how often an idle page checks for other sessions' changes
+
+# Fragments rerun on their own when a widget inside them changes
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
 
 def get_data_file_path() -> str:
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), DATA_FILE)
 
 
-def load_students() -> List[Dict[str, str]]:
+@st.cache_resource
+def get_service() -> StudentService:
+    # One repository and roster per server process, shared by every session:
+    # sessions read the roster in place rather than each holding a copy, and
+    # see each other's changes
     path = get_data_file_path()
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    return data
-        except Exception:
-            pass
-    return []
+    service = StudentService(open_repository(path), snapshot=snapshot_path(path), mapped=mapped_path(path))
+    try:
+        service.load()
+    except Exception:
+        # Not cached, so the next run tries again
+        service.close()
+        raise
+    # Written now, while the roster is known to match the storage
+    service.save_snapshot()
+    return service
 
 
-def save_students(students: List[Dict[str, str]]) -> None:
-    path = get_data_file_path()
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(students, f, indent=2)
+@st.cache_resource
+def get_attendance() -> AttendanceStore:
+    return open_attendance(get_data_file_path())
 
 
-def validate_inputs(name: str, enrollment: str, courses: str, phone: str) -> Tuple[bool, str]:
-    if not name.strip():
-        return False, "Name is required."
-    if not enrollment.strip():
-        return False, "Enrollment number is required."
-    if not courses.strip():
-        return False, "Courses are required."
-    digits = "".join(ch for ch in phone if ch.isdigit())
-    if len(digits) < 7:
-        return False, "Phone must have at least 7 digits."
-    return True, ""
+def get_roster() -> SharedRoster:
+    return get_service().shared
 
 
-def init_state():
-    if "students" not in st.session_state:
-        st.session_state.students = load_students()
-    if "edit_index" not in st.session_state:
-        st.session_state.edit_index = None
+def find_by_enrollment(enrollment: str) -> Optional[Student]:
+    return get_service().find_by_enrollment(enrollment)
 
 
-def add_student(name: str, enrollment: str, courses: str, phone: str) -> bool:
-    ok, msg = validate_inputs(name, enrollment, courses, phone)
-    if not ok:
-        st.warning(msg)
-        return False
-    st.session_state.students.append({
-        "name": name.strip(),
-        "enrollment": enrollment.strip(),
-        "courses": courses.strip(),
-        "phone": phone.strip(),
-    })
-    save_students(st.session_state.students)
-    return True
+# ---------------------- Cached Views ----------------------
+@st.cache_data(max_entries=2, show_spinner=False)
+def attendance_analytics(revision: Tuple[int, int], _store: AttendanceStore) -> "AttendanceReport":
+    # Keyed by the store's revision: recomputed only after attendance is saved.
+    # NumPy is imported here, after the Students tab has been sent
+    from analytics import attendance_report
+
+    return attendance_report(_store)
+
+
+def class_members(course: str) -> List[Tuple[int, str, str]]:
+    """``(id, name, enrollment)`` of everyone enrolled in ``course``."""
+    shared = get_roster()
+    with shared.lock.read():
+        roster = shared.roster
+        return [(s.id, s.name, s.enrollment) for s in map(roster.at, roster.filter_course(course))]
+
+
+def table_view() -> Tuple[str, Optional[str], bool]:
+    """The search, sort column and direction chosen above the table."""
+    sort = SORT_OPTIONS[st.session_state.get("sort", "Roster order")]
+    return st.session_state.get("search", ""), sort, st.session_state.get("descending", False)
 
 
-def update_student(index: int, name: str, enrollment: str, courses: str, phone: str) -> bool:
-    if not (0 <= index < len(st.session_state.students)):
+def query_page(page: int, size: int) -> Tuple[int, List[Row]]:
+    """Match count and one page of rows in the chosen order.
+
+    The roster keeps each column's sort order up to date, so this costs
+    about one page however large the roster is.
+    """
+    query, sort, descending = table_view()
+    shared = get_roster()
+    with shared.lock.read():
+        return shared.roster.query((page - 1) * size, size, sort, descending, query)
+
+
+def page_rows(page: int) -> Tuple[int, List[Tuple[int, Row, int]]]:
+    """Match count and ``(number, row, version)`` for one page of row actions.
+
+    Rows are copied out under the read lock, so the buttons they drive can
+    take the write lock afterwards.
+    """
+    query, sort, descending = table_view()
+    shared = get_roster()
+    roster = shared.roster
+    start = (page - 1) * ROWS_PER_PAGE
+    with shared.lock.read():
+        total, rows = roster.query(start, ROWS_PER_PAGE, sort, descending, query)
+        versions = [roster.get(row[0]).version for row in rows]
+    return total, [(start + n, row, version) for n, (row, version) in enumerate(zip(rows, versions))]
+
+
+def reset_pages() -> None:
+    # A new search or order starts again from the first page
+    st.session_state.table_page = 1
+    st.session_state.actions_page = 1
+
+
+@timed("streamlit.init_state")
+def init_state():
+    if "edit_id" not in st.session_state:
+        st.session_state.edit_id = None
+        st.session_state.edit_version = None
+
+
+def apply_change(change: Callable[[], object]) -> bool:
+    """Run one service change, showing why it was refused if it was."""
+    try:
+        change()
+    except ValueError as e:
+        # Invalid fields or an enrollment number that is already taken
+        st.warning(str(e))
         return False
-    ok, msg = validate_inputs(name, enrollment, courses, phone)
-    if not ok:
-        st.warning(msg)
+    except ConflictError as e:
+        st.warning(f"{e} Review the latest data and try again.")
         return False
-    st.session_state.students[index] = {
-        "name": name.strip(),
-        "enrollment": enrollment.strip(),
-        "courses": courses.strip(),
-        "phone": phone.strip(),
-    }
-    save_students(st.session_state.students)
     return True
 
 
-def delete_student(index: int) -> None:
-    if 0 <= index < len(st.session_state.students):
-        st.session_state.students.pop(index)
-        save_students(st.session_state.students)
+def add_student(name: str, enrollment: str, courses: str, phone: str) -> bool:
+    return apply_change(lambda: get_service().add(name, enrollment, courses, phone))
 
 
-def main():
-    st.set_page_config(page_title="College Management Dashboard", page_icon="🎓", layout="wide")
-    init_state()
+def update_student(record_id: int, expected_version: int, name: str, enrollment: str, courses: str, phone: str) -> bool:
+    def edit() -> None:
+        try:
+            get_service().edit(record_id, name, enrollment, courses, phone, expected_version=expected_version)
+        except ConflictError:
+            st.session_state.edit_id = None  # reopening the form shows the latest values
+            raise
 
-    st.markdown(
-        """
-        <style>
-        .app-card { background: #111827; padding: 16px; border-radius: 10px; border: 1px solid #1f2937; }
-        .app-title { color: #e2e8f0; font-size: 26px; font-weight: 700; }
-        .card-title { color: #e5e7eb; font-size: 16px; font-weight: 700; margin-bottom: 4px; }
-        .table-note { color: #9ca3af; font-size: 13px; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    return apply_change(edit)
 
-    st.markdown("<div class='app-title'>College Management Dashboard</div>", unsafe_allow_html=True)
-    st.write("")
 
-    # Add form
+def delete_student(record_id: int, expected_version: int) -> bool:
+    return apply_change(lambda: get_service().delete(record_id, expected_version=expected_version))
+
+
+def import_students(uploaded, on_batch=None) -> ImportReport:
+    f = io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline="")
+    # The write lock is taken per batch, so other sessions keep working
+    return get_service().import_csv(f, on_batch=on_batch)
+
+
+def export_file(fmt: str, course: Optional[str], enrollment_from: Optional[str], enrollment_to: Optional[str]) -> BinaryIO:
+    """The export written to an anonymous temporary file, a chunk at a time.
+
+    The file disappears once Streamlit has read it and dropped it, but
+    Streamlit reads it whole into memory to serve it: it cannot stream a
+    download.
+    """
+    out = tempfile.TemporaryFile()
+    try:
+        get_service().export(out, fmt, course, enrollment_from, enrollment_to)
+        out.flush()
+    except Exception:
+        out.close()
+        raise
+    # Streamlit takes raw files as download data, not buffered ones
+    return out.detach()
+
+
+def start_edit(record_id: int, version: int) -> None:
+    st.session_state.edit_id = record_id
+    st.session_state.edit_version = version
+
+
+# ---------------------- Sections ----------------------
+@fragment(run_every=REFRESH_SECONDS)
+def watch_changes() -> None:
+    # Rows are keyed by id, so another session's edits are safe to miss for
+    # a moment; pull them in once the page is idle
+    if get_roster().version != st.session_state.seen_version:
+        st.rerun()
+
+
+def summary_metrics() -> None:
+    # Maintained counts only, so this costs the same at any roster size
+    shared = get_roster()
+    with shared.lock.read():
+        students = len(shared.roster)
+        courses = len(shared.roster.catalog)
+    present, marked = get_attendance().day_totals(date.today().isoformat())
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Students", f"{students:,}")
+    c2.metric("Courses", f"{courses:,}")
+    c3.metric("Attendance today", f"{100 * present / marked:.0f}%" if marked else "–", f"{present:,} of {marked:,} present" if marked else None, delta_color="off")
+
+
+@fragment
+def add_form() -> None:
     with st.container():
         st.markdown("<div class='app-card'>", unsafe_allow_html=True)
         st.markdown("<div class='card-title'>Add Student</div>", unsafe_allow_html=True)
@@ -126,88 +239,359 @@ def main():
             if st.button("Add", use_container_width=True):
                 if add_student(name, enrollment, courses, phone):
                     st.success("Student added")
-                    st.rerun()
+                    st.rerun()  # the table lives outside this fragment
         st.markdown("</div>", unsafe_allow_html=True)
 
-    st.write("")
 
-    # Table view (read-only)
-    with st.container():
-        st.markdown("<div class='app-card'>", unsafe_allow_html=True)
-        st.markdown("<div class='card-title'>Students</div>", unsafe_allow_html=True)
-
-        # Build a read-only table; include a textual Actions column
-        table_rows = []
-        for s in st.session_state.students:
-            table_rows.append({
-                "Student Name": s.get("name", ""),
-                "Enrollment No.": s.get("enrollment", ""),
-                "Courses": s.get("courses", ""),
-                "Phone": s.get("phone", ""),
-                "Actions": "[ Edit ]    [ Delete ]",  # visual cue; real buttons below
-            })
-
-        if len(table_rows) == 0:
-            st.info("No students yet. Add the first one above.")
-        else:
-            st.dataframe(
-                table_rows,
-                use_container_width=True,
-                hide_index=True,
+@fragment
+def import_section() -> None:
+    with st.expander("Import from CSV"):
+        st.caption("Columns: name, enrollment, courses, phone. Invalid rows and duplicate enrollment numbers are skipped.")
+        uploaded = st.file_uploader("CSV file", type=["csv"], key="import_file")
+        progress = st.empty()
+        if st.button("Import", disabled=uploaded is None):
+            try:
+                report = import_students(uploaded, on_batch=lambda r: progress.caption(f"Imported {r.imported:,} students…"))
+            except (ValueError, csv.Error, UnicodeDecodeError) as e:
+                st.error(f"Import failed: {e}")
+                return
+            errors = io.StringIO()
+            if report.errors:
+                report.write_errors(errors)
+            st.session_state.import_result = (report.summary(), errors.getvalue())
+            st.rerun()  # the table lives outside this fragment
+
+        result = st.session_state.get("import_result")
+        if result:
+            summary, errors = result
+            st.success(summary)
+            if errors:
+                st.download_button("Download skipped rows", errors, file_name="import_errors.csv", mime="text/csv")
+
+
+@fragment
+def export_section() -> None:
+    with st.expander("Export"):
+        c1, c2, c3, c4 = st.columns([1, 1.5, 1, 1])
+        with c1:
+            fmt = st.selectbox("Format", list(FORMATS), format_func={"csv": "CSV", "jsonl": "JSON Lines", "columnar": "Columnar (binary)"}.get)
+        with c2:
+            course = st.text_input("Course", key="export_course").strip() or None
+        with c3:
+            enrollment_from = st.text_input("Enrollment from", key="export_from").strip() or None
+        with c4:
+            enrollment_to = st.text_input("Enrollment to", key="export_to").strip() or None
+        _, extension, mime = FORMATS[fmt]
+        # Generated only when clicked, straight from the storage's filtered scan
+        st.download_button(
+            "Download",
+            data=lambda: export_file(fmt, course, enrollment_from, enrollment_to),
+            file_name="students" + extension,
+            mime=mime,
+        )
+        st.caption("The export is written to a temporary file, but Streamlit holds the finished file in memory while serving it.")
+
+
+@fragment
+def attendance_section() -> None:
+    with st.expander("Attendance"):
+        shared = get_roster()
+        with shared.lock.read():
+            courses = shared.roster.course_names()
+        if not courses:
+            st.info("Add students with a course first.")
+            return
+        c1, c2 = st.columns(2)
+        with c1:
+            course = st.selectbox("Course", courses, key="attendance_course")
+        with c2:
+            day = st.date_input("Date", value=date.today(), key="attendance_day").isoformat()
+
+        members = class_members(course)
+        store = get_attendance()
+        saved = store.session(course, day) or {}
+        totals = store.summary(course)
+        edited = st.data_editor(
+            {
+                "Student Name": [m[1] for m in members],
+                "Enrollment No.": [m[2] for m in members],
+                "Present": [saved.get(m[0], True) for m in members],
+                "Attended": ["{}/{}".format(*totals.get(m[0], (0, 0))) for m in members],
+            },
+            disabled=["Student Name", "Enrollment No.", "Attended"],
+            hide_index=True,
+            use_container_width=True,
+            key=f"attendance_{course}_{day}",
+        )
+        present_flags = list(edited["Present"])
+        st.caption(f"{sum(present_flags)} of {len(members)} present.")
+        if st.button("Save attendance", disabled=not members):
+            # The whole class is written as one session bitmap
+            store.mark(
+                course,
+                day,
+                [m[0] for m, p in zip(members, present_flags) if p],
+                [m[0] for m, p in zip(members, present_flags) if not p],
             )
-            st.markdown("<div class='table-note'>Tip: Use buttons below to Edit/Delete a specific row.</div>", unsafe_allow_html=True)
+            st.success(f"Attendance saved for {course} on {day}.")
+
+
+@fragment
+def analytics_page() -> None:
+    from analytics import DEFAULTER_THRESHOLD
+
+    store = get_attendance()
+    report = attendance_analytics(store.revision(), store)
+    if not report.sessions:
+        st.info("No attendance has been saved yet.")
+        return
+    threshold = round(DEFAULTER_THRESHOLD * 100)
+    defaulters = report.defaulters()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Students tracked", f"{len(report.student_ids):,}")
+    c2.metric("Sessions", f"{report.sessions:,}")
+    c3.metric("Overall attendance", f"{report.overall_percent:.1f}%")
+    c4.metric(f"Below {threshold}%", f"{len(defaulters):,}")
+
+    st.markdown("<div class='card-title'>Course Averages</div>", unsafe_allow_html=True)
+    course_rows = report.course_rows()
+    shared = get_roster()
+    with shared.lock.read():
+        course_counts = [shared.roster.catalog.count(r[0]) for r in course_rows]
+    st.dataframe(
+        {
+            "Course": [r[0] for r in course_rows],
+            "Students": course_counts,
+            "Sessions": [r[1] for r in course_rows],
+            "Average Attendance %": [round(r[2], 1) for r in course_rows],
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
 
-        st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("<div class='card-title'>Students</div>", unsafe_allow_html=True)
+    only_defaulters = st.checkbox(f"Below {threshold}% only", value=True, key="defaulters_only")
+    indices = defaulters if only_defaulters else report.percent.argsort(kind="stable")
+    names, enrollments, courses, attended, percents, streaks, longest = [], [], [], [], [], [], []
+    with shared.lock.read():
+        for record_id, present, marked, percent, streak, longest_streak in report.rows(indices):
+            student = shared.roster.get(record_id)
+            if student is None:
+                continue  # deleted since it was marked
+            names.append(student.name)
+            enrollments.append(student.enrollment)
+            courses.append(student.courses)
+            attended.append(f"{present}/{marked}")
+            percents.append(round(percent, 1))
+            streaks.append(streak)
+            longest.append(longest_streak)
+    st.dataframe(
+        {
+            "Student Name": names,
+            "Enrollment No.": enrollments,
+            "Courses": courses,
+            "Attended": attended,
+            "Attendance %": percents,
+            "Absent Streak": streaks,
+            "Longest Streak": longest,
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
 
-    st.write("")
 
-    # Per-row actions with real buttons
-    if len(st.session_state.students) > 0:
+@fragment
+@timed("streamlit.students_table")
+def students_table() -> None:
+    query = st.session_state.get("search", "")
+    total, rows = query_page(st.session_state.get("table_page", 1), TABLE_ROWS)
+    pages = max(1, (total + TABLE_ROWS - 1) // TABLE_ROWS)
+    if st.session_state.get("table_page", 1) > pages:
+        st.session_state.table_page = pages
+        total, rows = query_page(pages, TABLE_ROWS)
+    if query.strip():
+        st.markdown(
+            f"<div class='table-note'>{total:,} of {len(get_roster().roster):,} students match</div>",
+            unsafe_allow_html=True,
+        )
+
+    if total == 0:
+        st.info("No students match the search." if query.strip() else "No students yet. Add the first one above.")
+    else:
+        _, names, enrollments, courses, phones = (list(col) for col in zip(*rows))
+        st.dataframe(
+            {
+                "Student Name": names,
+                "Enrollment No.": enrollments,
+                "Courses": courses,
+                "Phone": phones,
+                "Actions": ["[ Edit ]    [ Delete ]"] * len(names),  # visual cue; real buttons below
+            },
+            use_container_width=True,
+            hide_index=True,
+        )
+        if pages > 1:
+            st.number_input(f"Table page (of {pages:,})", min_value=1, max_value=pages, key="table_page")
+        st.markdown("<div class='table-note'>Tip: Use buttons below to Edit/Delete a specific row.</div>", unsafe_allow_html=True)
+
+
+@fragment
+@timed("streamlit.row_actions")
+def row_actions() -> None:
+    total, rows = page_rows(st.session_state.get("actions_page", 1))
+    if total > 0:
+        pages = (total + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE
+        if st.session_state.get("actions_page", 1) > pages:
+            st.session_state.actions_page = pages
+            total, rows = page_rows(pages)
         with st.expander("Row Actions", expanded=True):
-            for idx, s in enumerate(st.session_state.students):
+            if pages > 1:
+                st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key="actions_page")
+            for idx, (record_id, s_name, s_enroll, s_courses, s_phone), version in rows:
                 cols = st.columns([3, 2, 2, 2, 1, 1])
-                cols[0].write(f"{idx+1}. {s.get('name','')} | {s.get('enrollment','')} | {s.get('courses','')} | {s.get('phone','')}")
-                edit_clicked = cols[4].button("Edit", key=f"edit_{idx}")
-                delete_clicked = cols[5].button("Delete", key=f"delete_{idx}")
-                if edit_clicked:
-                    st.session_state.edit_index = idx
-                    st.rerun()
-                if delete_clicked:
-                    delete_student(idx)
-                    st.success("Deleted")
-                    st.rerun()
+                cols[0].write(f"{idx+1}. {s_name} | {s_enroll} | {s_courses} | {s_phone}")
+                # Opening the form only reruns this fragment
+                cols[4].button("Edit", key=f"edit_{record_id}", on_click=start_edit, args=(record_id, version))
+                if cols[5].button("Delete", key=f"delete_{record_id}"):
+                    if delete_student(record_id, version):
+                        st.success("Deleted")
+                        st.rerun()
 
     # Edit form (only shown if triggered)
-    if st.session_state.edit_index is not None:
-        i = st.session_state.edit_index
-        if not (0 <= i < len(st.session_state.students)):
-            st.session_state.edit_index = None
+    record_id = st.session_state.edit_id
+    if record_id is not None:
+        shared = get_roster()
+        with shared.lock.read():
+            record = shared.roster.get(record_id)
+            values = record.as_row() if record is not None else None
+        if values is None:
+            # Deleted, possibly by another session
+            st.session_state.edit_id = None
         else:
-            record = st.session_state.students[i]
+            _, r_name, r_enroll, r_courses, r_phone = values
             st.write("")
             with st.container():
                 st.markdown("<div class='app-card'>", unsafe_allow_html=True)
                 st.markdown("<div class='card-title'>Edit Student</div>", unsafe_allow_html=True)
                 c1, c2, c3, c4, c5 = st.columns([1.5, 1.2, 1.5, 1.2, 0.6])
                 with c1:
-                    e_name = st.text_input("Name", value=record.get("name", ""), key=f"edit_name_{i}")
+                    e_name = st.text_input("Name", value=r_name, key=f"edit_name_{record_id}")
                 with c2:
-                    e_enroll = st.text_input("Enrollment No.", value=record.get("enrollment", ""), key=f"edit_enroll_{i}")
+                    e_enroll = st.text_input("Enrollment No.", value=r_enroll, key=f"edit_enroll_{record_id}")
                 with c3:
-                    e_courses = st.text_input("Courses", value=record.get("courses", ""), key=f"edit_courses_{i}")
+                    e_courses = st.text_input("Courses", value=r_courses, key=f"edit_courses_{record_id}")
                 with c4:
-                    e_phone = st.text_input("Phone", value=record.get("phone", ""), key=f"edit_phone_{i}")
+                    e_phone = st.text_input("Phone", value=r_phone, key=f"edit_phone_{record_id}")
                 with c5:
                     st.write("")
-                    if st.button("Save", use_container_width=True, key=f"save_{i}"):
-                        if update_student(i, e_name, e_enroll, e_courses, e_phone):
+                    if st.button("Save", use_container_width=True, key=f"save_{record_id}"):
+                        if update_student(record_id, st.session_state.edit_version, e_name, e_enroll, e_courses, e_phone):
                             st.success("Saved")
-                            st.session_state.edit_index = None
+                            st.session_state.edit_id = None
                             st.rerun()
                 st.markdown("</div>", unsafe_allow_html=True)
 
 
-if __name__ == "__main__":
-    main()
+def performance_panel() -> None:
+    """Timings of this process's recent runs, in the sidebar; shown while
+    recording or with ``?debug=1`` in the URL."""
+    if not recorder.enabled and st.query_params.get("debug") != "1":
+        return
+    with st.sidebar.expander("Performance", expanded=True):
+        recorder.enabled = st.checkbox("Record timings", value=recorder.enabled)
+        stats = recorder.stats()
+        if stats:
+            name, count, last, mean, worst = (list(col) for col in zip(*stats))
+            st.dataframe(
+                {"Span": name, "Calls": count, "Last ms": last, "Mean ms": mean, "Max ms": worst},
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.caption("Nothing recorded yet.")
+        memory = recorder.latest_memory()
+        if memory:
+            st.caption("Memory: " + ", ".join(f"{key} {value:,}" for key, value in memory.items()))
+        c1, c2 = st.columns(2)
+        if c1.button("Memory snapshot", use_container_width=True):
+            recorder.memory("snapshot")
+            st.rerun()
+        if c2.button("Clear", use_container_width=True):
+            recorder.clear()
+            st.rerun()
+        st.download_button(
+            "Export trace",
+            json.dumps(recorder.chrome_trace()),
+            file_name="trace.json",
+            mime="application/json",
+            use_container_width=True,
+        )
+
+
+@timed("streamlit.run")
+def main():
+    st.set_page_config(page_title="College Management Dashboard", page_icon="🎓", layout="wide")
+    init_state()
+    try:
+        st.session_state.seen_version = get_roster().version
+    except Exception as e:
+        st.error(f"Could not load the student data: {e}")
+        st.stop()
+
+    st.markdown(
+        """
+        <style>
+        .app-card { background: #111827; padding: 16px; border-radius: 10px; border: 1px solid #1f2937; }
+        .app-title { color: #e2e8f0; font-size: 26px; font-weight: 700; }
+        .card-title { color: #e5e7eb; font-size: 16px; font-weight: 700; margin-bottom: 4px; }
+        .table-note { color: #9ca3af; font-size: 13px; }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
 
+    st.markdown("<div class='app-title'>College Management Dashboard</div>", unsafe_allow_html=True)
+    st.write("")
+
+    students_tab, analytics_tab = st.tabs(["Students", "Attendance Analytics"])
+
+    with students_tab:
+        summary_metrics()
+        add_form()
+        import_section()
+        export_section()
+        attendance_section()
+
+        st.write("")
+
+        # Table view (read-only)
+        with st.container():
+            st.markdown("<div class='app-card'>", unsafe_allow_html=True)
+            st.markdown("<div class='card-title'>Students</div>", unsafe_allow_html=True)
+            # Outside the fragments: a new search or order refreshes both the table and the row actions
+            c1, c2, c3 = st.columns([3, 1.2, 0.8])
+            with c1:
+                st.text_input("Search", key="search", placeholder="Name, enrollment no., course or phone", on_change=reset_pages)
+            with c2:
+                st.selectbox("Sort by", list(SORT_OPTIONS), key="sort", on_change=reset_pages)
+            with c3:
+                st.write("")
+                st.checkbox("Descending", key="descending", on_change=reset_pages)
+            students_table()
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        st.write("")
 
+        # Per-row actions with real buttons, one page at a time
+        row_actions()
+
+    with analytics_tab:
+        analytics_page()
+
+    watch_changes()
+    performance_panel()
+    recorder.memory("after run")
+
+
+if __name__ == "__main__":
+    main()
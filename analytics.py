@@ -0,0 +1,108 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from attendance import AttendanceStore
+
+
+DEFAULTER_THRESHOLD = 0.75  # attendance below this fraction puts a student on the defaulter list
+
+
+class AttendanceMatrix:
+    """Attendance as two boolean matrices, one row per session (oldest
+    first) and one column per student slot: ``marked`` and ``present``."""
+
+    def __init__(self, store: AttendanceStore) -> None:
+        sessions = store.raw_sessions()
+        self.student_ids = np.array(store.student_ids(), dtype=np.int64)
+        self.days = [s[1] for s in sessions]
+        courses, codes = np.unique([s[0] for s in sessions], return_inverse=True) if sessions else ([], [])
+        self.courses: List[str] = list(map(str, courses))
+        self.session_course = np.asarray(codes, dtype=np.int64)
+
+        width = len(self.student_ids)
+        self.marked = np.zeros((len(sessions), width), dtype=bool)
+        self.present = np.zeros((len(sessions), width), dtype=bool)
+        for row, (_, _, offset, marked, present) in enumerate(sessions):
+            # Each bitmap unpacks straight into its row, starting at its offset
+            start = offset * 8
+            for target, data in ((self.marked, marked), (self.present, present)):
+                bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little")
+                target[row, start:start + len(bits)] = bits[:width - start]
+
+
+class AttendanceReport:
+    """Every aggregate the dashboards show, computed column-wise at once.
+
+    Per-student arrays cover only students marked at least once, in slot
+    order: ``student_ids``, ``attended``, ``marked``, ``percent`` (0–100),
+    ``current_streak`` (absences since the last session attended) and
+    ``longest_streak``. Unmarked sessions, e.g. other courses', neither
+    extend nor break a streak.
+    """
+
+    def __init__(self, matrix: AttendanceMatrix) -> None:
+        present = matrix.present
+        absent = matrix.marked & ~present
+        marked_counts = matrix.marked.sum(axis=0)
+        tracked = marked_counts > 0
+
+        self.sessions = len(matrix.days)
+        self.student_ids = matrix.student_ids[tracked]
+        self.marked = marked_counts[tracked]
+        self.attended = present.sum(axis=0)[tracked]
+        self.percent = 100.0 * self.attended / np.maximum(self.marked, 1)
+
+        # Walk the sessions in order, each step a few in-place operations
+        # over every student at once: an absence extends a student's run,
+        # attending resets it
+        run = np.zeros(matrix.marked.shape[1], dtype=np.int32)
+        longest = np.zeros_like(run)
+        for row in range(self.sessions):
+            np.add(run, absent[row], out=run)
+            np.multiply(run, ~present[row], out=run)
+            np.maximum(longest, run, out=longest)
+        self.current_streak = run[tracked]
+        self.longest_streak = longest[tracked]
+
+        # Per course: present marks over all marks in its sessions
+        course_count = len(matrix.courses)
+        session_present = present.sum(axis=1)
+        session_marked = matrix.marked.sum(axis=1)
+        course_present = np.bincount(matrix.session_course, weights=session_present, minlength=course_count)
+        course_marked = np.bincount(matrix.session_course, weights=session_marked, minlength=course_count)
+        self.course_sessions = dict(zip(matrix.courses, np.bincount(matrix.session_course, minlength=course_count).tolist()))
+        self.course_percent = dict(zip(matrix.courses, (100.0 * course_present / np.maximum(course_marked, 1)).tolist()))
+
+    @property
+    def overall_percent(self) -> float:
+        return 100.0 * float(self.attended.sum()) / max(int(self.marked.sum()), 1)
+
+    def defaulters(self, threshold: float = DEFAULTER_THRESHOLD) -> np.ndarray:
+        """Indices into the per-student arrays of students below ``threshold``,
+        lowest attendance first."""
+        below = np.flatnonzero(self.percent < threshold * 100)
+        return below[np.argsort(self.percent[below], kind="stable")]
+
+    def rows(self, indices: np.ndarray) -> List[Tuple[int, int, int, float, int, int]]:
+        """``(student id, attended, marked, percent, current streak, longest
+        streak)`` for the given indices."""
+        return list(zip(
+            self.student_ids[indices].tolist(),
+            self.attended[indices].tolist(),
+            self.marked[indices].tolist(),
+            self.percent[indices].tolist(),
+            self.current_streak[indices].tolist(),
+            self.longest_streak[indices].tolist(),
+        ))
+
+    def course_rows(self) -> List[Tuple[str, int, float]]:
+        """``(course, sessions, average percent)``, worst attended first."""
+        return sorted(
+            ((course, self.course_sessions[course], self.course_percent[course]) for course in self.course_percent),
+            key=lambda row: row[2],
+        )
+
+
+def attendance_report(store: AttendanceStore) -> AttendanceReport:
+    return AttendanceReport(AttendanceMatrix(store))
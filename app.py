@@ -1,12 +1,40 @@
-import json
+from profiling import mark, recorder, timed  # first, so startup times include every import
 import os
+import queue
+import time
+from datetime import date
+from itertools import islice
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
 from tkinter import font as tkfont
 
+from attendance import open_attendance
+from attendance_core import (
+    ConflictError,
+    DuplicateEnrollmentError,
+    Row,
+    Student,
+    StudentService,
+    ValidationError,
+    make_roster,
+)
+from repository import open_repository
+from snapshot import mapped_path, snapshot_path
+# Dialogs, CSV import, export and the persistence thread are imported when
+# first used, so the window opens without waiting for them
+
 
 DATA_FILE = "storage.json"
+ROW_HEIGHT = 30
+VIRTUAL_THRESHOLD = 1000  # above this many students only the visible rows live in the Treeview
+OVERSCAN = 2
+LOAD_BATCH = 2000  # records parsed and shown per event-loop turn at startup
+SEARCH_DELAY = 120  # ms of typing pause before the table is filtered
+IMPORT_BATCH = 2000  # CSV rows validated and queued per event-loop turn
+ANALYTICS_ROWS = 1000  # most students listed at once in the attendance tab
+OVERLAY_REFRESH = 1000  # ms between updates of the performance overlay
+HEADINGS = {"name": "Student Name", "enrollment": "Enrollment No.", "courses": "Courses", "phone": "Phone"}
 
 
 class CollegeManagementApp:
@@ -16,11 +44,58 @@ class CollegeManagementApp:
         self.root.geometry("980x560")
         self.root.minsize(900, 520)
 
-        self.students = []  # list[dict]
+        self._load_job = None
+        self._virtual = False
+        self._view_offset = 0  # index of the first rendered student in virtual mode
+        self._query = ""  # search box text the table is filtered by
+        self._sort = None  # column the table is sorted by, or None for roster order
+        self._descending = False
+        self._search_job = None
+        self._import = None  # (file, batches, report) while a CSV import runs
+        self._import_job = None
+        self._export = None  # (chunks, file, path) while an export runs
+        self._report = None  # latest attendance analytics, and the revision it was computed at
+        self._report_revision = None
+        self._analytics = None  # the analytics module, once an analytics tab has been opened
+        self._analytics_tabs = None  # (students, courses) tabs until their widgets are built
+        self._load_revision = None  # storage revision the running load started at
+        self._load_started = 0.0
+        self._overlay = None  # the performance overlay window while it is open
+        self._overlay_job = None
+        self.storage = open_repository(self._data_file_path())
+        self.attendance = open_attendance(self._data_file_path())
+        # Writes happen on the persistence thread, started with the first
+        # change; failures come back through this queue
+        self._save_errors = queue.Queue()
+        self.persistence = None
+        # Validation and roster bookkeeping live in the core; this class only draws
+        self.service = StudentService(
+            self.storage,
+            submit=self._save_data,
+            snapshot=snapshot_path(self._data_file_path()),
+            mapped=mapped_path(self._data_file_path()),
+        )
 
         self._configure_styles()
         self._build_layout()
         self._load_data()
+        self._poll_save_errors()
+        self.root.bind("<F12>", self._toggle_overlay)
+
+    def close(self) -> None:
+        # Flush queued writes before the storage goes away
+        if self.persistence is not None:
+            self.persistence.close()
+        # Kept only if nothing was written since loading, so the next start
+        # can skip reading the storage
+        self.service.save_snapshot()
+        self.storage.close()
+        self.attendance.close()
+
+    @property
+    def students(self):
+        # Treeview iids are str(record id)
+        return self.service.roster
 
     # ---------------------- UI / Styles ----------------------
     def _configure_styles(self) -> None:
@@ -44,7 +119,7 @@ class CollegeManagementApp:
             background="#0b1220",
             foreground="#e5e7eb",
             fieldbackground="#0b1220",
-            rowheight=30,
+            rowheight=ROW_HEIGHT,
             borderwidth=0,
             font=("Segoe UI", 10),
         )
@@ -62,6 +137,9 @@ class CollegeManagementApp:
         header = ttk.Frame(container, style="App.TFrame")
         header.pack(fill="x", padx=16, pady=(16, 8))
         ttk.Label(header, text="College Management Dashboard", style="Header.TLabel").pack(side="left")
+        # Kept current after every change from maintained counts, never a scan
+        self.summary_label = ttk.Label(header, text="", style="Header.TLabel", font=("Segoe UI", 10))
+        self.summary_label.pack(side="right")
 
         # Card with form
         form_card = ttk.Frame(container, style="Card.TFrame")
@@ -72,7 +150,7 @@ class CollegeManagementApp:
         # Inputs
         ttk.Label(form_card, text="Name").grid(row=1, column=0, sticky="w", padx=(16, 6), pady=6)
         self.name_var = tk.StringVar()
-        self.name_entry = ttk.Entry(form_card, textvariable=self.name_var, width=p28)
+        self.name_entry = ttk.Entry(form_card, textvariable=self.name_var, width=28)
         self.name_entry.grid(row=1, column=1, sticky="w", padx=(0, 16), pady=6)
 
         ttk.Label(form_card, text="Enrollment No.").grid(row=1, column=2, sticky="w", padx=(6, 6), pady=6)
@@ -91,24 +169,51 @@ class CollegeManagementApp:
         self.phone_entry.grid(row=2, column=3, sticky="w", padx=(0, 16), pady=6)
 
         add_btn = ttk.Button(form_card, text="Add", command=self._on_add_student)
+        self.add_btn = add_btn
         add_btn.grid(row=1, column=4, rowspan=2, sticky="nsw", padx=(0, 16))
 
+        self.import_btn = ttk.Button(form_card, text="Import CSV…", command=self._on_import_csv)
+        self.import_btn.grid(row=1, column=5, rowspan=2, sticky="nsw", padx=(0, 16))
+
         # Spacer
-        form_card.grid_columnconfigure(5, weight=1)
+        form_card.grid_columnconfigure(6, weight=1)
 
-        # Table card
-        table_card = ttk.Frame(container, style="Card.TFrame")
-        table_card.pack(fill="both", expand=True, padx=16, pady=(8, 16))
+        # Tabs: the roster table, then attendance analytics
+        self.notebook = ttk.Notebook(container)
+        self.notebook.pack(fill="both", expand=True, padx=16, pady=(8, 16))
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
-        ttk.Label(table_card, text="Students", style="CardTitle.TLabel").pack(anchor="w", padx=16, pady=(12, 4))
+        # Table card
+        table_card = ttk.Frame(self.notebook, style="Card.TFrame")
+        self.notebook.add(table_card, text="Students")
+
+        table_header = ttk.Frame(table_card, style="Card.TFrame")
+        table_header.pack(fill="x", padx=16, pady=(12, 4))
+        ttk.Label(table_header, text="Students", style="CardTitle.TLabel").pack(side="left")
+
+        # Search filters the table as the user types
+        ttk.Label(table_header, text="Search").pack(side="left", padx=(24, 6))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(table_header, textvariable=self.search_var, width=30)
+        self.search_entry.pack(side="left")
+        self.search_status = ttk.Label(table_header, text="")
+        self.search_status.pack(side="left", padx=(8, 0))
+        self.search_var.trace_add("write", self._on_search_changed)
+
+        self.export_btn = ttk.Button(table_header, text="Export…", command=self._open_export_dialog)
+        self.export_btn.pack(side="right")
+        ttk.Button(table_header, text="Attendance…", command=self._open_attendance_dialog).pack(side="right", padx=(0, 8))
+
+        # Startup progress while the roster streams in
+        self.load_progress = ttk.Progressbar(table_header, mode="indeterminate", length=160)
+        self.load_status = ttk.Label(table_header, text="")
 
         # Treeview with columns
         columns = ("name", "enrollment", "courses", "phone", "actions")
         self.tree = ttk.Treeview(table_card, columns=columns, show="headings", style="App.Treeview")
-        self.tree.heading("name", text="Student Name")
-        self.tree.heading("enrollment", text="Enrollment No.")
-        self.tree.heading("courses", text="Courses")
-        self.tree.heading("phone", text="Phone")
+        # Clicking a heading sorts by that column
+        for column, text in HEADINGS.items():
+            self.tree.heading(column, text=text, command=lambda c=column: self._on_sort(c))
         self.tree.heading("actions", text="Actions")
 
         self.tree.column("name", width=220, anchor="w")
@@ -117,44 +222,204 @@ class CollegeManagementApp:
         self.tree.column("phone", width=130, anchor="center")
         self.tree.column("actions", width=160, anchor="center")
 
-        vsb = ttk.Scrollbar(table_card, orient="vertical", command=self.tree.yview)
-        hsb = ttk.Scrollbar(table_card, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscroll=vsb.set, xscroll=hsb.set)
+        self.vsb = ttk.Scrollbar(table_card, orient="vertical", command=self._on_yscroll)
+        self.hsb = ttk.Scrollbar(table_card, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(yscroll=self._on_tree_yscroll, xscroll=self.hsb.set)
 
         self.tree.pack(fill="both", expand=True, padx=12, pady=(0, 6))
-        vsb.place(in_=self.tree, relx=1.0, rely=0, relheight=1.0, anchor="ne")
-        hsb.pack(fill="x", padx=12, pady=(0, 12))
+        self.vsb.place(in_=self.tree, relx=1.0, rely=0, relheight=1.0, anchor="ne")
+        self.hsb.pack(fill="x", padx=12, pady=(0, 12))
 
         # Bind click for actions
         self.tree.bind("<Button-1>", self._on_tree_click)
 
+        # Virtual mode scrolls by record offset instead of Treeview items
+        self.tree.bind("<Configure>", self._on_tree_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", self._on_mousewheel)
+        self.tree.bind("<Button-5>", self._on_mousewheel)
+
         # Footer action hints
         hint = ttk.Label(table_card, text="Tip: Click Edit to modify a row or Delete to remove it.")
         hint.pack(anchor="w", padx=16, pady=(0, 12))
 
+        self._build_analytics_tabs()
+
+    def _build_analytics_tabs(self) -> None:
+        students_tab = ttk.Frame(self.notebook, style="Card.TFrame")
+        courses_tab = ttk.Frame(self.notebook, style="Card.TFrame")
+        self.notebook.add(students_tab, text="Attendance")
+        self.notebook.add(courses_tab, text="Course Averages")
+        # Filled in when first opened: NumPy takes longer to import than the rest of the app
+        self._analytics_tabs = (students_tab, courses_tab)
+
+    def _load_analytics(self):
+        """The analytics module, importing it and building its tabs the first
+        time; None if NumPy is missing."""
+        if self._analytics_tabs is None:
+            return self._analytics
+        students_tab, courses_tab = self._analytics_tabs
+        self._analytics_tabs = None
+        try:
+            import analytics
+        except ImportError:  # NumPy missing: the analytics tabs explain instead
+            for tab in (students_tab, courses_tab):
+                ttk.Label(tab, text="Install NumPy to see attendance analytics (pip install numpy).").pack(padx=16, pady=16)
+            return None
+        self._analytics = analytics
+
+        header = ttk.Frame(students_tab, style="Card.TFrame")
+        header.pack(fill="x", padx=16, pady=(12, 4))
+        self.analytics_status = ttk.Label(header, text="")
+        self.analytics_status.pack(side="left")
+        threshold = round(analytics.DEFAULTER_THRESHOLD * 100)
+        self.defaulters_only = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            header, text=f"Below {threshold}% only", variable=self.defaulters_only, command=self._render_analytics
+        ).pack(side="right")
+
+        columns = ("name", "enrollment", "courses", "attended", "percent", "streak", "longest")
+        self.attendance_tree = ttk.Treeview(students_tab, columns=columns, show="headings", style="App.Treeview")
+        for column, title, width, anchor in (
+            ("name", "Student Name", 200, "w"),
+            ("enrollment", "Enrollment No.", 130, "center"),
+            ("courses", "Courses", 140, "w"),
+            ("attended", "Attended", 90, "center"),
+            ("percent", "Attendance %", 100, "center"),
+            ("streak", "Absent Streak", 100, "center"),
+            ("longest", "Longest Streak", 100, "center"),
+        ):
+            self.attendance_tree.heading(column, text=title)
+            self.attendance_tree.column(column, width=width, anchor=anchor)
+        self.attendance_tree.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+
+        columns = ("course", "students", "sessions", "average")
+        self.courses_tree = ttk.Treeview(courses_tab, columns=columns, show="headings", style="App.Treeview")
+        for column, title, width, anchor in (
+            ("course", "Course", 220, "w"),
+            ("students", "Students", 100, "center"),
+            ("sessions", "Sessions", 100, "center"),
+            ("average", "Average Attendance %", 160, "center"),
+        ):
+            self.courses_tree.heading(column, text=title)
+            self.courses_tree.column(column, width=width, anchor=anchor)
+        self.courses_tree.pack(fill="both", expand=True, padx=12, pady=12)
+        return analytics
+
     # ---------------------- Data Persistence ----------------------
     def _data_file_path(self) -> str:
         return os.path.join(os.path.dirname(os.path.abspath(__file__)), DATA_FILE)
 
+    @timed()
     def _load_data(self) -> None:
-        path = self._data_file_path()
-        if os.path.exists(path):
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    self.students = json.load(f)
-            except Exception:
-                self.students = []
-        else:
-            self.students = []
+        # Records stream in over several event-loop turns so the window is
+        # usable right away; adding waits until every enrollment is known
+        if self._load_job is not None:
+            self.root.after_cancel(self._load_job)
+        if self._import is not None:
+            # Its batches were validated against the roster being replaced
+            self._finish_import("The import was stopped because the list had to be reloaded.")
+        self._load_started = time.perf_counter()
+        self.service.replace_roster(make_roster())
         self._refresh_table()
+        self._loader = None
+        self.add_btn.state(["disabled"])
+        self.import_btn.state(["disabled"])
+        self.load_status.configure(text="Loading…")
+        self.load_status.pack(side="right")
+        # Idle callbacks run in order, so the window is drawn before loading starts
+        self._load_job = self.root.after_idle(self._start_load)
+
+    @timed()
+    def _start_load(self) -> None:
+        mark("window drawn, loading the roster")
+        # A snapshot saved at the storage's current revision replaces reading it
+        if self.service.load_snapshot():
+            self._refresh_table()
+            self._finish_load()
+            return
+        self._load_revision = self.storage.revision()
+        self._loader = self.storage.iter_records()
+        self._load_total = self.storage.count()
+        if self._load_total:
+            self.load_progress.configure(mode="determinate", maximum=self._load_total, value=0)
+        else:
+            self.load_progress.start(10)
+        self.load_progress.pack(side="right", padx=(0, 8))
+        self._load_next_batch()
 
-    def _save_data(self) -> None:
-        path = self._data_file_path()
+    @timed()
+    def _load_next_batch(self) -> None:
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(self.students, f, indent=2)
+            batch = list(islice(self._loader, LOAD_BATCH))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save data: {e}")
+            batch = []
+            self._load_revision = None  # the roster is incomplete
+            messagebox.showerror("Error", f"Failed to load data: {e}")
+        self.students.extend(batch)
+        self._update_summary()
+        if self._ordered_view() or self._virtual or len(self.students) > VIRTUAL_THRESHOLD:
+            self._refresh_table()
+        else:
+            for s in batch:
+                self.tree.insert("", "end", iid=str(s.id), values=self._row_values(s.as_row()))
+
+        if len(batch) == LOAD_BATCH:
+            if self._load_total:
+                self.load_progress.configure(value=len(self.students))
+            self.load_status.configure(text=f"Loading… {len(self.students):,} students")
+            self._load_job = self.root.after(1, self._load_next_batch)
+            return
+
+        # Whole now; save_snapshot checks nothing was written since the start
+        self.service.replace_roster(self.students, self._load_revision)
+        self._finish_load()
+
+    def _finish_load(self) -> None:
+        mark(f"roster loaded ({len(self.students):,} students)")
+        # The whole load, across the event-loop turns it took
+        recorder.record("roster load", self._load_started, time.perf_counter(), {"students": len(self.students)})
+        recorder.memory("after load")
+        self._load_job = None
+        self._loader = None
+        self.load_progress.stop()
+        self.load_progress.pack_forget()
+        self.load_status.pack_forget()
+        self.add_btn.state(["!disabled"])
+        self.import_btn.state(["!disabled"])
+
+    @timed()
+    def _save_data(self, op: dict) -> None:
+        # Only the mutation is written, and off the Tk thread
+        if self.persistence is None:
+            from persistence import PersistenceWorker
+
+            self.persistence = PersistenceWorker(self.storage, on_error=lambda op, e: self._save_errors.put((op, e)))
+        self.persistence.submit(op)
+
+    def _poll_save_errors(self) -> None:
+        errors = []
+        while True:
+            try:
+                errors.append(self._save_errors.get_nowait())
+            except queue.Empty:
+                break
+        if errors:
+            self._report_save_errors(errors)
+        self.root.after(100, self._poll_save_errors)
+
+    def _report_save_errors(self, errors: list) -> None:
+        op, e = errors[0]
+        more = f" ({len(errors) - 1} more changes also failed)" if len(errors) > 1 else ""
+        if isinstance(e, DuplicateEnrollmentError):
+            messagebox.showwarning("Invalid Input", f"{e}{more}")
+        elif isinstance(e, ConflictError):
+            messagebox.showwarning("Changed Elsewhere", f"{e}{more} The list has been reloaded with the latest data.")
+        else:
+            messagebox.showerror("Error", f"Failed to save data: {e}{more}")
+        # The table already shows the failed change; reload what was stored
+        self.persistence.flush()
+        self._load_data()
 
     # ---------------------- Helpers ----------------------
     @staticmethod
@@ -162,30 +427,162 @@ class CollegeManagementApp:
         # Using padded text to create clickable regions
         return "[ Edit ]    [ Delete ]"
 
+    def _row_values(self, row: Row) -> tuple:
+        return row[1:] + (self._format_actions_text(),)
+
+    def _ordered_view(self) -> bool:
+        # Searching or sorting: a change can move any row anywhere in the view
+        return bool(self._query) or self._sort is not None
+
+    def _view_page(self, start: int = 0, stop: int = None) -> tuple:
+        limit = None if stop is None else stop - start
+        return self.students.query(start, limit, self._sort, self._descending, self._query)
+
+    def _view_len(self) -> int:
+        return self._view_page(0, 0)[0]
+
+    def _view_rows(self, start: int = 0, stop: int = None) -> list:
+        return self._view_page(start, stop)[1]
+
+    def _update_summary(self) -> None:
+        present, marked = self.attendance.day_totals(date.today().isoformat())
+        today = f"{100 * present / marked:.0f}% present today" if marked else "no attendance today"
+        self.summary_label.configure(
+            text=f"{len(self.students):,} students · {len(self.students.catalog):,} courses · {today}"
+        )
+
+    @timed()
     def _refresh_table(self) -> None:
+        self._update_summary()
+        count = self._view_len()
+        if self._query:
+            self.search_status.configure(text=f"{count:,} match" + ("" if count == 1 else "es"))
+        else:
+            self.search_status.configure(text="")
+        self._virtual = count > VIRTUAL_THRESHOLD
+        if self._virtual:
+            self._render_window()
+            return
         self.tree.delete(*self.tree.get_children())
-        for idx, s in enumerate(self.students):
-            values = (
-                s.get("name", ""),
-                s.get("enrollment", ""),
-                s.get("courses", ""),
-                s.get("phone", ""),
-                self._format_actions_text(),
-            )
-            self.tree.insert("", "end", iid=str(idx), values=values)
+        for row in self._view_rows():
+            self.tree.insert("", "end", iid=str(row[0]), values=self._row_values(row))
+
+    # ---------------------- Search ----------------------
+    def _on_search_changed(self, *args) -> None:
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DELAY, self._run_search)
+
+    def _run_search(self) -> None:
+        self._search_job = None
+        self._query = self.search_var.get().strip()
+        self._view_offset = 0
+        self._refresh_table()
 
-    @staticmethod
-    def _validate_inputs(name: str, enrollment: str, courses: str, phone: str) -> tuple[bool, str]:
-        if not name.strip():
-            return False, "Name is required."
-        if not enrollment.strip():
-            return False, "Enrollment number is required."
-        if not courses.strip():
-            return False, "Courses are required."
-        phone_digits = ''.join(ch for ch in phone if ch.isdigit())
-        if len(phone_digits) < 7:
-            return False, "Phone must have at least 7 digits."
-        return True, ""
+    # ---------------------- Sorting ----------------------
+    def _on_sort(self, column: str) -> None:
+        # Each click cycles ascending, descending, then back to roster order
+        if self._sort != column:
+            self._sort, self._descending = column, False
+        elif not self._descending:
+            self._descending = True
+        else:
+            self._sort, self._descending = None, False
+        for name, text in HEADINGS.items():
+            arrow = "" if name != self._sort else (" ▼" if self._descending else " ▲")
+            self.tree.heading(name, text=text + arrow)
+        self._view_offset = 0
+        self._refresh_table()
+
+    # ---------------------- Incremental Table Updates ----------------------
+    def _table_insert(self, record: Student) -> None:
+        # While searching or sorted, a change can move any row in or out of
+        # the view, so the view is re-queried
+        if self._ordered_view():
+            self._refresh_table()
+            return
+        self._update_summary()
+        # A virtual window only re-renders its visible rows; crossing the
+        # threshold switches modes with a single full refresh
+        if self._virtual or len(self.students) > VIRTUAL_THRESHOLD:
+            self._refresh_table()
+            return
+        self.tree.insert("", "end", iid=str(record.id), values=self._row_values(record.as_row()))
+
+    def _table_update(self, record: Student) -> None:
+        if self._ordered_view():
+            self._refresh_table()
+            return
+        self._update_summary()
+        iid = str(record.id)
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self._row_values(record.as_row()))
+
+    def _table_delete(self, record_id: int) -> None:
+        if self._ordered_view() or self._virtual:
+            self._refresh_table()
+            return
+        self._update_summary()
+        iid = str(record_id)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+
+    # ---------------------- Virtual Table ----------------------
+    def _page_size(self) -> int:
+        # Rows that fit below the heading row
+        return max(1, self.tree.winfo_height() // ROW_HEIGHT - 1)
+
+    def _render_window(self) -> None:
+        total = self._view_len()
+        page = self._page_size()
+        self._view_offset = max(0, min(self._view_offset, total - page))
+        stop = min(total, self._view_offset + page + OVERSCAN)
+
+        self.tree.delete(*self.tree.get_children())
+        for row in self._view_rows(self._view_offset, stop):
+            self.tree.insert("", "end", iid=str(row[0]), values=self._row_values(row))
+        self._sync_vsb()
+
+    def _sync_vsb(self) -> None:
+        total = self._view_len()
+        if not total:
+            self.vsb.set(0.0, 1.0)
+            return
+        first = self._view_offset / total
+        last = min(1.0, (self._view_offset + self._page_size()) / total)
+        self.vsb.set(first, last)
+
+    def _on_tree_yscroll(self, first: str, last: str) -> None:
+        # In virtual mode the Treeview only knows about the rendered window
+        if self._virtual:
+            self._sync_vsb()
+        else:
+            self.vsb.set(first, last)
+
+    def _on_yscroll(self, *args) -> None:
+        if not self._virtual:
+            self.tree.yview(*args)
+            return
+        page = self._page_size()
+        if args[0] == "moveto":
+            self._view_offset = int(float(args[1]) * self._view_len())
+        elif args[0] == "scroll":
+            step = page if args[2] == "pages" else 1
+            self._view_offset += int(args[1]) * step
+        self._render_window()
+
+    def _on_tree_configure(self, event: tk.Event) -> None:
+        if self._virtual:
+            self._render_window()
+
+    def _on_mousewheel(self, event: tk.Event):
+        if not self._virtual:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self._on_yscroll("scroll", -3, "units")
+        else:
+            self._on_yscroll("scroll", 3, "units")
+        return "break"
 
     # ---------------------- Events: Add ----------------------
     def _on_add_student(self) -> None:
@@ -194,19 +591,12 @@ class CollegeManagementApp:
         courses = self.courses_var.get().strip()
         phone = self.phone_var.get().strip()
 
-        ok, msg = self._validate_inputs(name, enrollment, courses, phone)
-        if not ok:
-            messagebox.showwarning("Invalid Input", msg)
+        try:
+            record = self.service.add(name, enrollment, courses, phone)
+        except ValidationError as e:
+            messagebox.showwarning("Invalid Input", str(e))
             return
-
-        self.students.append({
-            "name": name,
-            "enrollment": enrollment,
-            "courses": courses,
-            "phone": phone,
-        })
-        self._save_data()
-        self._refresh_table()
+        self._table_insert(record)
 
         # Clear inputs, keep read-only nature in table (Treeview cells are non-editable)
         self.name_var.set("")
@@ -214,7 +604,365 @@ class CollegeManagementApp:
         self.courses_var.set("")
         self.phone_var.set("")
 
+    # ---------------------- Events: Import ----------------------
+    def _on_import_csv(self) -> None:
+        from tkinter import filedialog
+
+        from importer import ImportReport, import_batches, read_rows
+
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Import Students",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            f = open(path, newline="", encoding="utf-8-sig")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to open file: {e}")
+            return
+        # Rows are validated a batch per event-loop turn; the persistence
+        # worker coalesces each batch's adds into one write
+        self._import = (f, import_batches(read_rows(f), self.students, IMPORT_BATCH), ImportReport())
+        self.add_btn.state(["disabled"])
+        self.import_btn.state(["disabled"])
+        self.load_progress.configure(mode="indeterminate")
+        self.load_progress.start(10)
+        self.load_status.configure(text="Importing…")
+        self.load_status.pack(side="right")
+        self.load_progress.pack(side="right", padx=(0, 8))
+        self._import_job = self.root.after(0, self._import_next_batch)
+
+    def _import_next_batch(self) -> None:
+        import csv
+
+        self._import_job = None
+        _, batches, report = self._import
+        try:
+            batch = next(batches, None)
+        except (ValueError, csv.Error, UnicodeDecodeError, OSError) as e:
+            self._finish_import(f"Import failed: {e}")
+            return
+        if batch is None:
+            self._finish_import()
+            return
+
+        records, errors = batch
+        report.errors.extend(errors)
+        self.service.add_batch([record for _, record in records])
+        report.imported += len(records)
+        self._refresh_table()
+        self.load_status.configure(text=f"Importing… {report.imported:,} added")
+        self._import_job = self.root.after(1, self._import_next_batch)
+
+    def _finish_import(self, failure: str = None) -> None:
+        f, _, report = self._import
+        f.close()
+        if self._import_job is not None:
+            self.root.after_cancel(self._import_job)
+        self._import = None
+        self._import_job = None
+        self.load_progress.stop()
+        self.load_progress.pack_forget()
+        self.load_status.pack_forget()
+        self.add_btn.state(["!disabled"])
+        self.import_btn.state(["!disabled"])
+
+        summary = report.summary()
+        if failure:
+            messagebox.showerror("Import", f"{failure}\n\n{summary}")
+        elif not report.errors:
+            messagebox.showinfo("Import", summary)
+            return
+        if report.errors and messagebox.askyesno("Import", f"{summary}\n\nSave the skipped rows and reasons to a file?"):
+            from tkinter import filedialog
+
+            path = filedialog.asksaveasfilename(
+                parent=self.root,
+                title="Save Import Errors",
+                defaultextension=".csv",
+                initialfile="import_errors.csv",
+                filetypes=[("CSV files", "*.csv")],
+            )
+            if path:
+                try:
+                    with open(path, "w", newline="", encoding="utf-8") as out:
+                        report.write_errors(out)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Failed to save the error report: {e}")
+
+    # ---------------------- Events: Export ----------------------
+    def _open_export_dialog(self) -> None:
+        from tkinter import filedialog
+
+        from exporter import FORMATS
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export Students")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.geometry("420x240")
+
+        frm = ttk.Frame(dialog, padding=16)
+        frm.pack(fill="both", expand=True)
+
+        format_labels = {"CSV": "csv", "JSON Lines": "jsonl", "Columnar (binary)": "columnar"}
+        format_var = tk.StringVar(value="CSV")
+        course_var = tk.StringVar()
+        from_var = tk.StringVar()
+        to_var = tk.StringVar()
+
+        ttk.Label(frm, text="Format").grid(row=0, column=0, sticky="w", padx=(0, 8), pady=8)
+        ttk.Combobox(frm, textvariable=format_var, values=list(format_labels), state="readonly", width=20).grid(row=0, column=1, sticky="w", pady=8)
+
+        ttk.Label(frm, text="Course").grid(row=1, column=0, sticky="w", padx=(0, 8), pady=8)
+        ttk.Entry(frm, textvariable=course_var, width=28).grid(row=1, column=1, sticky="w", pady=8)
+
+        ttk.Label(frm, text="Enrollment from").grid(row=2, column=0, sticky="w", padx=(0, 8), pady=8)
+        ttk.Entry(frm, textvariable=from_var, width=20).grid(row=2, column=1, sticky="w", pady=8)
+
+        ttk.Label(frm, text="Enrollment to").grid(row=3, column=0, sticky="w", padx=(0, 8), pady=8)
+        ttk.Entry(frm, textvariable=to_var, width=20).grid(row=3, column=1, sticky="w", pady=8)
+
+        btns = ttk.Frame(frm)
+        btns.grid(row=4, column=0, columnspan=2, sticky="e", pady=(12, 0))
+
+        def on_export() -> None:
+            fmt = format_labels[format_var.get()]
+            extension = FORMATS[fmt][1]
+            path = filedialog.asksaveasfilename(
+                parent=dialog,
+                title="Export Students",
+                defaultextension=extension,
+                initialfile="students" + extension,
+                filetypes=[(format_var.get(), "*" + extension), ("All files", "*.*")],
+            )
+            if not path:
+                return
+            dialog.destroy()
+            # Blank filters mean no filter
+            self._start_export(path, fmt, course_var.get().strip() or None,
+                               from_var.get().strip() or None, to_var.get().strip() or None)
+
+        ttk.Button(btns, text="Cancel", command=dialog.destroy).pack(side="right", padx=(8, 0))
+        ttk.Button(btns, text="Export", command=on_export).pack(side="right")
+
+        dialog.wait_visibility()
+        dialog.focus_set()
+
+    def _start_export(self, path: str, fmt: str, course: str, enrollment_from: str, enrollment_to: str) -> None:
+        from exporter import export_chunks
+
+        # Export what is stored, including changes still queued for writing
+        if self.persistence is not None:
+            self.persistence.flush()
+        tmp_path = path + ".tmp"
+        try:
+            f = open(tmp_path, "wb")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export: {e}")
+            return
+        # Records stream from the storage a chunk per event-loop turn, so
+        # neither memory nor the window is tied up by a large roster
+        self._export = (export_chunks(self.storage, fmt, course, enrollment_from, enrollment_to), f, path)
+        self.export_btn.state(["disabled"])
+        self.load_status.configure(text="Exporting…")
+        self.load_status.pack(side="right", padx=(0, 8))
+        self.root.after(0, self._export_next_chunk)
+
+    def _export_next_chunk(self) -> None:
+        chunks, f, path = self._export
+        try:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                f.write(chunk)
+                self.root.after(1, self._export_next_chunk)
+                return
+            f.close()
+            os.replace(f.name, path)
+        except Exception as e:
+            f.close()
+            os.remove(f.name)
+            self._finish_export()
+            messagebox.showerror("Error", f"Failed to export: {e}")
+            return
+        self._finish_export()
+        messagebox.showinfo("Export", f"Students exported to {path}")
+
+    def _finish_export(self) -> None:
+        self._export = None
+        self.export_btn.state(["!disabled"])
+        if self._load_job is None and self._import is None:
+            self.load_status.pack_forget()
+
+    # ---------------------- Attendance Analytics ----------------------
+    def _on_tab_changed(self, event: tk.Event = None) -> None:
+        # Recomputed only when an analytics tab is shown and attendance has
+        # changed since the last time
+        if self.notebook.index("current") == 0:
+            return
+        analytics = self._load_analytics()
+        if analytics is None:
+            return
+        revision = self.attendance.revision()
+        if revision != self._report_revision:
+            self._report = analytics.attendance_report(self.attendance)
+            self._report_revision = revision
+        self._render_analytics()
+
+    def _render_analytics(self) -> None:
+        report = self._report
+        if report is None:
+            return
+        if self.defaulters_only.get():
+            indices = report.defaulters()
+        else:
+            indices = report.percent.argsort(kind="stable")
+        shown = indices[:ANALYTICS_ROWS]
+
+        self.attendance_tree.delete(*self.attendance_tree.get_children())
+        for record_id, attended, marked, percent, streak, longest in report.rows(shown):
+            student = self.students.get(record_id)
+            if student is None:
+                continue  # deleted since it was marked
+            self.attendance_tree.insert("", "end", iid=str(record_id), values=(
+                student.name, student.enrollment, student.courses,
+                f"{attended}/{marked}", f"{percent:.1f}", streak, longest,
+            ))
+        more = f" Showing the lowest {len(shown):,} of {len(indices):,}." if len(indices) > len(shown) else ""
+        self.analytics_status.configure(
+            text=f"{len(report.student_ids):,} students over {report.sessions:,} sessions, "
+                 f"{report.overall_percent:.1f}% attendance overall. "
+                 f"{len(report.defaulters()):,} below {round(self._analytics.DEFAULTER_THRESHOLD * 100)}%.{more}"
+        )
+
+        self.courses_tree.delete(*self.courses_tree.get_children())
+        for course, sessions, average in report.course_rows():
+            students = self.students.catalog.count(course)
+            self.courses_tree.insert("", "end", values=(course, students, sessions, f"{average:.1f}"))
+
+    # ---------------------- Events: Attendance ----------------------
+    def _open_attendance_dialog(self) -> None:
+        courses = self.students.course_names()
+        if not courses:
+            messagebox.showinfo("Attendance", "Add students with a course first.")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Attendance")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        dialog.geometry("560x520")
+
+        frm = ttk.Frame(dialog, padding=16)
+        frm.pack(fill="both", expand=True)
+
+        course_var = tk.StringVar(value=courses[0])
+        day_var = tk.StringVar(value=date.today().isoformat())
+        marks = {}  # student id -> present, for the class shown
+
+        top = ttk.Frame(frm)
+        top.pack(fill="x")
+        ttk.Label(top, text="Course").pack(side="left", padx=(0, 6))
+        course_box = ttk.Combobox(top, textvariable=course_var, values=courses, state="readonly", width=18)
+        course_box.pack(side="left")
+        ttk.Label(top, text="Date (YYYY-MM-DD)").pack(side="left", padx=(16, 6))
+        ttk.Entry(top, textvariable=day_var, width=12).pack(side="left")
+
+        columns = ("name", "enrollment", "status", "attended")
+        tree = ttk.Treeview(frm, columns=columns, show="headings", style="App.Treeview")
+        tree.heading("name", text="Student Name")
+        tree.heading("enrollment", text="Enrollment No.")
+        tree.heading("status", text="Today")
+        tree.heading("attended", text="Attended")
+        tree.column("name", width=180, anchor="w")
+        tree.column("enrollment", width=130, anchor="center")
+        tree.column("status", width=80, anchor="center")
+        tree.column("attended", width=90, anchor="center")
+        tree.pack(fill="both", expand=True, pady=(12, 6))
+
+        status = ttk.Label(frm, text="")
+        status.pack(anchor="w")
+
+        def status_text(present: bool) -> str:
+            return "Present" if present else "Absent"
+
+        def update_status() -> None:
+            status.configure(text=f"{sum(marks.values())} of {len(marks)} present. Click a row to toggle.")
+
+        def load() -> None:
+            day = day_var.get().strip()
+            try:
+                date.fromisoformat(day)
+            except ValueError:
+                messagebox.showwarning("Invalid Input", "Enter the date as YYYY-MM-DD.", parent=dialog)
+                return
+            course = course_var.get()
+            # The class is everyone whose Courses field is this course
+            members = [self.students.at(p) for p in self.students.filter_course(course)]
+            saved = self.attendance.session(course, day) or {}
+            totals = self.attendance.summary(course)
+            marks.clear()
+            tree.delete(*tree.get_children())
+            for s in members:
+                marks[s.id] = saved.get(s.id, True)
+                attended, total = totals.get(s.id, (0, 0))
+                tree.insert("", "end", iid=str(s.id), values=(s.name, s.enrollment, status_text(marks[s.id]), f"{attended}/{total}"))
+            update_status()
+
+        def set_mark(record_id: int, present: bool) -> None:
+            marks[record_id] = present
+            tree.set(str(record_id), "status", status_text(present))
+
+        def on_click(event: tk.Event) -> None:
+            iid = tree.identify_row(event.y)
+            if iid:
+                set_mark(int(iid), not marks[int(iid)])
+                update_status()
+
+        def mark_all(present: bool) -> None:
+            for record_id in list(marks):
+                set_mark(record_id, present)
+            update_status()
+
+        def on_save() -> None:
+            day = day_var.get().strip()
+            try:
+                date.fromisoformat(day)
+            except ValueError:
+                messagebox.showwarning("Invalid Input", "Enter the date as YYYY-MM-DD.", parent=dialog)
+                return
+            # The whole class is written as one session bitmap
+            present = [i for i, p in marks.items() if p]
+            absent = [i for i, p in marks.items() if not p]
+            try:
+                self.attendance.mark(course_var.get(), day, present, absent)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save attendance: {e}", parent=dialog)
+                return
+            load()
+            status.configure(text=f"Saved: {len(present)} of {len(marks)} present.")
+            self._update_summary()
+            self._on_tab_changed()
+
+        tree.bind("<Button-1>", on_click)
+        course_box.bind("<<ComboboxSelected>>", lambda e: load())
+
+        btns = ttk.Frame(frm)
+        btns.pack(fill="x", pady=(12, 0))
+        ttk.Button(btns, text="Load", command=load).pack(side="left")
+        ttk.Button(btns, text="All Present", command=lambda: mark_all(True)).pack(side="left", padx=(8, 0))
+        ttk.Button(btns, text="All Absent", command=lambda: mark_all(False)).pack(side="left", padx=(8, 0))
+        ttk.Button(btns, text="Close", command=dialog.destroy).pack(side="right", padx=(8, 0))
+        ttk.Button(btns, text="Save", command=on_save).pack(side="right")
+
+        load()
+        dialog.wait_visibility()
+        dialog.focus_set()
+
     # ---------------------- Events: Tree Click (Actions) ----------------------
+    @timed()
     def _on_tree_click(self, event: tk.Event) -> None:
         # Determine if click was on actions column of a specific row
         region = self.tree.identify("region", event.x, event.y)
@@ -223,7 +971,7 @@ class CollegeManagementApp:
 
         row_id = self.tree.identify_row(event.y)
         col_id = self.tree.identify_column(event.x)  # #1, #2, ...
-        if not row_id or col_id != f"#{len(self.tree["columns"])}":  # last column 'actions'
+        if not row_id or col_id != f"#{len(self.tree['columns'])}":  # last column 'actions'
             return
 
         # Determine whether Edit or Delete area was clicked based on x within cell bbox
@@ -255,11 +1003,12 @@ class CollegeManagementApp:
             self._confirm_delete(int(row_id))
 
     # ---------------------- Edit ----------------------
-    def _open_edit_dialog(self, index: int) -> None:
-        if not (0 <= index < len(self.students)):
+    def _open_edit_dialog(self, record_id: int) -> None:
+        record = self.students.get(record_id)
+        if record is None:
             return
-
-        record = self.students[index]
+        # Saving is rejected if the record moves past this version meanwhile
+        opened_version = record.version
 
         dialog = tk.Toplevel(self.root)
         dialog.title("Edit Student")
@@ -270,10 +1019,10 @@ class CollegeManagementApp:
         frm = ttk.Frame(dialog, padding=16)
         frm.pack(fill="both", expand=True)
 
-        name_var = tk.StringVar(value=record.get("name", ""))
-        enroll_var = tk.StringVar(value=record.get("enrollment", ""))
-        courses_var = tk.StringVar(value=record.get("courses", ""))
-        phone_var = tk.StringVar(value=record.get("phone", ""))
+        name_var = tk.StringVar(value=record.name)
+        enroll_var = tk.StringVar(value=record.enrollment)
+        courses_var = tk.StringVar(value=record.courses)
+        phone_var = tk.StringVar(value=record.phone)
 
         ttk.Label(frm, text="Name").grid(row=0, column=0, sticky="w", padx=(0, 8), pady=8)
         ttk.Entry(frm, textvariable=name_var, width=34).grid(row=0, column=1, sticky="w", pady=8)
@@ -295,18 +1044,16 @@ class CollegeManagementApp:
             enrollment = enroll_var.get().strip()
             courses = courses_var.get().strip()
             phone = phone_var.get().strip()
-            ok, msg = self._validate_inputs(name, enrollment, courses, phone)
-            if not ok:
-                messagebox.showwarning("Invalid Input", msg, parent=dialog)
+            try:
+                updated = self.service.edit(record_id, name, enrollment, courses, phone, expected_version=opened_version)
+            except ValidationError as e:
+                messagebox.showwarning("Invalid Input", str(e), parent=dialog)
                 return
-            self.students[index] = {
-                "name": name,
-                "enrollment": enrollment,
-                "courses": courses,
-                "phone": phone,
-            }
-            self._save_data()
-            self._refresh_table()
+            except ConflictError as e:
+                messagebox.showwarning("Changed Elsewhere", str(e), parent=dialog)
+                dialog.destroy()
+                return
+            self._table_update(updated)
             dialog.destroy()
 
         ttk.Button(btns, text="Cancel", command=dialog.destroy).pack(side="right", padx=(8, 0))
@@ -315,22 +1062,127 @@ class CollegeManagementApp:
         dialog.wait_visibility()
         dialog.focus_set()
 
+    # ---------------------- Performance Overlay ----------------------
+    def _toggle_overlay(self, event: tk.Event = None) -> None:
+        # F12 opens and closes it; recording can be switched on from here
+        if self._overlay is not None:
+            if self._overlay_job is not None:
+                self.root.after_cancel(self._overlay_job)
+                self._overlay_job = None
+            self._overlay.destroy()
+            self._overlay = None
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Performance")
+        win.geometry("620x380")
+        win.attributes("-topmost", True)
+        win.protocol("WM_DELETE_WINDOW", self._toggle_overlay)
+        self._overlay = win
+
+        top = ttk.Frame(win, padding=(12, 12, 12, 4))
+        top.pack(fill="x")
+        recording = tk.BooleanVar(value=recorder.enabled)
+
+        def set_recording() -> None:
+            recorder.enabled = recording.get()
+            self._refresh_overlay()
+
+        def clear() -> None:
+            recorder.clear()
+            self._refresh_overlay()
+
+        def snapshot_memory() -> None:
+            recorder.memory("snapshot")
+            self._refresh_overlay()
+
+        ttk.Checkbutton(top, text="Record timings", variable=recording, command=set_recording).pack(side="left")
+        ttk.Button(top, text="Export Trace…", command=self._export_trace).pack(side="right")
+        ttk.Button(top, text="Clear", command=clear).pack(side="right", padx=(0, 8))
+        ttk.Button(top, text="Memory Snapshot", command=snapshot_memory).pack(side="right", padx=(0, 8))
+        self._overlay_status = ttk.Label(win, text="", padding=(12, 0))
+        self._overlay_status.pack(fill="x")
+
+        columns = ("name", "count", "last", "mean", "max")
+        tree = ttk.Treeview(win, columns=columns, show="headings")
+        for column, title, width, anchor in (
+            ("name", "Span", 260, "w"),
+            ("count", "Calls", 60, "center"),
+            ("last", "Last ms", 80, "e"),
+            ("mean", "Mean ms", 80, "e"),
+            ("max", "Max ms", 80, "e"),
+        ):
+            tree.heading(column, text=title)
+            tree.column(column, width=width, anchor=anchor)
+        tree.pack(fill="both", expand=True, padx=12, pady=(4, 12))
+        self._overlay_tree = tree
+        self._refresh_overlay(repeat=True)
+
+    def _refresh_overlay(self, repeat: bool = False) -> None:
+        if self._overlay is None:
+            return
+        tree = self._overlay_tree
+        tree.delete(*tree.get_children())
+        for name, calls, last, mean, longest in recorder.stats():
+            tree.insert("", "end", values=(name, calls, f"{last:.2f}", f"{mean:.2f}", f"{longest:.2f}"))
+        memory = recorder.latest_memory()
+        status = "Recording." if recorder.enabled else "Not recording (start with CMS_PROFILE=1 to record from launch)."
+        if memory:
+            status += "  Memory: " + ", ".join(f"{k.replace('_mb', '')} {v:,.1f} MB" for k, v in memory.items())
+        self._overlay_status.configure(text=f"{len(recorder.events):,} events. {status}")
+        if repeat:
+            self._overlay_job = self.root.after(OVERLAY_REFRESH, self._refresh_overlay, True)
+
+    def _export_trace(self) -> None:
+        import json
+        from tkinter import filedialog
+
+        path = filedialog.asksaveasfilename(
+            parent=self._overlay,
+            title="Export Trace",
+            defaultextension=".json",
+            initialfile="trace.json",
+            filetypes=[("Chrome trace", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(recorder.chrome_trace(), f)
+        except OSError as e:
+            messagebox.showerror("Export Trace", f"Could not write the trace: {e}", parent=self._overlay)
+            return
+        messagebox.showinfo("Export Trace", f"Trace saved to {path}. Open it in chrome://tracing or ui.perfetto.dev.",
+                            parent=self._overlay)
+
     # ---------------------- Delete ----------------------
-    def _confirm_delete(self, index: int) -> None:
-        if not (0 <= index < len(self.students)):
+    def _confirm_delete(self, record_id: int) -> None:
+        rec = self.students.get(record_id)
+        if rec is None:
             return
-        rec = self.students[index]
-        name = rec.get("name", "this record")
+        name = rec.name or "this record"
+        # Read now: the roster may update rec in place while the question is open
+        version = rec.version
         if messagebox.askyesno("Delete", f"Delete {name}? This cannot be undone."):
-            del self.students[index]
-            self._save_data()
-            self._refresh_table()
+            try:
+                self.service.delete(record_id, expected_version=version)
+            except (ConflictError, LookupError) as e:
+                # Changed or removed while the question was open, e.g. by a
+                # reload; the roster has the latest, so redraw from it
+                messagebox.showwarning("Changed Elsewhere", str(e))
+                self._refresh_table()
+                return
+            self._table_delete(record_id)
 
 
 def main() -> None:
+    mark("imports done")
     root = tk.Tk()
     app = CollegeManagementApp(root)
-    root.mainloop()
+    mark("window built")
+    try:
+        root.mainloop()
+    finally:
+        app.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,322 @@
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+ATTENDANCE_FILE = "attendance.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slots (
+    slot INTEGER PRIMARY KEY,
+    student_id INTEGER NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    course TEXT NOT NULL,
+    day TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    marked BLOB NOT NULL,
+    present BLOB NOT NULL,
+    PRIMARY KEY (course, day)
+);
+CREATE TABLE IF NOT EXISTS day_totals (
+    day TEXT PRIMARY KEY,
+    present INTEGER NOT NULL,
+    marked INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS course_totals (
+    course TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL,
+    present INTEGER NOT NULL,
+    marked INTEGER NOT NULL
+);
+"""
+# Keyed without a rowid, so each row lives in one B-tree rather than the
+# table plus an index of its primary key
+STUDENT_TOTALS_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS student_totals ("
+    "course TEXT NOT NULL, student_id INTEGER NOT NULL, present INTEGER NOT NULL, marked INTEGER NOT NULL, "
+    "PRIMARY KEY (course, student_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_student_totals_student ON student_totals (student_id)",
+)
+SCHEMA_VERSION = 2  # 1: running totals kept beside the sessions; 2: student totals without rowids
+
+
+# ---------------------- Bitmaps ----------------------
+# A bitmap is a Python int with bit ``slot`` set, so unions, intersections
+# and differences of whole classes are single C-level operations.
+def bitmap_from_slots(slots: Iterable[int]) -> int:
+    bits = bytearray()
+    for slot in slots:
+        byte = slot >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        bits[byte] |= 1 << (slot & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitmap_slots(bitmap: int) -> List[int]:
+    slots = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte, value in enumerate(data):
+        while value:
+            low = value & -value
+            slots.append(byte * 8 + low.bit_length() - 1)
+            value ^= low
+    return slots
+
+
+def popcount(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+def _low_byte(bitmap: int) -> int:
+    # Index of the first non-zero byte: everything below it is not stored
+    return ((bitmap & -bitmap).bit_length() - 1) // 8 if bitmap else 0
+
+
+def encode_bitmap(bitmap: int, offset: int) -> bytes:
+    shifted = bitmap >> (offset * 8)
+    return zlib.compress(shifted.to_bytes((shifted.bit_length() + 7) // 8, "little"), 9)
+
+
+def decode_bitmap(data: bytes, offset: int) -> int:
+    return int.from_bytes(zlib.decompress(data), "little") << (offset * 8)
+
+
+class AttendanceStore:
+    """Present/absent marks per student per course session, in SQLite.
+
+    Each student gets a dense slot number the first time they are marked;
+    classmates marked together get neighbouring slots. A session (a course
+    on a day) is two bitmaps over those slots: who was marked at all and
+    who was present. Both are stored zlib-compressed with the all-zero
+    bytes below the lowest set bit trimmed off, so a session costs tens of
+    bytes however large the roster is.
+
+    Running totals per student and course, per day and per course are
+    updated in the same transaction as each session, so summaries are a
+    keyed lookup instead of a pass over every session.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        for statement in STUDENT_TOTALS_SCHEMA:
+            self._conn.execute(statement)
+        self._slots: Dict[int, int] = {}  # student id -> slot
+        self._ids: List[int] = []  # slot -> student id
+        self._writes = 0
+        with self._lock:
+            self._load_slots()
+            self._upgrade()
+
+    def _upgrade(self) -> None:
+        # Files from before the current running totals: build them once from the sessions
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE student_totals")
+                for statement in STUDENT_TOTALS_SCHEMA:
+                    self._conn.execute(statement)
+                for table in ("day_totals", "course_totals"):
+                    self._conn.execute(f"DELETE FROM {table}")
+                rows = self._conn.execute("SELECT course, day, offset, marked, present FROM sessions").fetchall()
+                for course, day, offset, marked, present in rows:
+                    self._add_totals(course, day, decode_bitmap(marked, offset), decode_bitmap(present, offset), 1)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _load_slots(self) -> None:
+        # Picks up slots handed out by other processes since the last call
+        rows = self._conn.execute(
+            "SELECT slot, student_id FROM slots WHERE slot >= ? ORDER BY slot", (len(self._ids),)
+        ).fetchall()
+        for slot, student_id in rows:
+            self._slots[student_id] = slot
+            self._ids.append(student_id)
+
+    def _assign_slots(self, student_ids: Iterable[int]) -> List[int]:
+        # Caller holds the lock inside a write transaction
+        new = [i for i in dict.fromkeys(student_ids) if i not in self._slots]
+        if new:
+            self._load_slots()
+            new = [i for i in new if i not in self._slots]
+            rows = [(len(self._ids) + n, student_id) for n, student_id in enumerate(new)]
+            self._conn.executemany("INSERT INTO slots (slot, student_id) VALUES (?, ?)", rows)
+            for slot, student_id in rows:
+                self._slots[student_id] = slot
+                self._ids.append(student_id)
+        return [self._slots[i] for i in student_ids]
+
+    def _add_totals(self, course: str, day: str, marked: int, present: int, sign: int) -> None:
+        # Adds (sign 1) or takes back (sign -1) one session's marks; the
+        # caller holds the lock inside a write transaction
+        self._load_slots()
+        present_slots = set(bitmap_slots(present))
+        # One statement for the whole class: each student as id * 2 + present
+        # in a JSON array, unpacked by SQLite rather than bound row by row.
+        # "WHERE true" stops ON CONFLICT being parsed as part of the SELECT.
+        ids = self._ids
+        students = ",".join(str(ids[slot] << 1 | (slot in present_slots)) for slot in bitmap_slots(marked))
+        self._conn.execute(
+            "INSERT INTO student_totals (course, student_id, present, marked) "
+            "SELECT ?, value >> 1, (value & 1) * ?, ? FROM json_each(?) WHERE true "
+            "ON CONFLICT (course, student_id) DO UPDATE SET "
+            "present = present + excluded.present, marked = marked + excluded.marked",
+            (course, sign, sign, f"[{students}]"),
+        )
+        present_count = sign * len(present_slots)
+        marked_count = sign * popcount(marked)
+        self._conn.execute(
+            "INSERT INTO day_totals (day, present, marked) VALUES (?, ?, ?) "
+            "ON CONFLICT (day) DO UPDATE SET present = present + excluded.present, marked = marked + excluded.marked",
+            (day, present_count, marked_count),
+        )
+        self._conn.execute(
+            "INSERT INTO course_totals (course, sessions, present, marked) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (course) DO UPDATE SET sessions = sessions + excluded.sessions, "
+            "present = present + excluded.present, marked = marked + excluded.marked",
+            (course, sign, present_count, marked_count),
+        )
+
+    def _take_back(self, course: str, day: str) -> None:
+        row = self._conn.execute(
+            "SELECT offset, marked, present FROM sessions WHERE course = ? AND day = ?", (course, day)
+        ).fetchone()
+        if row is not None:
+            offset, marked, present = row
+            self._add_totals(course, day, decode_bitmap(marked, offset), decode_bitmap(present, offset), -1)
+
+    # ---------------------- Writes ----------------------
+    def mark(self, course: str, day: str, present: Iterable[int], absent: Iterable[int]) -> None:
+        """Record a whole session at once, replacing any earlier marks for it.
+
+        ``day`` is an ISO date (``YYYY-MM-DD``); ``present`` and ``absent``
+        are student ids. One transaction however large the class.
+        """
+        present = list(present)
+        absent = list(absent)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                slots = self._assign_slots(present + absent)
+                present_bits = bitmap_from_slots(slots[:len(present)])
+                marked_bits = present_bits | bitmap_from_slots(slots[len(present):])
+                offset = _low_byte(marked_bits)
+                self._take_back(course, day)
+                self._add_totals(course, day, marked_bits, present_bits, 1)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (course, day, offset, marked, present) VALUES (?, ?, ?, ?, ?)",
+                    (course, day, offset, encode_bitmap(marked_bits, offset), encode_bitmap(present_bits, offset)),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+
+    def clear(self, course: str, day: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._take_back(course, day)
+                self._conn.execute("DELETE FROM sessions WHERE course = ? AND day = ?", (course, day))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+
+    # ---------------------- Reads ----------------------
+    def _bitmaps(self, course: str, day: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        sql = "SELECT day, offset, marked, present FROM sessions WHERE course = ?"
+        params: Tuple = (course,)
+        if day is not None:
+            sql += " AND day = ?"
+            params += (day,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY day", params).fetchall()
+            self._load_slots()
+        return [(d, decode_bitmap(marked, offset), decode_bitmap(present, offset)) for d, offset, marked, present in rows]
+
+    def revision(self) -> Tuple[int, int]:
+        """Changes whenever this or any other process saves attendance, so
+        derived results can be cached against it."""
+        with self._lock:
+            return self._writes, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def student_ids(self) -> List[int]:
+        """Student id of every slot, in slot order."""
+        with self._lock:
+            self._load_slots()
+            return list(self._ids)
+
+    def raw_sessions(self) -> List[Tuple[str, str, int, bytes, bytes]]:
+        """Every session as ``(course, day, byte offset, marked, present)``,
+        oldest first. The bitmaps are decompressed little-endian bytes
+        starting at the offset, ready to be unpacked in bulk."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT course, day, offset, marked, present FROM sessions ORDER BY day, course"
+            ).fetchall()
+        return [(c, d, offset, zlib.decompress(m), zlib.decompress(p)) for c, d, offset, m, p in rows]
+
+    def days(self, course: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT day FROM sessions WHERE course = ? ORDER BY day", (course,)).fetchall()
+        return [r[0] for r in rows]
+
+    def session(self, course: str, day: str) -> Optional[Dict[int, bool]]:
+        """``{student id: present}`` for everyone marked in a session, or None."""
+        found = self._bitmaps(course, day)
+        if not found:
+            return None
+        _, marked, present = found[0]
+        return {self._ids[slot]: bool(present >> slot & 1) for slot in bitmap_slots(marked)}
+
+    def summary(self, course: str) -> Dict[int, Tuple[int, int]]:
+        """``{student id: (sessions present, sessions marked)}`` over a course."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT student_id, present, marked FROM student_totals WHERE course = ? AND marked > 0", (course,)
+            ).fetchall()
+        return {student_id: (present, marked) for student_id, present, marked in rows}
+
+    def student_totals(self, student_id: int) -> Tuple[int, int]:
+        """``(sessions present, sessions marked)`` over all of a student's courses."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT TOTAL(present), TOTAL(marked) FROM student_totals WHERE student_id = ?", (student_id,)
+            ).fetchone()
+        return int(row[0]), int(row[1])
+
+    def day_totals(self, day: str) -> Tuple[int, int]:
+        """``(present marks, all marks)`` across every session on ``day``."""
+        with self._lock:
+            row = self._conn.execute("SELECT present, marked FROM day_totals WHERE day = ?", (day,)).fetchone()
+        return row if row else (0, 0)
+
+    def course_totals(self) -> Dict[str, Tuple[int, int, int]]:
+        """``{course: (sessions, present marks, all marks)}``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT course, sessions, present, marked FROM course_totals WHERE sessions > 0"
+            ).fetchall()
+        return {course: (sessions, present, marked) for course, sessions, present, marked in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_attendance(json_path: str) -> AttendanceStore:
+    """Open the attendance store kept beside the roster's ``storage.json``."""
+    return AttendanceStore(os.path.join(os.path.dirname(os.path.abspath(json_path)), ATTENDANCE_FILE))
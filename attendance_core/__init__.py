@@ -0,0 +1,34 @@
+"""Headless core of the college management app.
+
+Everything the desktop and Streamlit frontends do to students, minus the
+widgets: CRUD with validation and conflict checks, paged queries, CSV
+import, streaming export and counts. Nothing here imports Tkinter or
+Streamlit, so batch jobs can use it on a server, and ``python -m
+attendance_core`` is a command-line frontend over the same code.
+
+Only what every caller needs is imported with the package. The storage
+backends (``repository``), snapshots, CSV import, export and attendance
+are imported from their own modules, and by the service only when first
+used, so a frontend starts without paying for them.
+"""
+
+from attendance_core.service import StudentService, open_service
+from models import Student
+from roster import Roster, Row, SharedRoster, make_roster
+from storage import ConflictError, DuplicateEnrollmentError, StorageEngine
+from validation import ValidationError, validate_student
+
+__all__ = [
+    "ConflictError",
+    "DuplicateEnrollmentError",
+    "Roster",
+    "Row",
+    "SharedRoster",
+    "StorageEngine",
+    "Student",
+    "StudentService",
+    "ValidationError",
+    "make_roster",
+    "open_service",
+    "validate_student",
+]
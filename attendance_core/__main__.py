@@ -0,0 +1,6 @@
+import sys
+
+from attendance_core.cli import main
+
+
+sys.exit(main())
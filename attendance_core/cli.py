@@ -0,0 +1,162 @@
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+import exporter
+import importer
+from attendance import ATTENDANCE_FILE, open_attendance
+from attendance_core.service import StudentService, open_service
+from ordering import SORT_COLUMNS
+from storage import ConflictError
+
+
+DEFAULT_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage.json")
+
+
+def _print_rows(rows) -> None:
+    # Tab-separated, one write per call, so large result sets stream quickly
+    out = sys.stdout
+    out.write("\n".join("\t".join(map(str, row)) for row in rows))
+    if rows:
+        out.write("\n")
+
+
+def cmd_add(service: StudentService, args: argparse.Namespace) -> int:
+    record = service.add(args.name, args.enrollment, args.courses, args.phone)
+    print(record.id)
+    return 0
+
+
+def cmd_edit(service: StudentService, args: argparse.Namespace) -> int:
+    if args.name is None and args.enrollment is None and args.courses is None and args.phone is None:
+        raise ValueError("Nothing to change: give --name, --enrollment, --courses or --phone.")
+    service.edit(args.id, args.name, args.enrollment, args.courses, args.phone)
+    return 0
+
+
+def cmd_delete(service: StudentService, args: argparse.Namespace) -> int:
+    service.delete(args.id)
+    return 0
+
+
+def cmd_find(service: StudentService, args: argparse.Namespace) -> int:
+    total, rows = service.query(args.offset, args.limit, args.sort, args.desc, " ".join(args.query), args.course)
+    if args.header:
+        _print_rows([("id", "name", "enrollment", "courses", "phone")])
+    _print_rows(rows)
+    print(f"{len(rows):,} of {total:,} matching students", file=sys.stderr)
+    return 0
+
+
+def cmd_show(service: StudentService, args: argparse.Namespace) -> int:
+    # Answered from the mapped copy when it is current, so nothing is loaded
+    mapped = service.open_mapped()
+    if mapped is None:
+        service.load()
+    find = mapped.find_by_enrollment if mapped is not None else service.find_by_enrollment
+    rows, missing = [], 0
+    try:
+        for enrollment in args.enrollment:
+            record = find(enrollment)
+            if record is None:
+                print(f"No student has enrollment number {enrollment}.", file=sys.stderr)
+                missing += 1
+            else:
+                rows.append(record.as_row())
+    finally:
+        if mapped is not None:
+            mapped.close()
+    _print_rows(rows)
+    return 1 if missing else 0
+
+
+def cmd_stats(service: StudentService, args: argparse.Namespace) -> int:
+    stats = service.stats()
+    courses = stats["courses"]
+    print(f"students\t{stats['students']}")
+    print(f"courses\t{len(courses)}")
+    for code, count in courses.items():
+        print(f"course\t{code}\t{count}")
+    # Only read attendance that exists; opening the store would create it
+    if os.path.exists(os.path.join(os.path.dirname(os.path.abspath(args.data)), ATTENDANCE_FILE)):
+        store = open_attendance(args.data)
+        try:
+            for code, (sessions, present, marked) in sorted(store.course_totals().items()):
+                percent = 100 * present / marked if marked else 0.0
+                print(f"attendance\t{code}\t{sessions}\t{percent:.1f}")
+        finally:
+            store.close()
+    return 0
+
+
+COMMANDS = {
+    "add": cmd_add,
+    "edit": cmd_edit,
+    "delete": cmd_delete,
+    "find": cmd_find,
+    "show": cmd_show,
+    "stats": cmd_stats,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m attendance_core", description="Manage the student roster without a GUI.")
+    parser.add_argument("--data", default=DEFAULT_DATA,
+                        help="data file next to which the roster is stored (default: the app's storage.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a student and print its id")
+    add.add_argument("name")
+    add.add_argument("enrollment")
+    add.add_argument("courses", help="comma-separated course codes")
+    add.add_argument("phone")
+
+    edit = commands.add_parser("edit", help="change some of a student's fields")
+    edit.add_argument("id", type=int)
+    for field in ("name", "enrollment", "courses", "phone"):
+        edit.add_argument(f"--{field}")
+
+    delete = commands.add_parser("delete", help="delete a student")
+    delete.add_argument("id", type=int)
+
+    find = commands.add_parser("find", help="list students, tab-separated")
+    find.add_argument("query", nargs="*", help="search words, as in the apps' search box (course:CODE allowed)")
+    find.add_argument("--course", help="only students enrolled in this course")
+    find.add_argument("--sort", choices=SORT_COLUMNS)
+    find.add_argument("--desc", action="store_true", help="sort descending")
+    find.add_argument("--offset", type=int, default=0)
+    find.add_argument("--limit", type=int, help="default: every match")
+    find.add_argument("--header", action="store_true", help="print a header row first")
+
+    show = commands.add_parser("show", help="print the students with these enrollment numbers")
+    show.add_argument("enrollment", nargs="+")
+
+    commands.add_parser("stats", help="student and course counts, and attendance per course")
+    commands.add_parser("import", help="import a CSV (see importer.py --help)", add_help=False)
+    commands.add_parser("export", help="export students (see exporter.py --help)", add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    # Import and export stream straight between the file and the storage
+    if args.command == "import":
+        return importer.main(rest + ["--data", args.data])
+    if args.command == "export":
+        return exporter.main(rest + ["--data", args.data])
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    service = open_service(args.data, load=args.command != "show")
+    try:
+        return COMMANDS[args.command](service, args)
+    except (ValueError, LookupError, ConflictError) as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        # Only written when nothing changed, so later runs can start from it
+        service.save_snapshot()
+        service.close()
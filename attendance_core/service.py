@@ -0,0 +1,287 @@
+import os
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, List, Optional, TextIO, Tuple
+
+from models import Student
+from roster import Roster, Row, SharedRoster, make_roster
+from storage import ConflictError, DuplicateEnrollmentError, StorageEngine
+from validation import ValidationError, validate_student
+
+# Snapshots, import, export and the SQLite backend are imported where they
+# are first used, so a frontend's window is up before they load
+if TYPE_CHECKING:
+    from importer import ImportReport
+    from snapshot import MappedRoster
+
+
+class StudentService:
+    """Students' CRUD, queries, import/export and counts over one storage
+    engine and the in-memory roster loaded from it, with no UI attached.
+
+    Every change is validated against the roster, written, and then applied
+    to the roster, all under the roster's write lock. Failures are raised:
+    ``ValidationError`` for bad fields, ``DuplicateEnrollmentError`` from the
+    storage, and ``ConflictError`` when a record is no longer at the version
+    the caller last saw. If the storage reports either of the last two,
+    another process wrote first, so the roster is reloaded before the error
+    is raised.
+
+    By default each change is written before the method returns. ``submit``
+    instead hands ops to a background writer such as
+    ``PersistenceWorker.submit``; ids are then allocated up front, and write
+    errors are the writer's to report.
+
+    With a ``snapshot`` path, ``load`` starts from the pickled roster there
+    when it matches the storage's current revision, and ``save_snapshot``
+    refreshes it once the roster is known to match the storage exactly.
+    ``mapped`` names a read-only mapped copy written alongside it, which
+    ``open_mapped`` serves lookups from without loading the roster at all.
+    """
+
+    def __init__(
+        self,
+        storage: StorageEngine,
+        shared: Optional[SharedRoster] = None,
+        submit: Optional[Callable[[Dict], None]] = None,
+        snapshot: Optional[str] = None,
+        mapped: Optional[str] = None,
+    ) -> None:
+        self.storage = storage
+        self.shared = shared or SharedRoster(make_roster())
+        self.snapshot = snapshot
+        self.mapped = mapped
+        self._submit = submit
+        self._revision: Optional[Tuple] = None  # storage revision the whole roster was read at
+        self._snapshot_current = False
+
+    @property
+    def roster(self) -> Roster:
+        return self.shared.roster
+
+    def load(self) -> None:
+        """Replace the roster with everything in the storage."""
+        if self.load_snapshot():
+            return
+        revision = self.storage.revision()
+        self.replace_roster(self._read_roster(), revision)
+
+    def load_snapshot(self) -> bool:
+        """Swap in the snapshot's roster if it is current; False if not."""
+        if self.snapshot is None:
+            return False
+        from snapshot import load_snapshot
+
+        revision = self.storage.revision()
+        roster = load_snapshot(self.snapshot, revision)
+        if roster is None:
+            return False
+        # The storage has read no records, so ids it hands out next must
+        # still come after the snapshot's
+        if len(roster):
+            self.storage.reserve_ids(roster.ids[-1])
+        self.replace_roster(roster, revision)
+        self._snapshot_current = True
+        return True
+
+    def replace_roster(self, roster: Roster, revision: Optional[Tuple] = None) -> None:
+        """Swap in a roster the caller fills itself, e.g. a batch at a time.
+
+        ``revision`` is the storage revision read before reading every
+        record into ``roster``; leave it out while the roster is partial.
+        """
+        with self.shared.lock.write():
+            self.shared.reload(roster)
+        self._revision = revision
+        self._snapshot_current = False
+
+    def save_snapshot(self) -> bool:
+        """Write the roster to the snapshot if it still matches the storage:
+        read whole at a revision that nothing, here or elsewhere, has
+        changed since. Returns whether it was written."""
+        if self.snapshot is None or self._revision is None or self._snapshot_current:
+            return False
+        if self.storage.revision() != self._revision:
+            return False
+        from snapshot import save_mapped, save_snapshot
+
+        with self.shared.lock.read():
+            try:
+                save_snapshot(self.snapshot, self._revision, self.roster)
+                if self.mapped:
+                    save_mapped(self.mapped, self._revision, self.roster)
+            except OSError:
+                return False
+        self._snapshot_current = True
+        return True
+
+    def open_mapped(self) -> Optional["MappedRoster"]:
+        """The mapped copy if it matches the storage's current revision, else
+        None. The caller closes it."""
+        if self.mapped is None:
+            return None
+        from snapshot import open_mapped
+
+        return open_mapped(self.mapped, self.storage.revision())
+
+    def close(self) -> None:
+        self.storage.close()
+
+    def _read_roster(self) -> Roster:
+        roster = make_roster()
+        roster.extend(self.storage.iter_records())
+        return roster
+
+    # ---------------------- Reads ----------------------
+    def get(self, record_id: int) -> Optional[Student]:
+        with self.shared.lock.read():
+            return self.roster.get(record_id)
+
+    def find_by_enrollment(self, enrollment: str) -> Optional[Student]:
+        with self.shared.lock.read():
+            return self.roster.find_by_enrollment(enrollment)
+
+    def query(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        search: str = "",
+        course: Optional[str] = None,
+    ) -> Tuple[int, List[Row]]:
+        """Match count and one page of rows; see ``Roster.query``."""
+        with self.shared.lock.read():
+            return self.roster.query(offset, limit, sort, descending, search, course)
+
+    def stats(self) -> Dict[str, object]:
+        """``{"students": count, "courses": {code: students enrolled}}``."""
+        with self.shared.lock.read():
+            catalog = self.roster.catalog
+            return {
+                "students": len(self.roster),
+                "courses": {code: catalog.count(code) for code in catalog.codes()},
+            }
+
+    # ---------------------- Writes ----------------------
+    def add(self, name: str, enrollment: str, courses: str, phone: str) -> Student:
+        with self.shared.lock.write():
+            record = self._validated(None, name, enrollment, courses, phone)
+            if self._submit is not None:
+                record.id = self.storage.allocate_id()
+            self._write({"op": "add", "record": record})
+            self.roster.add(record)
+        return record
+
+    def edit(
+        self,
+        record_id: int,
+        name: Optional[str] = None,
+        enrollment: Optional[str] = None,
+        courses: Optional[str] = None,
+        phone: Optional[str] = None,
+        expected_version: Optional[int] = None,
+    ) -> Student:
+        """Change a student's fields; those left as None keep their value."""
+        with self.shared.lock.write():
+            current = self._current(record_id, expected_version)
+            record = self._validated(
+                record_id,
+                current.name if name is None else name,
+                current.enrollment if enrollment is None else enrollment,
+                current.courses if courses is None else courses,
+                current.phone if phone is None else phone,
+            )
+            # Stamped again by the storage when it writes synchronously
+            record.version = current.version + 1
+            self._write({"op": "update", "id": record_id, "record": record, "expected_version": current.version})
+            self.roster.update(record)
+        return record
+
+    def delete(self, record_id: int, expected_version: Optional[int] = None) -> Student:
+        with self.shared.lock.write():
+            current = self._current(record_id, expected_version)
+            self._write({"op": "delete", "id": record_id, "expected_version": current.version})
+            self.roster.remove(record_id)
+        return current
+
+    def add_batch(self, records: List[Student]) -> List[Student]:
+        """Store students validated together beforehand, e.g. a batch from
+        ``importer.import_batches``, in one write, and add them to the roster."""
+        with self.shared.lock.write():
+            if self._submit is not None:
+                for record, record_id in zip(records, self.storage.allocate_ids(len(records))):
+                    record.id = record_id
+            self._write(*({"op": "add", "record": record} for record in records))
+            self.roster.extend(records)
+        return records
+
+    def import_csv(
+        self,
+        f: TextIO,
+        batch_size: Optional[int] = None,
+        on_batch: Optional[Callable[["ImportReport"], None]] = None,
+    ) -> "ImportReport":
+        """Stream a CSV into the storage and roster; the write lock is taken
+        per batch, so readers keep going in between. ``batch_size`` defaults
+        to ``importer.BATCH_SIZE``."""
+        from importer import BATCH_SIZE, import_csv
+
+        if batch_size is None:
+            batch_size = BATCH_SIZE
+        return import_csv(f, self.storage, self.roster, batch_size, guard=self.shared.lock.write, on_batch=on_batch)
+
+    def export(
+        self,
+        out: BinaryIO,
+        fmt: str,
+        course: Optional[str] = None,
+        enrollment_from: Optional[str] = None,
+        enrollment_to: Optional[str] = None,
+    ) -> None:
+        """Stream matching records from the storage itself, not the roster."""
+        from exporter import export_chunks
+
+        for chunk in export_chunks(self.storage, fmt, course, enrollment_from, enrollment_to):
+            out.write(chunk)
+
+    def _current(self, record_id: int, expected_version: Optional[int]) -> Student:
+        current = self.roster.get(record_id)
+        if current is None and expected_version is None:
+            raise LookupError(f"No student has id {record_id}.")
+        if current is None or (expected_version is not None and current.version != expected_version):
+            raise ConflictError(record_id, "This student was changed or deleted by someone else.")
+        return current
+
+    def _validated(self, record_id: Optional[int], name: str, enrollment: str, courses: str, phone: str) -> Student:
+        name, enrollment, courses, phone = name.strip(), enrollment.strip(), courses.strip(), phone.strip()
+        ok, msg = validate_student(name, enrollment, courses, phone, roster=self.roster, record_id=record_id)
+        if not ok:
+            raise ValidationError(msg)
+        return Student(name, enrollment, courses, phone, id=record_id)
+
+    def _write(self, *ops: Dict) -> None:
+        # Caller holds the write lock
+        if self._submit is not None:
+            for op in ops:
+                self._submit(op)
+            return
+        try:
+            self.storage.apply(list(ops))
+        except (ConflictError, DuplicateEnrollmentError):
+            # Another process wrote first; this roster is behind
+            self.shared.reload(self._read_roster())
+            raise
+
+
+def open_service(json_path: str, backend: Optional[str] = None, load: bool = True) -> StudentService:
+    """Open the storage beside ``json_path`` and, unless ``load`` is False,
+    load its roster, from the snapshot beside it when that is current."""
+    from repository import open_repository
+    from snapshot import mapped_path, snapshot_path
+
+    json_path = os.path.abspath(json_path)
+    service = StudentService(
+        open_repository(json_path, backend), snapshot=snapshot_path(json_path), mapped=mapped_path(json_path)
+    )
+    if load:
+        service.load()
+    return service
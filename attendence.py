@@ -1,13 +0,0 @@
-{
-    "name": "Deepak Rawat",
-    "enrollment": "23478838282",
-    "courses": "DA",
-    "phone": "9818774323"
-  },
-  {
-    "name": "Rajesh",
-    "enrollment": "73273283273823",
-    "courses": "DA",
-    "phone": "983947394739493"
-  }
-]
@@ -0,0 +1 @@
+"""Benchmarks for the roster, storage and desktop app; see ``run.py``."""
@@ -0,0 +1,101 @@
+import argparse
+import os
+import random
+import sys
+from itertools import islice
+from typing import Iterator, List, Optional
+
+from models import Student
+from repository import open_repository
+
+
+SEED = 2024
+SIZES = (10, 10_000, 100_000, 1_000_000)
+WRITE_BATCH = 10_000  # records per storage transaction while generating
+
+FIRST_NAMES = (
+    "Aarav", "Aditi", "Alex", "Amara", "Ana", "Ananya", "Arjun", "Ben", "Chen", "Chloe", "Daniel", "Diya",
+    "Elena", "Emma", "Fatima", "Gabriel", "Grace", "Hana", "Ishaan", "Ivan", "Jia", "Kabir", "Kavya", "Leila",
+    "Liam", "Lucas", "Maria", "Meera", "Mohammed", "Nadia", "Noah", "Olivia", "Omar", "Priya", "Rahul", "Riya",
+    "Rohan", "Sara", "Sofia", "Tariq", "Vikram", "Wei", "Yusuf", "Zara",
+)
+LAST_NAMES = (
+    "Ahmed", "Bose", "Chen", "Das", "Fernandes", "Garcia", "Gupta", "Hassan", "Iyer", "Jain", "Khan", "Kim",
+    "Kumar", "Lee", "Lopez", "Mehta", "Menon", "Nair", "Nguyen", "Novak", "Patel", "Rao", "Reddy", "Rossi",
+    "Sato", "Shah", "Sharma", "Singh", "Smith", "Verma", "Wang", "Williams", "Yadav", "Zhang",
+)
+# Departments and the share of students majoring in each
+DEPARTMENTS = (
+    ("CS", 0.30), ("EC", 0.15), ("ME", 0.12), ("MA", 0.10), ("PH", 0.08),
+    ("BBA", 0.10), ("BCA", 0.08), ("EN", 0.04), ("BI", 0.03),
+)
+COURSES_PER_DEPARTMENT = 12
+ELECTIVE_SHARE = 0.25  # chance each course is taken outside the major
+
+
+def _courses(department: str) -> List[str]:
+    return [f"{department}{level}{n:02d}" for level in range(1, 5) for n in range(1, COURSES_PER_DEPARTMENT // 4 + 1)]
+
+
+def generate_students(count: int, seed: int = SEED) -> Iterator[Student]:
+    """``count`` students, the same for the same seed.
+
+    Majors follow ``DEPARTMENTS``; each student takes 1-5 courses, mostly
+    from their major, with introductory courses the most popular (weights
+    fall off as 1/rank), so course sizes are skewed as in a real college.
+    """
+    rng = random.Random(seed)
+    departments = [d for d, _ in DEPARTMENTS]
+    shares = [share for _, share in DEPARTMENTS]
+    catalog = {d: _courses(d) for d in departments}
+    popularity = [1 / rank for rank in range(1, COURSES_PER_DEPARTMENT + 1)]
+    for i in range(count):
+        major = rng.choices(departments, shares)[0]
+        taken: List[str] = []
+        for _ in range(rng.choice((1, 2, 3, 3, 4, 4, 5))):
+            department = rng.choice(departments) if rng.random() < ELECTIVE_SHARE else major
+            course = rng.choices(catalog[department], popularity)[0]
+            if course not in taken:
+                taken.append(course)
+        year = 2019 + i % 6
+        yield Student(
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            f"{year}{major}{i:07d}",
+            ", ".join(taken),
+            f"9{rng.randrange(10**9):09d}",
+        )
+
+
+def write_storage(json_path: str, count: int, seed: int = SEED, backend: Optional[str] = None) -> None:
+    """Store ``count`` generated students beside ``json_path``, one
+    transaction per ``WRITE_BATCH``."""
+    storage = open_repository(json_path, backend)
+    try:
+        records = generate_students(count, seed)
+        while True:
+            batch = list(islice(records, WRITE_BATCH))
+            if not batch:
+                return
+            storage.apply([{"op": "add", "record": s} for s in batch])
+    finally:
+        storage.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic roster for benchmarks.")
+    parser.add_argument("count", type=int, help=f"number of students, e.g. {', '.join(map(str, SIZES))}")
+    parser.add_argument("--data", required=True, help="data file next to which the roster is stored")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--backend", choices=("sqlite", "journal"))
+    args = parser.parse_args(argv)
+    if os.path.exists(args.data) or os.path.exists(os.path.splitext(args.data)[0] + ".db"):
+        print(f"{args.data} already has data; pick a new location.", file=sys.stderr)
+        return 1
+    os.makedirs(os.path.dirname(os.path.abspath(args.data)), exist_ok=True)
+    write_storage(args.data, args.count, args.seed, args.backend)
+    print(f"Wrote {args.count:,} students beside {args.data}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""A stand-in for tkinter, for timing the desktop app where no display is
+available (CI, servers without Xvfb).
+
+Every widget is a ``MagicMock`` except the Treeview, which keeps its rows
+in a dict and a list much as Tk does, so filling the table still costs one
+call and one stored row per item. Timings are then the app's own work
+without Tk's drawing; run with a display to include it.
+"""
+import sys
+import types
+from typing import Callable, Dict, List, Tuple
+from unittest.mock import MagicMock
+
+
+class TclError(Exception):
+    pass
+
+
+class Tk:
+    """Root window whose ``after`` callbacks run when ``update`` is called."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._pending: Dict[str, Tuple[Callable, tuple]] = {}
+        self._jobs = 0
+        self._mocks: Dict[str, MagicMock] = {}
+
+    def __getattr__(self, name: str) -> MagicMock:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._mocks.setdefault(name, MagicMock())
+
+    def after(self, ms: int, func: Callable = None, *args) -> str:
+        # Delays are ignored: callbacks run in the order they were scheduled
+        self._jobs += 1
+        job = f"after#{self._jobs}"
+        self._pending[job] = (func, args)
+        return job
+
+    def after_idle(self, func: Callable, *args) -> str:
+        return self.after(0, func, *args)
+
+    def after_cancel(self, job: str) -> None:
+        self._pending.pop(job, None)
+
+    def update(self) -> None:
+        """Run the callbacks scheduled so far; those they schedule wait for
+        the next call, so periodic polls do not run forever."""
+        for job in list(self._pending):
+            func, args = self._pending.pop(job, (None, ()))
+            if func is not None:
+                func(*args)
+
+    def destroy(self) -> None:
+        self._pending.clear()
+
+
+class Variable:
+    def __init__(self, master=None, value=None) -> None:
+        self._value = value
+        self._traces: List[Callable] = []
+
+    def get(self):
+        return self._value
+
+    def set(self, value) -> None:
+        self._value = value
+        for callback in self._traces:
+            callback("", "", "write")
+
+    def trace_add(self, mode: str, callback: Callable) -> str:
+        self._traces.append(callback)
+        return f"trace#{len(self._traces)}"
+
+
+class StringVar(Variable):
+    def __init__(self, master=None, value: str = "") -> None:
+        super().__init__(master, value)
+
+
+class BooleanVar(Variable):
+    def __init__(self, master=None, value: bool = False) -> None:
+        super().__init__(master, value)
+
+
+class Treeview(MagicMock):
+    """Rows kept by iid in insertion order; everything else is mocked."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__()
+        self.__dict__["_rows"] = {}
+
+    def insert(self, parent: str, index, iid: str = None, values=()) -> str:
+        self._rows[iid] = tuple(values)
+        return iid
+
+    def delete(self, *iids: str) -> None:
+        for iid in iids:
+            del self._rows[iid]
+
+    def get_children(self, item: str = "") -> tuple:
+        return tuple(self._rows)
+
+    def item(self, iid: str, **kwargs) -> dict:
+        if "values" in kwargs:
+            self._rows[iid] = tuple(kwargs["values"])
+        return {"values": self._rows[iid]}
+
+    def exists(self, iid: str) -> bool:
+        return iid in self._rows
+
+    def winfo_height(self) -> int:
+        return 600
+
+
+def _widget(*args, **kwargs) -> MagicMock:
+    widget = MagicMock()
+    widget.winfo_height.return_value = 600
+    return widget
+
+
+def install() -> None:
+    """Put the stand-in in ``sys.modules``; call before importing ``app``."""
+    tk = types.ModuleType("tkinter")
+    tk.TclError, tk.Tk, tk.Event, tk.END = TclError, Tk, MagicMock, "end"
+    tk.StringVar, tk.BooleanVar, tk.IntVar = StringVar, BooleanVar, Variable
+    tk.Toplevel = tk.Canvas = tk.Text = tk.Menu = _widget
+    ttk = types.ModuleType("tkinter.ttk")
+    ttk.Style = MagicMock
+    ttk.Treeview = Treeview
+    for name in ("Frame", "Label", "Entry", "Button", "Scrollbar", "Progressbar", "Notebook", "Combobox",
+                 "Checkbutton", "Radiobutton", "Spinbox", "Separator", "Labelframe", "LabelFrame"):
+        setattr(ttk, name, _widget)
+    font = types.ModuleType("tkinter.font")
+    font.Font = MagicMock
+    modules = {"tkinter": tk, "tkinter.ttk": ttk, "tkinter.font": font}
+    for name in ("messagebox", "filedialog"):
+        modules[f"tkinter.{name}"] = MagicMock()
+    for name, module in modules.items():
+        if "." in name:
+            setattr(tk, name.split(".")[1], module)
+    sys.modules.update(modules)
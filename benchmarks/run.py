@@ -0,0 +1,322 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import count
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+from benchmarks.generate import SEED, generate_students, write_storage
+from roster import DEFAULT_LAYOUT
+
+
+DEFAULT_SIZES = (10, 10_000, 100_000)  # 1,000,000 is opt-in: generating it takes a while
+REPEAT = 5
+PAGE = 50  # rows per query, about one screen
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(func: Callable[[], object], repeat: int, number: int = 1, setup: Optional[Callable[[], object]] = None) -> Dict:
+    """Time ``number`` calls of ``func``, ``repeat`` times, like ``timeit``
+    (garbage collection off while timing); ``setup`` runs untimed before
+    each sample."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - start) / number)
+        finally:
+            if enabled:
+                gc.enable()
+    return {
+        "repeat": repeat,
+        "number": number,
+        "min_ms": min(samples) * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def _display_tk() -> bool:
+    """Whether real Tk can open a window here."""
+    try:
+        import tkinter
+
+        tkinter.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT, capture_output=True, text=True, timeout=10)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+class Suite:
+    """The benchmarks for one roster size, on generated data in a temp dir."""
+
+    def __init__(self, size: int, repeat: int, seed: int) -> None:
+        self.size = size
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+        self.work = tempfile.mkdtemp(prefix="cms-bench-")
+        self.data = os.path.join(self.work, "storage.json")
+        write_storage(self.data, size, seed)
+        self.serial = count()
+        self.extra = generate_students(sys.maxsize, seed + 1)  # fields for students added while timing
+        self.results: List[Dict] = []
+
+    def close(self) -> None:
+        shutil.rmtree(self.work, ignore_errors=True)
+
+    def record(self, name: str, result: Dict) -> None:
+        result = dict(name=name, size=self.size, **result)
+        self.results.append(result)
+        print(f"{name:<28}{self.size:>10,}  median {result['median_ms']:10.3f} ms  min {result['min_ms']:10.3f} ms",
+              file=sys.stderr)
+
+    def _new_student(self, tag: str):
+        # Enrollments of their own, so they never clash with the generated roster
+        return next(self.extra), f"BENCH-{tag}-{next(self.serial)}"
+
+    def _some_ids(self, roster, n: int) -> List[int]:
+        return [roster.at(self.rng.randrange(len(roster))).id for _ in range(n)]
+
+    # ---------------------- Storage and service ----------------------
+    def run_core(self) -> None:
+        from attendance_core import StudentService
+        from repository import open_repository
+        from snapshot import mapped_path, open_mapped, snapshot_path
+
+        storage = open_repository(self.data)
+        try:
+            cold = StudentService(storage)
+            self.record("load.storage", measure(cold.load, self.repeat))
+
+            warm = StudentService(storage, snapshot=snapshot_path(self.data), mapped=mapped_path(self.data))
+            warm.load()
+            warm.save_snapshot()
+            self.record("load.snapshot", measure(warm.load, self.repeat))
+            revision = storage.revision()
+            self.record("load.mapped", measure(lambda: open_mapped(warm.mapped, revision).close(), self.repeat, 100))
+
+            # Before any writes, while the snapshot and mapped copy are current
+            self._run_search(warm)
+            self._run_saves(storage)
+            self._run_service(warm)
+        finally:
+            storage.close()
+
+    def _run_saves(self, storage) -> None:
+        # What the desktop app's writer does per change: one op, one transaction
+        added: List[int] = []
+
+        def add() -> None:
+            student, enrollment = self._new_student("save")
+            student.enrollment = enrollment
+            storage.apply([{"op": "add", "record": student}])
+            added.append(student.id)
+
+        number = 20
+        self.record("save.add", measure(add, self.repeat, number))
+        targets = iter(added * 2)
+
+        def update() -> None:
+            record_id = next(targets)
+            record = storage.get(record_id)
+            record.phone = f"9{self.rng.randrange(10**9):09d}"
+            storage.apply([{"op": "update", "id": record_id, "record": record, "expected_version": record.version}])
+
+        self.record("save.update", measure(update, self.repeat, number))
+        victims = iter(added)
+        self.record("save.delete", measure(lambda: storage.apply([{"op": "delete", "id": next(victims)}]), self.repeat, number))
+
+    def _run_service(self, service) -> None:
+        # Validation, the write and the roster update together, as the CLI does them
+        added: List[int] = []
+
+        def add() -> None:
+            student, enrollment = self._new_student("svc")
+            added.append(service.add(student.name, enrollment, student.courses, student.phone).id)
+
+        number = 20
+        self.record("service.add", measure(add, self.repeat, number))
+        targets = iter(self._some_ids(service.roster, self.repeat * number))
+        self.record("service.edit", measure(
+            lambda: service.edit(next(targets), phone=f"9{self.rng.randrange(10**9):09d}"), self.repeat, number
+        ))
+        victims = iter(added)
+        self.record("service.delete", measure(lambda: service.delete(next(victims)), self.repeat, number))
+
+    def _run_search(self, warm) -> None:
+        roster = warm.roster
+        enrollments = [s.enrollment for s in map(roster.get, self._some_ids(roster, 1000))]
+        lookups = iter(enrollments * self.repeat)
+        self.record("search.enrollment", measure(lambda: roster.find_by_enrollment(next(lookups)), self.repeat, 1000))
+        mapped = warm.open_mapped()
+        if mapped is not None:
+            lookups = iter(enrollments * self.repeat)
+            self.record("search.enrollment_mapped", measure(
+                lambda: mapped.find_by_enrollment(next(lookups)), self.repeat, 1000
+            ))
+            mapped.close()
+
+        # First use builds the index; a fresh roster from the snapshot has none
+        self.record("search.build_index", measure(lambda: warm.query(0, PAGE, search="ra"), self.repeat, setup=warm.load))
+        words = sorted({row[1].split()[-1][:3] for row in warm.roster.rows(0, 5000)})
+        queries = iter(words * (self.repeat * 20 // len(words) + 1))
+        self.record("search.query", measure(lambda: warm.query(0, PAGE, search=next(queries)), self.repeat, 20))
+        self.record("sort.build", measure(lambda: warm.query(0, PAGE, sort="name"), self.repeat, setup=warm.load))
+        offsets = iter([self.rng.randrange(max(1, len(warm.roster) - PAGE)) for _ in range(self.repeat * 100)])
+        self.record("sort.page", measure(lambda: warm.query(next(offsets), PAGE, sort="name"), self.repeat, 100))
+
+    # ---------------------- Desktop app ----------------------
+    def run_app(self) -> None:
+        import app
+        import tkinter as tk
+        from snapshot import mapped_path, snapshot_path
+
+        data = self.data
+
+        class BenchApp(app.CollegeManagementApp):
+            def _data_file_path(self) -> str:
+                return data
+
+        def pump(bench: BenchApp) -> None:
+            # Until loading has finished; the app's periodic polls keep running
+            while bench._load_job is not None:
+                bench.root.update()
+
+        def drop_snapshot() -> None:
+            for path in (snapshot_path(data), mapped_path(data)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        root = tk.Tk()
+        bench = BenchApp(root)
+        pump(bench)
+
+        def load() -> None:
+            bench._load_data()
+            pump(bench)
+
+        # _load_data end to end: batches from the storage, then from the snapshot
+        self.record("app.load_data", measure(load, self.repeat, setup=drop_snapshot))
+        bench.service.save_snapshot()
+        self.record("app.load_data_snapshot", measure(load, self.repeat))
+        self.record("app.refresh_table", measure(bench._refresh_table, self.repeat, 10))
+
+        words = sorted({row[1].split()[0][:2] for row in bench.students.rows(0, 2000)})
+        queries = iter(words * (self.repeat * 10 // len(words) + 1))
+
+        def search() -> None:
+            # Typing schedules the search after a pause; run it straight away instead
+            bench.search_var.set(next(queries))
+            bench.root.after_cancel(bench._search_job)
+            bench._run_search()
+
+        self.record("app.search", measure(search, self.repeat, 10))
+        bench.search_var.set("")
+        bench.root.after_cancel(bench._search_job)
+        bench._run_search()
+
+        added: List[int] = []
+
+        def add() -> None:
+            student, enrollment = self._new_student("app")
+            bench.name_var.set(student.name)
+            bench.enroll_var.set(enrollment)
+            bench.courses_var.set(student.courses)
+            bench.phone_var.set(student.phone)
+            bench._on_add_student()
+            added.append(bench.students.enrollment_id(enrollment))
+
+        self.record("app.add", measure(add, self.repeat, 20))
+        targets = iter(self._some_ids(bench.students, self.repeat * 20))
+
+        def edit() -> None:
+            # What the edit dialog's Save does
+            record = bench.service.edit(next(targets), phone=f"9{self.rng.randrange(10**9):09d}")
+            bench._table_update(record)
+
+        self.record("app.edit", measure(edit, self.repeat, 20))
+        victims = iter(added)
+        with mock.patch.object(app.messagebox, "askyesno", return_value=True):
+            self.record("app.delete", measure(lambda: bench._confirm_delete(next(victims)), self.repeat, 20))
+        bench.close()
+        root.destroy()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Time load, save, CRUD, search and table paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="roster sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="samples per benchmark (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--layout", choices=("objects", "columnar"), help="roster layout (default: CMS_ROSTER_LAYOUT or objects)")
+    parser.add_argument("--tk", choices=("auto", "real", "mock"), default="auto",
+                        help="real Tk needs a display (e.g. Xvfb); mock stands in for it (default: real if a display works)")
+    parser.add_argument("--skip-app", action="store_true", help="leave out the desktop app benchmarks")
+    parser.add_argument("--out", default="-", help="JSON results file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.layout:
+        os.environ["CMS_ROSTER_LAYOUT"] = args.layout
+    tk_mode = args.tk if args.tk != "auto" else ("real" if _display_tk() else "mock")
+    if tk_mode == "mock" and not args.skip_app:
+        from benchmarks import headless
+
+        headless.install()
+
+    results: List[Dict] = []
+    for size in args.sizes:
+        suite = Suite(size, args.repeat, args.seed)
+        try:
+            suite.run_core()
+            if not args.skip_app:
+                suite.run_app()
+        finally:
+            suite.close()
+        results.extend(suite.results)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "layout": os.environ.get("CMS_ROSTER_LAYOUT", DEFAULT_LAYOUT),
+            "tk": None if args.skip_app else tk_mode,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
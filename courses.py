@@ -0,0 +1,113 @@
+import re
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+
+_SEPARATORS = re.compile(r"[,;/|\n]+")
+PROBE_RATIO = 16  # binary-search a class only when it is this many times larger
+
+
+@lru_cache(maxsize=4096)
+def parse_courses(text: str) -> Tuple[str, ...]:
+    """Normalized course codes in a Courses field, e.g. ``"cs101, ma 201"``
+    -> ``("CS101", "MA 201")``: split on commas, semicolons, slashes or
+    bars, whitespace collapsed, upper-cased, repeats dropped.
+
+    Cached: the same few course strings repeat across the whole roster.
+    """
+    codes = (" ".join(part.split()).upper() for part in _SEPARATORS.split(text))
+    return tuple(dict.fromkeys(code for code in codes if code))
+
+
+def course_key(code: str) -> str:
+    """Normalized form of a single course code, as ``parse_courses`` gives it."""
+    return " ".join(code.split()).upper()
+
+
+class CourseCatalog:
+    """Every course in the roster, with enrollment indexed both ways.
+
+    ``members(code)`` is the sorted array of student ids in a course and
+    ``courses_of(student_id)`` the codes a student takes, so class lists,
+    counts and intersections never scan the roster.
+    """
+
+    def __init__(self) -> None:
+        self._members: Dict[str, array] = {}
+        self._courses: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, code: str) -> bool:
+        return course_key(code) in self._members
+
+    def codes(self) -> List[str]:
+        return sorted(self._members)
+
+    def members(self, code: str) -> array:
+        """Ids of the students enrolled in ``code``, ascending. Do not modify."""
+        return self._members.get(course_key(code), array("q"))
+
+    def count(self, code: str) -> int:
+        return len(self.members(code))
+
+    def courses_of(self, student_id: int) -> Tuple[str, ...]:
+        return self._courses.get(student_id, ())
+
+    def intersect(self, codes: Iterable[str]) -> List[int]:
+        """Ids enrolled in every one of ``codes``, ascending."""
+        lists = sorted((self.members(code) for code in codes), key=len)
+        if not lists:
+            return []
+        result = lists[0].tolist()
+        for ids in lists[1:]:
+            if len(result) * PROBE_RATIO < len(ids):
+                # Far smaller: probe the big class by binary search
+                result = [i for i in result if _contains(ids, i)]
+            else:
+                result = sorted(set(result).intersection(ids))
+            if not result:
+                break
+        return result
+
+    def union(self, codes: Iterable[str]) -> List[int]:
+        """Ids enrolled in any of ``codes``, ascending."""
+        ids = set()
+        for code in codes:
+            ids.update(self.members(code))
+        return sorted(ids)
+
+    # Kept in step with the roster
+    def enroll(self, student_id: int, courses: str) -> None:
+        codes = parse_courses(courses)
+        if not codes:
+            return
+        self._courses[student_id] = codes
+        for code in codes:
+            ids = self._members.get(code)
+            if ids is None:
+                self._members[code] = array("q", (student_id,))
+            elif not ids or ids[-1] < student_id:
+                ids.append(student_id)  # ids mostly arrive in increasing order
+            else:
+                ids.insert(bisect_left(ids, student_id), student_id)
+
+    def withdraw(self, student_id: int) -> None:
+        for code in self._courses.pop(student_id, ()):
+            ids = self._members[code]
+            del ids[bisect_left(ids, student_id)]
+            if not ids:
+                del self._members[code]
+
+    def change(self, student_id: int, courses: str) -> None:
+        if parse_courses(courses) != self.courses_of(student_id):
+            self.withdraw(student_id)
+            self.enroll(student_id, courses)
+
+
+def _contains(ids: array, value: int) -> bool:
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
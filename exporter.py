@@ -0,0 +1,210 @@
+import argparse
+import csv
+import io
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from models import Student
+from storage import StorageEngine
+
+
+CHUNK_ROWS = 2000  # records encoded per chunk (and per columnar row group)
+FIELDS = ("id", "name", "enrollment", "courses", "phone")
+
+# ---------------------- Columnar Format ----------------------
+# A magic line, then row groups. Each group is its row count and the size
+# of its zlib-compressed body (little-endian uint32s), then the body, which
+# holds the group's columns one after another:
+#   ids       int64 × n
+#   versions  uint32 × n
+#   name, enrollment, phone
+#             uint32 byte lengths × n, then the UTF-8 values back to back
+#   courses   uint32 dictionary size d, d lengths and values as above,
+#             then uint32 codes × n
+# A group with a row count of 0 ends the file.
+COLUMNAR_MAGIC = b"CMSCOL1\n"
+_COUNT = struct.Struct("<I")
+_GROUP = struct.Struct("<II")
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _string_block(values: List[str]) -> bytes:
+    encoded = [v.encode("utf-8") for v in values]
+    return _le(array("I", map(len, encoded))) + b"".join(encoded)
+
+
+def _chunks(records: Iterable[Student]) -> Iterator[List[Student]]:
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, CHUNK_ROWS))
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode_csv(records: Iterable[Student]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(FIELDS)
+    for chunk in _chunks(records):
+        writer.writerows(s.as_row() for s in chunk)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")  # header only: nothing matched
+
+
+def encode_jsonl(records: Iterable[Student]) -> Iterator[bytes]:
+    for chunk in _chunks(records):
+        yield "".join(json.dumps(s.to_json(), ensure_ascii=False) + "\n" for s in chunk).encode("utf-8")
+
+
+def encode_columnar(records: Iterable[Student]) -> Iterator[bytes]:
+    yield COLUMNAR_MAGIC
+    for chunk in _chunks(records):
+        courses: Dict[str, int] = {}
+        codes = array("I", (courses.setdefault(s.courses, len(courses)) for s in chunk))
+        body = zlib.compress(b"".join((
+            _le(array("q", (s.id for s in chunk))),
+            _le(array("I", (s.version for s in chunk))),
+            _string_block([s.name for s in chunk]),
+            _string_block([s.enrollment for s in chunk]),
+            _string_block([s.phone for s in chunk]),
+            _COUNT.pack(len(courses)),
+            _string_block(list(courses)),
+            _le(codes),
+        )), 1)
+        yield _GROUP.pack(len(chunk), len(body)) + body
+    yield _GROUP.pack(0, 0)
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated columnar export")
+    return data
+
+
+def _read_strings(f: BinaryIO, count: int) -> List[str]:
+    lengths = _from_le("I", _read_exact(f, 4 * count))
+    heap = _read_exact(f, sum(lengths))
+    values = []
+    start = 0
+    for n in lengths:
+        values.append(heap[start:start + n].decode("utf-8"))
+        start += n
+    return values
+
+
+def read_columnar(f: BinaryIO) -> Iterator[Student]:
+    """Stream the records back out of a columnar export, one row group at a time."""
+    if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("Not a columnar student export")
+    while True:
+        n, size = _GROUP.unpack(_read_exact(f, _GROUP.size))
+        if not n:
+            return
+        group = io.BytesIO(zlib.decompress(_read_exact(f, size)))
+        ids = _from_le("q", _read_exact(group, 8 * n))
+        versions = _from_le("I", _read_exact(group, 4 * n))
+        names = _read_strings(group, n)
+        enrollments = _read_strings(group, n)
+        phones = _read_strings(group, n)
+        (d,) = _COUNT.unpack(_read_exact(group, _COUNT.size))
+        courses = _read_strings(group, d)
+        codes = _from_le("I", _read_exact(group, 4 * n))
+        for i in range(n):
+            yield Student(names[i], enrollments[i], courses[codes[i]], phones[i], ids[i], versions[i])
+
+
+# ---------------------- Export ----------------------
+FORMATS = {
+    # name: (encoder, file extension, MIME type)
+    "csv": (encode_csv, ".csv", "text/csv"),
+    "jsonl": (encode_jsonl, ".jsonl", "application/x-ndjson"),
+    "columnar": (encode_columnar, ".cmscol", "application/octet-stream"),
+}
+
+
+def format_for_path(path: str, default: str = "csv") -> str:
+    ext = os.path.splitext(path)[1].lower()
+    for name, (_, extension, _) in FORMATS.items():
+        if ext == extension:
+            return name
+    return default
+
+
+def export_chunks(
+    storage: StorageEngine,
+    fmt: str = "csv",
+    course: Optional[str] = None,
+    enrollment_from: Optional[str] = None,
+    enrollment_to: Optional[str] = None,
+) -> Iterator[bytes]:
+    """Encoded export of the matching records, a chunk at a time.
+
+    Records are pulled from ``storage.scan`` as the chunks are consumed, so
+    memory stays flat however large the roster is.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    encoder = FORMATS[fmt][0]
+    return encoder(storage.scan(course=course, enrollment_from=enrollment_from, enrollment_to=enrollment_to))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from repository import open_repository
+
+    parser = argparse.ArgumentParser(description="Export students to CSV, JSON Lines or a columnar binary file.")
+    parser.add_argument("output", help="file to write, or - for standard output")
+    parser.add_argument("--format", choices=sorted(FORMATS), help="default: from the output's extension, else csv")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "storage.json"),
+                        help="data file next to which the roster is stored (default: storage.json beside this script)")
+    parser.add_argument("--course", help="only students enrolled in this course")
+    parser.add_argument("--from", dest="enrollment_from", help="lowest enrollment number to include")
+    parser.add_argument("--to", dest="enrollment_to", help="highest enrollment number to include")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or format_for_path(args.output)
+    storage = open_repository(args.data)
+    try:
+        chunks = export_chunks(storage, fmt, args.course, args.enrollment_from, args.enrollment_to)
+        if args.output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            # Written beside the target first, so a failed export leaves no partial file
+            tmp_path = args.output + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, args.output)
+    finally:
+        storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
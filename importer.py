@@ -0,0 +1,188 @@
+import argparse
+import csv
+import os
+import sys
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+from models import Student
+from roster import Roster, make_roster, normalize_enrollment
+from storage import ConflictError, DuplicateEnrollmentError, StorageEngine
+from validation import validate_student
+
+
+BATCH_SIZE = 5000  # rows validated and written per storage write
+FIELDS = ("name", "enrollment", "courses", "phone")
+
+# Header spellings accepted for each field, compared case-insensitively
+HEADERS = {
+    "name": "name",
+    "student name": "name",
+    "enrollment": "enrollment",
+    "enrollment no": "enrollment",
+    "enrollment no.": "enrollment",
+    "enrollment number": "enrollment",
+    "courses": "courses",
+    "course": "courses",
+    "phone": "phone",
+    "phone number": "phone",
+}
+
+RowError = Tuple[int, str, Dict[str, str]]  # (line number, message, row values)
+
+
+class ImportReport:
+    """Outcome of an import: how many rows were stored, and why the rest were not."""
+
+    def __init__(self) -> None:
+        self.imported = 0
+        self.errors: List[RowError] = []
+
+    def summary(self) -> str:
+        text = f"Imported {self.imported:,} students."
+        if self.errors:
+            text += f" {len(self.errors):,} rows were skipped."
+        return text
+
+    def write_errors(self, f: TextIO) -> None:
+        writer = csv.writer(f)
+        writer.writerow(("line", "error") + FIELDS)
+        for line, message, row in self.errors:
+            writer.writerow((line, message) + tuple(row.get(field, "") for field in FIELDS))
+
+
+def read_rows(f: TextIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield ``(line number, {field: value})`` for each data row of a CSV file."""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns: Dict[str, int] = {}
+    for i, title in enumerate(header):
+        field = HEADERS.get(title.strip().lower())
+        if field is not None:
+            columns.setdefault(field, i)
+    missing = [field for field in FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {field: row[i] if i < len(row) else "" for field, i in columns.items()}
+
+
+def import_batches(
+    rows: Iterator[Tuple[int, Dict[str, str]]],
+    roster: Roster,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[Tuple[List[Tuple[int, Student]], List[RowError]]]:
+    """Validate rows and group the valid ones into batches of new records.
+
+    Nothing is stored here. The caller is expected to add each batch to
+    ``roster`` before asking for the next one, so an enrollment number
+    repeated anywhere in the file is caught by the roster's index.
+    """
+    batch: List[Tuple[int, Student]] = []
+    errors: List[RowError] = []
+    seen: Set[str] = set()  # enrollments in this batch, not yet in the roster
+    for line, row in rows:
+        name, enrollment, courses, phone = (row[field].strip() for field in FIELDS)
+        ok, msg = validate_student(name, enrollment, courses, phone, roster=roster)
+        key = normalize_enrollment(enrollment)
+        if ok and key in seen:
+            ok, msg = False, "Enrollment number already exists."
+        if not ok:
+            errors.append((line, msg, row))
+            continue
+        seen.add(key)
+        batch.append((line, Student(name, enrollment, courses, phone)))
+        if len(batch) >= batch_size:
+            yield batch, errors
+            batch, errors, seen = [], [], set()
+    if batch or errors:
+        yield batch, errors
+
+
+def import_csv(
+    f: TextIO,
+    storage: StorageEngine,
+    roster: Roster,
+    batch_size: int = BATCH_SIZE,
+    guard: Callable[[], ContextManager] = nullcontext,
+    on_batch: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """Stream a CSV of students into ``storage`` and ``roster``.
+
+    Each batch is one ``storage.apply`` call, i.e. one durable write. If a
+    batch is refused (another writer took an enrollment meanwhile) its rows
+    are retried one by one and only the offending ones are reported.
+    ``guard`` is entered around validating and committing each batch, e.g. a
+    shared roster's write lock.
+    """
+    report = ImportReport()
+    batches = import_batches(read_rows(f), roster, batch_size)
+    while True:
+        with guard():
+            batch = next(batches, None)
+            if batch is None:
+                break
+            records, errors = batch
+            report.errors.extend(errors)
+            try:
+                storage.apply([{"op": "add", "record": record} for _, record in records])
+                stored = [record for _, record in records]
+            except (DuplicateEnrollmentError, ConflictError):
+                stored = []
+                for line, record in records:
+                    try:
+                        storage.apply([{"op": "add", "record": record}])
+                    except (DuplicateEnrollmentError, ConflictError) as e:
+                        report.errors.append((line, str(e), _row_values(record)))
+                        continue
+                    stored.append(record)
+            roster.extend(stored)
+            report.imported += len(stored)
+        if on_batch is not None:
+            on_batch(report)
+    report.errors.sort(key=lambda error: error[0])
+    return report
+
+
+def _row_values(record: Student) -> Dict[str, str]:
+    return {field: getattr(record, field) for field in FIELDS}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from repository import open_repository
+
+    parser = argparse.ArgumentParser(description="Import students from a CSV file.")
+    parser.add_argument("csv", help="CSV with name, enrollment, courses and phone columns")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "storage.json"),
+                        help="data file next to which the roster is stored (default: storage.json beside this script)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--errors", help="where to write rejected rows (default: <csv>.errors.csv)")
+    args = parser.parse_args(argv)
+
+    storage = open_repository(args.data)
+    try:
+        roster = make_roster()
+        roster.extend(storage.iter_records())
+        with open(args.csv, newline="", encoding="utf-8-sig") as f:
+            report = import_csv(f, storage, roster, batch_size=args.batch_size)
+    except (ValueError, csv.Error, OSError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
+
+    print(report.summary())
+    if report.errors:
+        errors_path = args.errors or args.csv + ".errors.csv"
+        with open(errors_path, "w", newline="", encoding="utf-8") as f:
+            report.write_errors(f)
+        print(f"Rejected rows written to {errors_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import sys
+from typing import Dict, Optional, Tuple
+
+
+INTERN_COURSES = True  # course codes repeat across thousands of students
+
+
+class Student:
+    """One roster record.
+
+    ``__slots__`` keeps each instance to a few pointers instead of a dict, and
+    repeated course strings are interned so equal codes share one object.
+    ``version`` starts at 1 and goes up with every saved edit, so a change
+    made from a stale copy can be detected.
+    """
+
+    __slots__ = ("id", "name", "enrollment", "courses", "phone", "version")
+
+    def __init__(
+        self,
+        name: str,
+        enrollment: str,
+        courses: str,
+        phone: str,
+        id: Optional[int] = None,
+        version: int = 1,
+    ) -> None:
+        self.id = id
+        self.version = version
+        self.name = name
+        self.enrollment = enrollment
+        self.courses = sys.intern(courses) if INTERN_COURSES else courses
+        self.phone = phone
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "Student":
+        return cls(
+            data.get("name", ""),
+            data.get("enrollment", ""),
+            data.get("courses", ""),
+            data.get("phone", ""),
+            data.get("id"),
+            data.get("version", 1),
+        )
+
+    def to_json(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "enrollment": self.enrollment,
+            "courses": self.courses,
+            "phone": self.phone,
+            "version": self.version,
+        }
+
+    def __reduce__(self) -> Tuple:
+        # Pickled as constructor arguments: far quicker to load than slot state
+        return Student, (self.name, self.enrollment, self.courses, self.phone, self.id, self.version)
+
+    def as_row(self) -> Tuple[int, str, str, str, str]:
+        return self.id, self.name, self.enrollment, self.courses, self.phone
+
+    def update_from(self, other: "Student") -> None:
+        self.name = other.name
+        self.enrollment = other.enrollment
+        self.courses = other.courses
+        self.phone = other.phone
+        self.version = other.version
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Student):
+            return NotImplemented
+        return (self.id, self.name, self.enrollment, self.courses, self.phone, self.version) == (
+            other.id, other.name, other.enrollment, other.courses, other.phone, other.version
+        )
+
+    def __repr__(self) -> str:
+        return f"Student(id={self.id!r}, name={self.name!r}, enrollment={self.enrollment!r})"
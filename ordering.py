@@ -0,0 +1,49 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Sequence
+
+
+SORT_COLUMNS = ("name", "enrollment", "courses", "phone")  # Student fields the table can be sorted by
+
+
+def sort_key(value: str) -> str:
+    """Case- and spacing-insensitive key, so ``"ada  lovelace"`` sorts with
+    ``"Ada Lovelace"``."""
+    return " ".join(value.split()).casefold()
+
+
+class SortOrder:
+    """Record ids ordered by one column's sort key, ties broken by id.
+
+    ``keys`` and ``ids`` are parallel and stay sorted as records come and
+    go: a change is two binary searches and one insert or delete instead of
+    a re-sort, and a page of the table is a slice of ``ids``.
+    """
+
+    def __init__(self, keys: Iterable[str] = (), ids: Sequence[int] = ()) -> None:
+        """Order records given by parallel ``keys`` and ascending ``ids``."""
+        keys = list(keys)
+        # A stable sort of positions keeps equal keys in id order
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys: List[str] = [keys[i] for i in order]
+        self.ids = array("q", (ids[i] for i in order))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _find(self, key: str, record_id: int) -> int:
+        # Equal keys form one run, sorted by id within it
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return bisect_left(self.ids, record_id, lo, hi)
+
+    def add(self, key: str, record_id: int) -> None:
+        i = self._find(key, record_id)
+        self.keys.insert(i, key)
+        self.ids.insert(i, record_id)
+
+    def discard(self, key: str, record_id: int) -> None:
+        i = self._find(key, record_id)
+        if i < len(self.ids) and self.ids[i] == record_id and self.keys[i] == key:
+            del self.keys[i]
+            del self.ids[i]
@@ -0,0 +1,87 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+from profiling import timed
+from storage import StorageEngine
+
+
+COALESCE_WINDOW = 0.05  # seconds to wait for more ops after the first of a burst
+MAX_BATCH = 5000
+
+_STOP = object()
+
+
+class PersistenceWorker:
+    """Writes storage ops on a dedicated thread.
+
+    Ops submitted in a burst are applied as one batch, i.e. one durable write
+    (a single journal fsync or SQLite transaction). If a batch fails, its ops
+    are retried one at a time so a single bad op (say a duplicate enrollment)
+    does not take the rest of the burst with it; ``on_error(op, exc)`` is then
+    called from the worker thread for every op that still fails.
+    """
+
+    def __init__(
+        self,
+        storage: StorageEngine,
+        on_error: Callable[[Dict, BaseException], None],
+        coalesce_window: float = COALESCE_WINDOW,
+    ) -> None:
+        self.storage = storage
+        self.on_error = on_error
+        self.coalesce_window = coalesce_window
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def submit(self, op: Dict) -> None:
+        self._queue.put(op)
+
+    def flush(self) -> None:
+        """Block until every submitted op has been written (or has failed)."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            op = self._queue.get()
+            if op is _STOP:
+                self._queue.task_done()
+                break
+            batch = [op]
+            deadline = time.monotonic() + self.coalesce_window
+            while len(batch) < MAX_BATCH:
+                try:
+                    op = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if op is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(op)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    @timed("PersistenceWorker.write")
+    def _write(self, batch: List[Dict]) -> None:
+        try:
+            self.storage.apply(batch)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                self.on_error(batch[0], e)
+                return
+        for op in batch:
+            try:
+                self.storage.apply([op])
+            except Exception as e:
+                self.on_error(op, e)
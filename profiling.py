@@ -0,0 +1,179 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+
+# Imported first by the entry points, so this is close to process start
+START = time.perf_counter()
+STARTUP_ENABLED = os.environ.get("CMS_PROFILE_STARTUP") == "1"
+RING_SIZE = 10_000  # most recent events kept
+
+# One event: (phase, name, start, duration, thread id, args). Phases follow
+# the Chrome trace format: "X" a timed span, "C" a memory sample, "i" a mark.
+Event = Tuple[str, str, float, float, int, Optional[Dict]]
+
+
+def mark(label: str) -> None:
+    """Print ``label`` and the ms since startup to stderr, with
+    ``CMS_PROFILE_STARTUP=1``; otherwise do nothing.
+
+    For which imports the time goes to, run ``python -X importtime app.py``.
+    """
+    if STARTUP_ENABLED:
+        print(f"[startup] {(time.perf_counter() - START) * 1000:8.1f} ms  {label}", file=sys.stderr)
+    if recorder.enabled:
+        recorder.events.append(("i", label, time.perf_counter(), 0.0, recorder.thread(), None))
+
+
+def rss_bytes() -> Optional[int]:
+    """The process's resident memory; its peak where only that is known
+    (macOS), and None where neither is (Windows)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "start")
+
+    def __init__(self, recorder: "Recorder", name: str, args: Optional[Dict]) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.recorder.record(self.name, self.start, time.perf_counter(), self.args)
+
+
+class Recorder:
+    """Timings and memory samples of the hot paths, kept in a ring buffer.
+
+    Off unless ``CMS_PROFILE=1`` or ``enabled`` is set (the debug overlays
+    have a switch); while off, a timed function costs one attribute check
+    and nothing is stored. Appending to the deque is thread-safe, so the
+    persistence thread and Streamlit's script threads record into the same
+    buffer.
+    """
+
+    def __init__(self, size: int = RING_SIZE, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.events: "deque[Event]" = deque(maxlen=size)
+        self.threads: Dict[int, str] = {}  # names by id, kept after the threads end
+
+    def thread(self) -> int:
+        """The current thread's id, its name noted for the trace."""
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        return tid
+
+    def record(self, name: str, start: float, end: float, args: Optional[Dict] = None) -> None:
+        """Store a span timed by the caller, e.g. one that ends in a later callback."""
+        if self.enabled:
+            self.events.append(("X", name, start, end - start, self.thread(), args))
+
+    def span(self, name: str, **args) -> ContextManager:
+        """``with recorder.span("name"):`` times the block."""
+        if not self.enabled:
+            return nullcontext()
+        return _Span(self, name, args or None)
+
+    def memory(self, label: str = "memory") -> None:
+        """Sample resident memory, and Python's traced allocations when
+        ``tracemalloc`` is on (``python -X tracemalloc``)."""
+        if not self.enabled:
+            return
+        import tracemalloc
+
+        values = {}
+        rss = rss_bytes()
+        if rss is not None:
+            values["rss_mb"] = round(rss / 2**20, 1)
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            values["traced_mb"] = round(current / 2**20, 1)
+            values["traced_peak_mb"] = round(peak / 2**20, 1)
+        self.events.append(("C", label, time.perf_counter(), 0.0, self.thread(), values))
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def latest_memory(self) -> Optional[Dict]:
+        for phase, _, _, _, _, args in reversed(list(self.events)):
+            if phase == "C":
+                return args
+        return None
+
+    def stats(self) -> List[Tuple[str, int, float, float, float]]:
+        """``(name, count, last ms, mean ms, max ms)`` per span name, the
+        most total time first."""
+        spans: Dict[str, List[float]] = {}
+        for phase, name, _, duration, _, _ in list(self.events):
+            if phase == "X":
+                spans.setdefault(name, []).append(duration * 1000)
+        rows = [(name, len(d), d[-1], sum(d) / len(d), max(d)) for name, d in spans.items()]
+        rows.sort(key=lambda row: row[1] * row[3], reverse=True)
+        return rows
+
+    def chrome_trace(self) -> Dict:
+        """The buffer as Chrome trace-event JSON (``chrome://tracing`` or
+        https://ui.perfetto.dev): spans, memory counters and marks, with
+        microsecond timestamps from process start."""
+        pid = os.getpid()
+        events: List[Dict] = []
+        seen = set()
+        for phase, name, start, duration, tid, args in list(self.events):
+            event = {"name": name, "ph": phase, "ts": round((start - START) * 1e6, 1), "pid": pid, "tid": tid}
+            if phase == "X":
+                event["dur"] = round(duration * 1e6, 1)
+            elif phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            events.append(event)
+            seen.add(tid)
+        for tid in seen:
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                           "args": {"name": self.threads.get(tid, f"thread {tid}")}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+recorder = Recorder(enabled=os.environ.get("CMS_PROFILE") == "1")
+
+
+def timed(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator recording each call of the function as a span named
+    ``name`` (default: its qualified name) while the recorder is on."""
+
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(label, start, time.perf_counter())
+
+        return wrapper
+
+    return decorate
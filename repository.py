@@ -0,0 +1,380 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from courses import course_key, parse_courses
+from models import Student
+from roster import normalize_enrollment
+from storage import ConflictError, DuplicateEnrollmentError, JournalStorage, StorageEngine
+
+
+DEFAULT_BACKEND = "sqlite"
+PAGE_SIZE = 2000
+COLUMNS = "id, name, enrollment, courses, phone, version"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    enrollment TEXT NOT NULL,
+    courses TEXT NOT NULL DEFAULT '',
+    phone TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 1,
+    enrollment_key TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_students_enrollment ON students (enrollment);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_students_enrollment_key ON students (enrollment_key);
+CREATE INDEX IF NOT EXISTS idx_students_name ON students (name);
+CREATE INDEX IF NOT EXISTS idx_students_courses ON students (courses);
+CREATE INDEX IF NOT EXISTS idx_students_phone ON students (phone);
+CREATE TABLE IF NOT EXISTS student_courses (
+    course TEXT NOT NULL,
+    student_id INTEGER NOT NULL,
+    PRIMARY KEY (course, student_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_student_courses_student ON student_courses (student_id);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID;
+INSERT OR IGNORE INTO meta (name, value) VALUES ('instance', random());
+INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0);
+"""
+
+
+def _row_to_student(row: Tuple) -> Student:
+    return Student(row[1], row[2], row[3], row[4], row[0], row[5])
+
+
+def _upgrade(conn: sqlite3.Connection, path: str) -> None:
+    # Databases created before records carried a version
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(students)")}
+    if columns and "version" not in columns:
+        conn.execute("ALTER TABLE students ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+    if columns and "enrollment_key" not in columns:
+        _add_enrollment_keys(conn, path)
+
+
+def _add_enrollment_keys(conn: sqlite3.Connection, path: str) -> None:
+    # Databases from before enrollments were unique the way the validator
+    # compares them: records whose key repeats an earlier one's move out to
+    # <path>.duplicates.json for manual review, as migrate_json does
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("ALTER TABLE students ADD COLUMN enrollment_key TEXT")
+        seen = set()
+        keys, duplicates = [], []
+        for row in conn.execute(f"SELECT {COLUMNS} FROM students ORDER BY id").fetchall():
+            key = normalize_enrollment(row[2])
+            if key in seen:
+                duplicates.append(_row_to_student(row))
+            else:
+                seen.add(key)
+                keys.append((key, row[0]))
+        conn.executemany("UPDATE students SET enrollment_key = ? WHERE id = ?", keys)
+        conn.executemany("DELETE FROM students WHERE id = ?", [(s.id,) for s in duplicates])
+        if _has_table(conn, "student_courses"):
+            conn.executemany("DELETE FROM student_courses WHERE student_id = ?", [(s.id,) for s in duplicates])
+        if duplicates:
+            with open(path + ".duplicates.json", "w", encoding="utf-8") as f:
+                json.dump([s.to_json() for s in duplicates], f, indent=2)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def _index_courses(conn: sqlite3.Connection) -> None:
+    # Fills student_courses from every record, for databases that predate it
+    rows = conn.execute("SELECT id, courses FROM students")  # read as it is inserted from
+    conn.executemany(
+        "INSERT OR IGNORE INTO student_courses (course, student_id) VALUES (?, ?)",
+        ((code, record_id) for record_id, courses in rows for code in parse_courses(courses)),
+    )
+
+
+def _record_values(record: Student) -> Tuple[str, str, str, str, str]:
+    # The last is the key that keeps enrollments unique as the validator compares them
+    return record.name, record.enrollment, record.courses, record.phone, normalize_enrollment(record.enrollment)
+
+
+class SQLiteRepository(StorageEngine):
+    """Student roster in an SQLite database (WAL mode).
+
+    Every op is a few indexed statements and each batch passed to
+    ``apply`` is one transaction, so a mutation costs the same regardless of
+    roster size. ``student_courses`` relates each student to the course
+    codes in their Courses field and is kept in step in the same
+    transaction, as is the ``generation`` counter in ``meta`` that
+    ``revision`` reports. SQLite's own locking lets several processes share
+    the file; a version check in the ``WHERE`` clause turns a stale update
+    or delete into ``ConflictError``.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        # One connection shared by the UI and Streamlit's script threads
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        _upgrade(self._conn, path)
+        index_courses = _has_table(self._conn, "students") and not _has_table(self._conn, "student_courses")
+        self._conn.executescript(SCHEMA)
+        if index_courses:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                _index_courses(self._conn)
+                self._conn.execute("COMMIT")
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'students'").fetchone()
+        self._next_id = (row[0] if row else 0) + 1
+
+    # ---------------------- Reads ----------------------
+    def iter_records(self) -> Iterator[Student]:
+        return self.scan()
+
+    def scan(
+        self,
+        course: Optional[str] = None,
+        enrollment_from: Optional[str] = None,
+        enrollment_to: Optional[str] = None,
+    ) -> Iterator[Student]:
+        # Filters become WHERE clauses, so SQLite can use the enrollment
+        # index and the course relation, and skipped rows never reach Python
+        clauses = ""
+        params: List = []
+        course = course_key(course) if course is not None else None
+        for clause, value in (
+            ("id IN (SELECT student_id FROM student_courses WHERE course = ?)", course),
+            ("enrollment >= ?", enrollment_from),
+            ("enrollment <= ?", enrollment_to),
+        ):
+            if value is not None:
+                clauses += f" AND {clause}"
+                params.append(value)
+        # Keyset pages so writes between pages never hit an open cursor
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {COLUMNS} FROM students WHERE id > ?{clauses} ORDER BY id LIMIT ?",
+                    [last_id] + params + [PAGE_SIZE],
+                ).fetchall()
+            for row in rows:
+                yield _row_to_student(row)
+            if len(rows) < PAGE_SIZE:
+                return
+            last_id = rows[-1][0]
+
+    def count(self) -> Optional[int]:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def revision(self) -> Optional[Tuple]:
+        # The instance id tells a rebuilt database from the one a cache came from
+        with self._lock:
+            rows = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        return ("sqlite", rows["instance"], rows["generation"])
+
+    def get(self, record_id: int) -> Optional[Student]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {COLUMNS} FROM students WHERE id = ?", (record_id,)).fetchone()
+        return _row_to_student(row) if row else None
+
+    def find_by_enrollment(self, enrollment: str) -> Optional[Student]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {COLUMNS} FROM students WHERE enrollment_key = ?", (normalize_enrollment(enrollment),)
+            ).fetchone()
+        return _row_to_student(row) if row else None
+
+    def find(self, name: Optional[str] = None, courses: Optional[str] = None, phone: Optional[str] = None) -> List[Student]:
+        clauses = []
+        params = []
+        for column, value in (("name", name), ("courses", courses), ("phone", phone)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        sql = f"SELECT {COLUMNS} FROM students"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        return [_row_to_student(r) for r in rows]
+
+    def _last_id(self) -> int:
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'students'").fetchone()
+        return row[0] if row else 0
+
+    def allocate_id(self) -> int:
+        # Other processes may have inserted since this one last looked
+        with self._lock:
+            self._reserve_ids(self._last_id())
+        return super().allocate_id()
+
+    def allocate_ids(self, count: int) -> range:
+        with self._lock:
+            self._reserve_ids(self._last_id())
+        return super().allocate_ids(count)
+
+    def reserve_ids(self, max_id: int) -> None:
+        # Records added without an id are numbered by SQLite's own sequence,
+        # so move that past max_id too
+        with self._lock:
+            if max_id > self._last_id():
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    cur = self._conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'students'", (max_id,))
+                    if cur.rowcount == 0:
+                        self._conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('students', ?)", (max_id,))
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            self._reserve_ids(max_id)
+
+    # ---------------------- Writes ----------------------
+    def apply(self, ops: List[Dict]) -> None:
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for op in ops:
+                    self._execute(op)
+                self._conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+                self._conn.execute("COMMIT")
+            except sqlite3.IntegrityError as e:
+                self._conn.execute("ROLLBACK")
+                if "students.id" in str(e):
+                    # An id handed out here was also taken by another process
+                    self._reserve_ids(self._last_id())
+                    raise ConflictError(None, "That record id was taken by someone else.")
+                raise DuplicateEnrollmentError("Enrollment number already exists.")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _execute(self, op: Dict) -> None:
+        kind = op.get("op")
+        if kind == "add":
+            record = op["record"]
+            if record.id is None:
+                # Let SQLite number it, so concurrent processes never collide
+                cur = self._conn.execute(
+                    "INSERT INTO students (name, enrollment, courses, phone, enrollment_key) VALUES (?, ?, ?, ?, ?)",
+                    _record_values(record),
+                )
+                record.id = cur.lastrowid
+                self._reserve_ids(record.id)
+            else:
+                self._conn.execute(
+                    "INSERT INTO students (id, name, enrollment, courses, phone, enrollment_key) VALUES (?, ?, ?, ?, ?, ?)",
+                    (record.id,) + _record_values(record),
+                )
+            record.version = 1
+            self._enroll(record.id, record.courses)
+            return
+
+        record_id = op["id"]
+        expected = op.get("expected_version")
+        guard, params = ("", ()) if expected is None else (" AND version = ?", (expected,))
+        if kind == "update":
+            cur = self._conn.execute(
+                "UPDATE students SET name = ?, enrollment = ?, courses = ?, phone = ?, enrollment_key = ?, version = version + 1 "
+                "WHERE id = ?" + guard,
+                _record_values(op["record"]) + (record_id,) + params,
+            )
+        elif kind == "delete":
+            cur = self._conn.execute("DELETE FROM students WHERE id = ?" + guard, (record_id,) + params)
+        else:
+            return
+        if expected is not None and cur.rowcount == 0:
+            raise ConflictError(record_id)
+        self._conn.execute("DELETE FROM student_courses WHERE student_id = ?", (record_id,))
+        if kind == "update":
+            self._enroll(record_id, op["record"].courses)
+            if expected is None:
+                row = self._conn.execute("SELECT version FROM students WHERE id = ?", (record_id,)).fetchone()
+                op["record"].version = row[0] if row else 1
+            else:
+                op["record"].version = expected + 1
+
+    def _enroll(self, record_id: int, courses: str) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO student_courses (course, student_id) VALUES (?, ?)",
+            ((code, record_id) for code in parse_courses(courses)),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ---------------------- Migration ----------------------
+def migrate_json(json_path: str, db_path: str) -> Tuple[int, int]:
+    """One-shot import of ``storage.json`` (plus its journal) into a new database.
+
+    Records whose enrollment number repeats an earlier one, compared as the
+    validator compares them (spaces dropped, case ignored), cannot satisfy
+    the unique index; they are written to ``<json_path>.duplicates.json`` for
+    manual review. Returns ``(migrated, duplicates)``.
+    """
+    tmp_path = db_path + ".migrating"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    seen = set()
+    duplicates = []
+
+    def rows(records: Iterator[Student]) -> Iterator[Tuple]:
+        # Streamed from the snapshot straight into SQLite, a record at a time
+        for record in records:
+            values = tuple(str(v).strip() for v in _record_values(record))
+            if values[4] in seen:
+                duplicates.append(record)
+                continue
+            seen.add(values[4])
+            yield (record.id,) + values + (record.version,)
+
+    storage = JournalStorage(json_path)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            with conn:
+                conn.executemany(
+                    "INSERT INTO students (id, name, enrollment, courses, phone, enrollment_key, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows(storage.iter_records()),
+                )
+                _index_courses(conn)
+        finally:
+            conn.close()
+    finally:
+        storage.close()
+    os.replace(tmp_path, db_path)
+
+    if duplicates:
+        with open(json_path + ".duplicates.json", "w", encoding="utf-8") as f:
+            json.dump([s.to_json() for s in duplicates], f, indent=2)
+    return len(seen), len(duplicates)
+
+
+def open_repository(json_path: str, backend: Optional[str] = None) -> StorageEngine:
+    """Open the roster store that lives next to ``json_path``.
+
+    The backend defaults to SQLite (``storage.db``) and can be switched back
+    to the JSON journal with the ``CMS_STORAGE_BACKEND`` environment variable.
+    """
+    backend = backend or os.environ.get("CMS_STORAGE_BACKEND", DEFAULT_BACKEND)
+    if backend == "journal":
+        return JournalStorage(json_path)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    db_path = os.path.splitext(json_path)[0] + ".db"
+    if not os.path.exists(db_path) and os.path.exists(json_path):
+        migrate_json(json_path, db_path)
+    return SQLiteRepository(db_path)
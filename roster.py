@@ -0,0 +1,504 @@
+import os
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from courses import CourseCatalog
+from locks import RWLock
+from models import Student
+from ordering import SORT_COLUMNS, SortOrder, sort_key
+from search import SearchIndex, student_tokens
+
+
+Row = Tuple[int, str, str, str, str]  # (id, name, enrollment, courses, phone)
+
+DEFAULT_LAYOUT = "objects"
+COURSE_PREFIX = "course:"  # search term naming a course to filter by
+RESORT_RATIO = 32  # a filtered view this many times smaller than the roster is sorted directly
+VIEW_CACHE = 8  # filtered selections remembered per roster version
+
+
+def normalize_enrollment(enrollment: str) -> str:
+    return "".join(enrollment.split()).upper()
+
+
+class Roster:
+    """Students in id order, looked up by id through a parallel id array.
+
+    Ids are handed out in increasing order, so the id array stays sorted and
+    a record's position is a binary search away. A hash index from
+    normalized enrollment number to id is kept in step with every mutation,
+    as are the prefix search index and the per-column sort orders once
+    something has asked for them, and the ``catalog`` of courses with its
+    student <-> course index.
+    ``version`` goes up with every mutation, so derived views can be cached
+    against it.
+    """
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.version = 0
+        self.catalog = CourseCatalog()
+        self._by_enrollment: Dict[str, int] = {}
+        self._repeats: Dict[str, List[int]] = {}  # later ids sharing an indexed enrollment (older data)
+        self._search: Optional[SearchIndex] = None
+        self._orders: Dict[str, SortOrder] = {}
+        self._views: Dict[Tuple, List[int]] = {}  # filtered selections at ``_views_version``
+        self._views_version = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getstate__(self) -> Dict:
+        # Indexes built on demand are left out of pickles and rebuilt on use
+        state = dict(self.__dict__)
+        state.update(_search=None, _orders={}, _views={}, _views_version=0)
+        return state
+
+    def __contains__(self, record_id: int) -> bool:
+        return self.position(record_id) >= 0
+
+    def __iter__(self) -> Iterator[Student]:
+        for i in range(len(self.ids)):
+            yield self.at(i)
+
+    def position(self, record_id: int) -> int:
+        i = bisect_left(self.ids, record_id)
+        if i < len(self.ids) and self.ids[i] == record_id:
+            return i
+        return -1
+
+    def get(self, record_id: int) -> Optional[Student]:
+        i = self.position(record_id)
+        return self.at(i) if i >= 0 else None
+
+    def enrollment_id(self, enrollment: str) -> Optional[int]:
+        return self._by_enrollment.get(normalize_enrollment(enrollment))
+
+    def find_by_enrollment(self, enrollment: str) -> Optional[Student]:
+        record_id = self.enrollment_id(enrollment)
+        return self.get(record_id) if record_id is not None else None
+
+    def search(self, query: str) -> List[int]:
+        """Ids, in roster order, of students matching every word of ``query``
+        as a prefix of a word in their name, enrollment, courses or phone.
+        A ``course:CODE`` term instead requires enrollment in exactly that
+        course, answered from the course catalog."""
+        words = query.split()
+        codes = [w[len(COURSE_PREFIX):] for w in words if w.lower().startswith(COURSE_PREFIX) and len(w) > len(COURSE_PREFIX)]
+        text = " ".join(w for w in words if not w.lower().startswith(COURSE_PREFIX))
+        enrolled = self.catalog.intersect(codes) if codes else None
+        if not text:
+            return enrolled if enrolled is not None else []
+        if self._search is None:
+            # Built on demand so loading never pays for tokenizing
+            self._search = SearchIndex()
+            for student in self:
+                self._search.add(student.id, student_tokens(student))
+        ids = self._search.search(text, tokens_of=lambda i: student_tokens(self.get(i)))
+        if enrolled is not None:
+            ids = set(enrolled).intersection(ids)
+        return sorted(ids)
+
+    def extend(self, students: Iterable[Student]) -> None:
+        for student in students:
+            self.add(student)
+
+    def add(self, student: Student) -> None:
+        i = len(self.ids)
+        if i and self.ids[-1] > student.id:
+            i = bisect_left(self.ids, student.id)
+        self.ids.insert(i, student.id)
+        self._insert(i, student)
+        self.version += 1
+        self.catalog.enroll(student.id, student.courses)
+        self._index(normalize_enrollment(student.enrollment), student.id)
+        if self._search is not None:
+            self._search.add(student.id, student_tokens(student))
+        for column, order in self._orders.items():
+            order.add(sort_key(getattr(student, column)), student.id)
+
+    def update(self, student: Student) -> None:
+        i = self.position(student.id)
+        if i < 0:
+            return
+        old = self.at(i)
+        old_key = normalize_enrollment(old.enrollment)
+        new_key = normalize_enrollment(student.enrollment)
+        old_tokens = student_tokens(old) if self._search is not None else None
+        old_keys = {column: sort_key(getattr(old, column)) for column in self._orders}
+        self._set(i, student)
+        self.version += 1
+        self.catalog.change(student.id, student.courses)
+        if old_key != new_key:
+            self._unindex(old_key, student.id)
+            self._index(new_key, student.id)
+        if old_tokens is not None:
+            new_tokens = student_tokens(student)
+            self._search.discard(student.id, old_tokens - new_tokens)
+            self._search.add(student.id, new_tokens - old_tokens)
+        for column, old_sort_key in old_keys.items():
+            new_sort_key = sort_key(getattr(student, column))
+            if new_sort_key != old_sort_key:
+                self._orders[column].discard(old_sort_key, student.id)
+                self._orders[column].add(new_sort_key, student.id)
+
+    def remove(self, record_id: int) -> Optional[Student]:
+        i = self.position(record_id)
+        if i < 0:
+            return None
+        student = self.at(i)
+        del self.ids[i]
+        self._delete(i)
+        self.version += 1
+        self.catalog.withdraw(record_id)
+        self._unindex(normalize_enrollment(student.enrollment), record_id)
+        if self._search is not None:
+            self._search.discard(record_id, student_tokens(student))
+        for column, order in self._orders.items():
+            order.discard(sort_key(getattr(student, column)), record_id)
+        return student
+
+    def course_names(self) -> List[str]:
+        """Every course code anyone is enrolled in, sorted."""
+        return self.catalog.codes()
+
+    def filter_course(self, course: str) -> List[int]:
+        """Positions of the students enrolled in ``course``."""
+        return [self.position(i) for i in self.catalog.members(course)]
+
+    # ---------------------- Paged Queries ----------------------
+    def sort_order(self, column: str) -> SortOrder:
+        """Ids ordered by ``column`` (one of ``SORT_COLUMNS``), kept up to date."""
+        order = self._orders.get(column)
+        if order is None:
+            if column not in SORT_COLUMNS:
+                raise ValueError(f"Cannot sort by {column}")
+            # Built on first use, then maintained like the search index
+            values = self.columns()[SORT_COLUMNS.index(column) + 1]
+            order = SortOrder(map(sort_key, values), self.ids)
+            self._orders[column] = order
+        return order
+
+    def query(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        search: str = "",
+        course: Optional[str] = None,
+    ) -> Tuple[int, List[Row]]:
+        """One page of the table: how many students match, and rows
+        ``offset`` to ``offset + limit`` of them.
+
+        ``search`` filters like ``search()``, ``course`` keeps the students
+        enrolled in it, and ``sort`` names one of ``SORT_COLUMNS`` (roster
+        order when None). Without filters a page is a slice of a maintained
+        sort order; a filtered selection is ordered once per roster version
+        and sliced after that, so paging costs one page either way.
+        """
+        ids = self._selection(search.strip(), course, sort)
+        total = len(self) if ids is None else len(ids)
+        start = min(max(offset, 0), total)
+        stop = total if limit is None else min(total, start + max(limit, 0))
+        if descending:
+            start, stop = total - stop, total - start
+        if ids is None:
+            rows = self.rows(start, stop)
+        else:
+            rows = [self.at(self.position(i)).as_row() for i in ids[start:stop]]
+        if descending:
+            rows.reverse()
+        return total, rows
+
+    def _selection(self, search: str, course: Optional[str], sort: Optional[str]) -> Optional[Sequence[int]]:
+        # None stands for every student in roster order
+        if not search and course is None:
+            return None if sort is None else self.sort_order(sort).ids
+        if self._views_version != self.version:
+            self._views, self._views_version = {}, self.version
+        key = (search, course, sort)
+        ids = self._views.get(key)
+        if ids is not None:
+            return ids
+        if search:
+            ids = self.search(search)
+            if course is not None:
+                enrolled = set(self.catalog.members(course))
+                ids = [i for i in ids if i in enrolled]
+        else:
+            ids = self.catalog.members(course).tolist()
+        if sort is not None and ids:
+            order = self.sort_order(sort)
+            if len(ids) * RESORT_RATIO < len(order):
+                ids.sort(key=lambda i: (sort_key(getattr(self.get(i), sort)), i))
+            else:
+                # A large share of the roster: filter the kept order instead
+                wanted = set(ids)
+                ids = [i for i in order.ids if i in wanted]
+        if len(self._views) >= VIEW_CACHE:
+            self._views.pop(next(iter(self._views), None), None)
+        self._views[key] = ids
+        return ids
+
+    def _index(self, key: str, record_id: int) -> None:
+        # Older data may repeat an enrollment; the first record keeps the key
+        # and the rest wait in line for it
+        owner = self._by_enrollment.setdefault(key, record_id)
+        if owner != record_id:
+            self._repeats.setdefault(key, []).append(record_id)
+
+    def _unindex(self, key: str, record_id: int) -> None:
+        repeats = self._repeats.get(key)
+        if self._by_enrollment.get(key) == record_id:
+            if repeats:
+                self._by_enrollment[key] = repeats.pop(0)
+            else:
+                del self._by_enrollment[key]
+        elif repeats and record_id in repeats:
+            repeats.remove(record_id)
+        if repeats is not None and not repeats:
+            del self._repeats[key]
+
+    # Layout-specific storage
+    def at(self, position: int) -> Student:
+        raise NotImplementedError
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Row]:
+        raise NotImplementedError
+
+    def columns(self, start: int = 0, stop: Optional[int] = None) -> Tuple[List, ...]:
+        """``(ids, names, enrollments, courses, phones)`` for a slice of rows."""
+        rows = self.rows(start, stop)
+        if not rows:
+            return [], [], [], [], []
+        return tuple(list(col) for col in zip(*rows))
+
+    def _insert(self, position: int, student: Student) -> None:
+        raise NotImplementedError
+
+    def _set(self, position: int, student: Student) -> None:
+        raise NotImplementedError
+
+    def _delete(self, position: int) -> None:
+        raise NotImplementedError
+
+
+class ObjectRoster(Roster):
+    """One ``Student`` object per record."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._records: List[Student] = []
+
+    def __iter__(self) -> Iterator[Student]:
+        return iter(self._records)
+
+    def at(self, position: int) -> Student:
+        return self._records[position]
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Row]:
+        return [s.as_row() for s in self._records[start:stop]]
+
+    def _insert(self, position: int, student: Student) -> None:
+        self._records.insert(position, student)
+
+    def _set(self, position: int, student: Student) -> None:
+        self._records[position].update_from(student)
+
+    def _delete(self, position: int) -> None:
+        del self._records[position]
+
+
+# ---------------------- Columnar Layout ----------------------
+class StringColumn:
+    """Strings stored as UTF-8 in one bytearray heap plus offset arrays.
+
+    Rewritten or deleted values leave garbage in the heap; it is reclaimed
+    once it outweighs the live data.
+    """
+
+    def __init__(self) -> None:
+        self.heap = bytearray()
+        self.starts = array("Q")
+        self.lengths = array("I")
+        self.garbage = 0
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _store(self, value: str) -> Tuple[int, int]:
+        data = value.encode("utf-8")
+        start = len(self.heap)
+        self.heap += data
+        return start, len(data)
+
+    def get(self, i: int) -> str:
+        start = self.starts[i]
+        return self.heap[start:start + self.lengths[i]].decode("utf-8")
+
+    def slice(self, start: int, stop: Optional[int]) -> List[str]:
+        heap = self.heap
+        return [heap[s:s + n].decode("utf-8") for s, n in zip(self.starts[start:stop], self.lengths[start:stop])]
+
+    def insert(self, i: int, value: str) -> None:
+        start, length = self._store(value)
+        self.starts.insert(i, start)
+        self.lengths.insert(i, length)
+
+    def set(self, i: int, value: str) -> None:
+        self.garbage += self.lengths[i]
+        self.starts[i], self.lengths[i] = self._store(value)
+        self._maybe_compact()
+
+    def delete(self, i: int) -> None:
+        self.garbage += self.lengths[i]
+        del self.starts[i]
+        del self.lengths[i]
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if self.garbage * 2 <= len(self.heap):
+            return
+        heap = bytearray()
+        starts = array("Q")
+        for s, n in zip(self.starts, self.lengths):
+            starts.append(len(heap))
+            heap += self.heap[s:s + n]
+        self.heap = heap
+        self.starts = starts
+        self.garbage = 0
+
+
+class DictColumn:
+    """Dictionary-encoded strings: one small int code per row."""
+
+    def __init__(self) -> None:
+        self.codes = array("I")
+        self.values: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def _code(self, value: str) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+        return code
+
+    def get(self, i: int) -> str:
+        return self.values[self.codes[i]]
+
+    def slice(self, start: int, stop: Optional[int]) -> List[str]:
+        values = self.values
+        return [values[c] for c in self.codes[start:stop]]
+
+    def insert(self, i: int, value: str) -> None:
+        self.codes.insert(i, self._code(value))
+
+    def set(self, i: int, value: str) -> None:
+        self.codes[i] = self._code(value)
+
+    def delete(self, i: int) -> None:
+        del self.codes[i]
+
+
+class ColumnarRoster(Roster):
+    """One column per field instead of one object per record."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names = StringColumn()
+        self.enrollments = StringColumn()
+        self.courses = DictColumn()
+        self.phones = StringColumn()
+        self.versions = array("I")
+
+    def at(self, position: int) -> Student:
+        return Student(
+            self.names.get(position),
+            self.enrollments.get(position),
+            self.courses.get(position),
+            self.phones.get(position),
+            self.ids[position],
+            self.versions[position],
+        )
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Row]:
+        return list(zip(
+            self.ids[start:stop],
+            self.names.slice(start, stop),
+            self.enrollments.slice(start, stop),
+            self.courses.slice(start, stop),
+            self.phones.slice(start, stop),
+        ))
+
+    def columns(self, start: int = 0, stop: Optional[int] = None) -> Tuple[List, ...]:
+        return (
+            self.ids[start:stop].tolist(),
+            self.names.slice(start, stop),
+            self.enrollments.slice(start, stop),
+            self.courses.slice(start, stop),
+            self.phones.slice(start, stop),
+        )
+
+    def _insert(self, position: int, student: Student) -> None:
+        self.names.insert(position, student.name)
+        self.enrollments.insert(position, student.enrollment)
+        self.courses.insert(position, student.courses)
+        self.phones.insert(position, student.phone)
+        self.versions.insert(position, student.version)
+
+    def _set(self, position: int, student: Student) -> None:
+        self.names.set(position, student.name)
+        self.enrollments.set(position, student.enrollment)
+        self.courses.set(position, student.courses)
+        self.phones.set(position, student.phone)
+        self.versions[position] = student.version
+
+    def _delete(self, position: int) -> None:
+        self.names.delete(position)
+        self.enrollments.delete(position)
+        self.courses.delete(position)
+        self.phones.delete(position)
+        del self.versions[position]
+
+
+class SharedRoster:
+    """One roster read in place by many threads, e.g. every Streamlit session.
+
+    Hold ``lock.read()`` while reading and ``lock.write()`` while mutating;
+    ``version`` tells readers whether anything changed since they last looked.
+    """
+
+    def __init__(self, roster: Roster) -> None:
+        self.roster = roster
+        self.lock = RWLock()
+
+    @property
+    def version(self) -> int:
+        return self.roster.version
+
+    def reload(self, roster: Roster) -> None:
+        """Swap in a freshly loaded roster (caller holds the write lock).
+
+        The version keeps counting up from the old roster's, so nothing
+        cached against an old version is mistaken for the new data.
+        """
+        roster.version = max(roster.version, self.roster.version + 1)
+        self.roster = roster
+
+
+LAYOUTS = {
+    "objects": ObjectRoster,
+    "columnar": ColumnarRoster,
+}
+
+
+def make_roster(layout: Optional[str] = None) -> Roster:
+    """New empty roster; the layout comes from ``CMS_ROSTER_LAYOUT`` by default."""
+    layout = layout or os.environ.get("CMS_ROSTER_LAYOUT", DEFAULT_LAYOUT)
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown roster layout: {layout}")
+    return LAYOUTS[layout]()
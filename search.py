@@ -0,0 +1,130 @@
+import re
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from models import Student
+
+
+_WORD = re.compile(r"\w+")
+
+VERIFY_COST = 32
+
+Posting = Union[int, Set[int]]  # most tokens (phones, enrollments) belong to a single record
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def student_tokens(student: Student) -> Set[str]:
+    """Searchable tokens for a record: the words of every field, plus the
+    enrollment without separators and the phone as bare digits so both can
+    be typed either way."""
+    tokens = set(_WORD.findall(f"{student.name} {student.enrollment} {student.courses} {student.phone}".lower()))
+    tokens.add("".join(_WORD.findall(student.enrollment.lower())))
+    tokens.add("".join(filter(str.isdigit, student.phone)))
+    tokens.discard("")
+    return tokens
+
+
+class SearchIndex:
+    """Inverted index from token to record ids, searched by token prefix.
+
+    The distinct tokens are kept sorted, so every token starting with a
+    prefix is a contiguous slice found by two binary searches; in effect a
+    flattened trie. New tokens are merged into the sorted list lazily on the
+    next search, which keeps bulk loading linear.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Posting] = {}
+        self._vocab: List[str] = []
+        self._pending: List[str] = []
+        self._stale = 0  # tokens in _vocab whose postings are gone
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def add(self, record_id: int, tokens: Iterable[str]) -> None:
+        postings = self._postings
+        for token in tokens:
+            posting = postings.get(token)
+            if posting is None:
+                postings[token] = record_id
+                self._pending.append(token)
+            elif isinstance(posting, set):
+                posting.add(record_id)
+            elif posting != record_id:
+                postings[token] = {posting, record_id}
+
+    def discard(self, record_id: int, tokens: Iterable[str]) -> None:
+        postings = self._postings
+        for token in tokens:
+            posting = postings.get(token)
+            if posting is None:
+                continue
+            if isinstance(posting, set):
+                posting.discard(record_id)
+                if len(posting) == 1:
+                    postings[token] = next(iter(posting))
+            elif posting == record_id:
+                del postings[token]
+                self._stale += 1
+
+    def _sync_vocab(self) -> None:
+        pending = [t for t in self._pending if t in self._postings]
+        self._pending = []
+        if self._stale * 4 > len(self._vocab) or len(pending) * 16 > len(self._vocab):
+            self._vocab = sorted(self._postings)
+            self._stale = 0
+            return
+        for token in pending:
+            i = bisect_left(self._vocab, token)
+            if i == len(self._vocab) or self._vocab[i] != token:
+                self._vocab.insert(i, token)
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        if self._pending:
+            self._sync_vocab()
+        vocab = self._vocab
+        lo = bisect_left(vocab, prefix)
+        hi = bisect_left(vocab, prefix + "\U0010ffff", lo)
+        return lo, hi
+
+    def matching(self, lo: int, hi: int) -> Set[int]:
+        """Ids of records holding any token in ``_vocab[lo:hi]``."""
+        ids: Set[int] = set()
+        postings = self._postings
+        for token in self._vocab[lo:hi]:
+            posting = postings.get(token)
+            if posting is None:
+                continue
+            if isinstance(posting, set):
+                ids |= posting
+            else:
+                ids.add(posting)
+        return ids
+
+    def search(self, query: str, tokens_of: Optional[Callable[[int], Set[str]]] = None) -> Set[int]:
+        """Ids of records where every query word prefixes some token.
+
+        Words are resolved from the narrowest prefix range up. Once few
+        candidates remain, and ``tokens_of`` can re-tokenize a record, the
+        candidates are checked directly instead of expanding a wide range.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return set()
+        ranges = sorted((self.prefix_range(t) + (t,) for t in terms), key=lambda r: r[1] - r[0])
+        lo, hi, _ = ranges[0]
+        ids = self.matching(lo, hi)
+        for lo, hi, term in ranges[1:]:
+            if not ids:
+                break
+            # Re-tokenizing a record costs about as much as merging a few
+            # dozen postings
+            if tokens_of is not None and len(ids) * VERIFY_COST < hi - lo:
+                ids = {i for i in ids if any(t.startswith(term) for t in tokens_of(i))}
+            else:
+                ids &= self.matching(lo, hi)
+        return ids
@@ -0,0 +1,221 @@
+import gc
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from models import Student
+from roster import DEFAULT_LAYOUT, LAYOUTS, Roster, Row, normalize_enrollment
+
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_FORMAT = 2  # bump whenever the pickled roster's layout changes
+
+
+def snapshot_path(json_path: str) -> str:
+    """``storage.snapshot`` beside ``storage.json``."""
+    return os.path.splitext(os.path.abspath(json_path))[0] + SNAPSHOT_SUFFIX
+
+
+def load_snapshot(path: str, revision: Optional[Tuple], layout: Optional[str] = None) -> Optional[Roster]:
+    """The roster pickled at ``path``, if it was saved at storage
+    ``revision`` in the wanted layout; None if it is missing or stale.
+
+    Unpickling rebuilds every index with the records, so a warm start skips
+    both parsing the storage and re-indexing.
+    """
+    if revision is None or not os.path.exists(path):
+        return None
+    wanted = LAYOUTS[layout or os.environ.get("CMS_ROSTER_LAYOUT", DEFAULT_LAYOUT)]
+    enabled = gc.isenabled()
+    # Collections triggered by the many new objects would only find nothing
+    gc.disable()
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header != (SNAPSHOT_FORMAT, revision, wanted.__name__):
+                return None
+            roster = pickle.load(f)
+    except Exception:
+        return None  # unreadable or from another version: load from storage
+    finally:
+        if enabled:
+            gc.enable()
+    return roster if isinstance(roster, wanted) else None
+
+
+def save_snapshot(path: str, revision: Optional[Tuple], roster: Roster) -> None:
+    """Pickle ``roster`` as the storage's state at ``revision``.
+
+    The caller must know the roster matches the storage at that revision.
+    Written beside the target and renamed, so readers never see half a file.
+    """
+    if revision is None:
+        return
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((SNAPSHOT_FORMAT, revision, type(roster).__name__), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(roster, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+# ---------------------- Mapped Roster ----------------------
+# A read-only copy of the roster that is opened with mmap instead of being
+# loaded: opening costs the same for ten students or a million, records are
+# decoded only when asked for, and processes on one host share its pages.
+#   header      magic, byte order (1 = little), revision length r,
+#               record count n, heap size
+#   revision    repr() of the storage revision, r bytes, padded to 8
+#   ids         int64 × n, ascending
+#   versions    int64 × n
+#   offsets     uint64 × (4n + 1): field f of record i is the heap bytes
+#               from offsets[4i + f] to offsets[4i + f + 1], fields being
+#               name, enrollment, courses, phone
+#   by enrollment
+#               uint32 × n record numbers ordered by normalized enrollment
+#               (record order among equals), padded to 8
+#   heap        the UTF-8 values back to back
+# Arrays are in the writer's byte order; a file from a machine of the other
+# order is treated as stale.
+MAPPED_SUFFIX = ".roster"
+MAPPED_MAGIC = b"CMSMAP1\n"
+_MAPPED_HEADER = struct.Struct("<8sB3xIQQ")
+_FIELDS = 4
+
+
+def mapped_path(json_path: str) -> str:
+    """``storage.roster`` beside ``storage.json``."""
+    return os.path.splitext(os.path.abspath(json_path))[0] + MAPPED_SUFFIX
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class MappedRoster:
+    """Random access to the records of a mapped roster file."""
+
+    def __init__(self, f: BinaryIO, revision: Tuple) -> None:
+        self._file = f
+        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, little, revision_size, count, heap_size = _MAPPED_HEADER.unpack_from(self._map)
+        if magic != MAPPED_MAGIC or little != (sys.byteorder == "little"):
+            raise ValueError("Not a mapped roster in this machine's byte order")
+        pos = _MAPPED_HEADER.size
+        self.revision = self._map[pos:pos + revision_size].decode("utf-8")
+        if self.revision != repr(revision):
+            raise ValueError("Mapped roster is stale")
+        pos += _padded(revision_size)
+        view = memoryview(self._map)
+        sections = []
+        for typecode, size, items in (("q", 8, count), ("q", 8, count), ("Q", 8, _FIELDS * count + 1), ("I", 4, count)):
+            sections.append(view[pos:pos + size * items].cast(typecode))
+            pos += _padded(size * items)
+        self.ids, self.versions, self._offsets, self._by_enrollment = sections
+        self._heap = view[pos:pos + heap_size]
+        if len(self._heap) != heap_size:
+            raise ValueError("Truncated mapped roster")
+        self._views = [view] + sections + [self._heap]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Student]:
+        for i in range(len(self.ids)):
+            yield self.at(i)
+
+    def _field(self, i: int, field: int) -> str:
+        k = _FIELDS * i + field
+        return str(self._heap[self._offsets[k]:self._offsets[k + 1]], "utf-8")
+
+    def at(self, position: int) -> Student:
+        name, enrollment, courses, phone = (self._field(position, f) for f in range(_FIELDS))
+        return Student(name, enrollment, courses, phone, self.ids[position], self.versions[position])
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Row]:
+        stop = len(self.ids) if stop is None else min(stop, len(self.ids))
+        return [(self.ids[i],) + tuple(self._field(i, f) for f in range(_FIELDS)) for i in range(start, stop)]
+
+    def position(self, record_id: int) -> int:
+        i = bisect_left(self.ids, record_id)
+        if i < len(self.ids) and self.ids[i] == record_id:
+            return i
+        return -1
+
+    def get(self, record_id: int) -> Optional[Student]:
+        i = self.position(record_id)
+        return self.at(i) if i >= 0 else None
+
+    def find_by_enrollment(self, enrollment: str) -> Optional[Student]:
+        """Binary search of the enrollment order; decodes about log2(n)
+        enrollment numbers and no other record."""
+        key = normalize_enrollment(enrollment)
+        order = self._by_enrollment
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if normalize_enrollment(self._field(order[mid], 1)) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and normalize_enrollment(self._field(order[lo], 1)) == key:
+            return self.at(order[lo])
+        return None
+
+    def close(self) -> None:
+        # The map can only close once nothing views it
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+
+def open_mapped(path: str, revision: Optional[Tuple]) -> Optional[MappedRoster]:
+    """The mapped roster at ``path`` if it was saved at storage ``revision``;
+    None if it is missing, stale or unreadable."""
+    if revision is None:
+        return None
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        return MappedRoster(f, revision)
+    except (OSError, ValueError, struct.error):
+        f.close()
+        return None
+
+
+def save_mapped(path: str, revision: Optional[Tuple], students: Iterable[Student]) -> None:
+    """Write ``students``, in id order, as the storage's state at ``revision``.
+
+    Written beside the target and renamed, so processes that have the old
+    file mapped keep reading it undisturbed.
+    """
+    if revision is None:
+        return
+    ids, versions, offsets = array("q"), array("q"), array("Q", [0])
+    heap = bytearray()
+    for s in students:
+        ids.append(s.id)
+        versions.append(s.version)
+        for value in (s.name, s.enrollment, s.courses, s.phone):
+            heap += value.encode("utf-8")
+            offsets.append(len(heap))
+    # Stable, so the first of any repeated enrollment is found first
+    keys = [normalize_enrollment(heap[offsets[_FIELDS * i + 1]:offsets[_FIELDS * i + 2]].decode("utf-8")) for i in range(len(ids))]
+    by_enrollment = array("I", sorted(range(len(ids)), key=keys.__getitem__))
+
+    revision_bytes = repr(revision).encode("utf-8")
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAPPED_HEADER.pack(MAPPED_MAGIC, sys.byteorder == "little", len(revision_bytes), len(ids), len(heap)))
+        for block in (revision_bytes, ids.tobytes(), versions.tobytes(), offsets.tobytes(), by_enrollment.tobytes()):
+            f.write(block)
+            f.write(b"\0" * (_padded(len(block)) - len(block)))
+        f.write(heap)
+    os.replace(tmp_path, path)
@@ -0,0 +1,605 @@
+import io
+import json
+import os
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from courses import course_key, parse_courses
+from locks import FileLock
+from models import Student
+
+
+COMPACT_EVERY = 5000  # journal entries before the log is folded into the snapshot
+READ_CHUNK = 1 << 16
+_WHITESPACE = " \t\r\n"
+
+
+class DuplicateEnrollmentError(ValueError):
+    pass
+
+
+class ConflictError(Exception):
+    """An update or delete was based on a version of the record that is no
+    longer current: someone else changed or deleted it first."""
+
+    def __init__(self, record_id: Optional[int], message: str = "This student was changed by someone else.") -> None:
+        super().__init__(message)
+        self.record_id = record_id
+
+
+def _decode_record(op: Dict) -> Student:
+    student = Student.from_json(op["record"])
+    if "id" in op:
+        student.id = op["id"]
+    return student
+
+
+def _encode_op(op: Dict) -> str:
+    if "record" in op:
+        op = dict(op, record=op["record"].to_json())
+    return json.dumps(op, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_op(students: Dict[int, Student], op: Dict) -> None:
+    """Replay one decoded journal entry onto a roster keyed by id."""
+    kind = op.get("op")
+    if kind in ("add", "update"):
+        student = _decode_record(op)
+        students[student.id] = student
+    elif kind == "delete":
+        students.pop(op["id"], None)
+
+
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK, f: Optional[TextIO] = None) -> Iterator[Any]:
+    """Yield the elements of the top-level JSON array in ``path`` one by one.
+
+    Only the element being decoded and one read chunk are held in memory,
+    instead of the whole file plus its parsed copy. Given ``f``, ``path``
+    already opened, reads that and leaves closing it to the caller.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") if f is None else nullcontext(f) as f:
+        buf = ""
+        pos = 0
+        eof = False
+        state = "start"  # start -> first -> (value -> after)*
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    if state == "start":
+                        return
+                    raise ValueError("Unexpected end of JSON array")
+                buf = f.read(chunk_size)
+                pos = 0
+                eof = not buf
+                continue
+
+            ch = buf[pos]
+            if state == "start":
+                if ch != "[":
+                    raise ValueError("Expected a JSON array")
+                pos += 1
+                state = "first"
+            elif state == "after" or (state == "first" and ch == "]"):
+                if ch == "]":
+                    return
+                if ch != ",":
+                    raise ValueError(f"Expected ',' or ']' at offset {pos}")
+                pos += 1
+                state = "value"
+            else:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    end = None
+                # A value that runs to the end of the buffer may be cut short
+                if end is None or (end == len(buf) and not eof):
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        if end is None:
+                            raise
+                        eof = True
+                        continue
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                    continue
+                pos = end
+                state = "after"
+                yield value
+
+
+def _iter_snapshot(path: str, f: Optional[TextIO] = None) -> Iterator[Student]:
+    """Stream snapshot records, numbering rows saved without an id."""
+    if f is None and not os.path.exists(path):
+        return
+    next_id = 1
+    for record in iter_json_array(path, f=f):
+        student = Student.from_json(record)
+        if isinstance(student.id, int):
+            next_id = max(next_id, student.id + 1)
+        else:
+            student.id = next_id
+            next_id += 1
+        yield student
+
+
+def _read_snapshot(path: str) -> Dict[int, Student]:
+    return {student.id: student for student in _iter_snapshot(path)}
+
+
+def _read_journal(path: str) -> Tuple[List[Dict], int]:
+    """Return the journal entries and the byte length of the intact prefix.
+
+    A crash in the middle of an append leaves a torn last line; it was never
+    acknowledged to the caller, so it is dropped.
+    """
+    ops = []
+    good = 0
+    if not os.path.exists(path):
+        return ops, good
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                break
+            good += len(line)
+    return ops, good
+
+
+def _track_versions(versions: Dict[int, int], ops: List[Dict]) -> None:
+    """Follow record versions through journal entries."""
+    for op in ops:
+        kind = op.get("op")
+        if kind in ("add", "update"):
+            record = op["record"]
+            versions[op.get("id", record.get("id"))] = record.get("version", 1)
+        elif kind == "delete":
+            versions.pop(op["id"], None)
+
+
+def _inode(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def _fsync_dir(path: str) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StorageEngine:
+    """Persistence backend for the student roster.
+
+    Records are ``Student`` objects with a stable integer ``id``. Frontends
+    load the roster once and then report each mutation as an op dict instead
+    of handing over the whole list::
+
+        {"op": "add", "record": Student(...)}
+        {"op": "update", "id": 3, "record": Student(...)}
+        {"op": "delete", "id": 3}
+
+    ``apply`` writes a batch of ops durably in one go and fills in the id of
+    an added record that has none yet. An update or delete may also carry
+    ``"expected_version"``: if the stored record is no longer at that version
+    the whole batch is rejected with ``ConflictError``. Saved updates bump the
+    record's version, and the op's record is stamped with the new one.
+    """
+
+    def __init__(self) -> None:
+        self._next_id = 1
+        self._id_lock = threading.Lock()
+
+    def iter_records(self) -> Iterator[Student]:
+        raise NotImplementedError
+
+    def load(self) -> List[Student]:
+        return list(self.iter_records())
+
+    def scan(
+        self,
+        course: Optional[str] = None,
+        enrollment_from: Optional[str] = None,
+        enrollment_to: Optional[str] = None,
+    ) -> Iterator[Student]:
+        """Stream, in id order, the records that pass every given filter.
+
+        ``course`` is a course code the student must be enrolled in; the
+        enrollment bounds are inclusive and compared as stored. Backends with
+        indexes override this so non-matching records are never built.
+        """
+        code = course_key(course) if course is not None else None
+        for record in self.iter_records():
+            if code is not None and code not in parse_courses(record.courses):
+                continue
+            if enrollment_from is not None and record.enrollment < enrollment_from:
+                continue
+            if enrollment_to is not None and record.enrollment > enrollment_to:
+                continue
+            yield record
+
+    def count(self) -> Optional[int]:
+        """Number of stored records, if the backend knows it without a scan."""
+        return None
+
+    def revision(self) -> Optional[Tuple]:
+        """A value that changes whenever the stored records do, from this
+        process or another, so caches of them can be checked cheaply; None
+        if the backend cannot tell."""
+        return None
+
+    def apply(self, ops: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def append(self, op: Dict) -> None:
+        self.apply([op])
+
+    def allocate_id(self) -> int:
+        with self._id_lock:
+            record_id = self._next_id
+            self._next_id += 1
+            return record_id
+
+    def allocate_ids(self, count: int) -> range:
+        """Hand out ``count`` consecutive ids at once, e.g. for a bulk import."""
+        with self._id_lock:
+            start = self._next_id
+            self._next_id += count
+            return range(start, start + count)
+
+    def reserve_ids(self, max_id: int) -> None:
+        """Hand out only ids above ``max_id`` from now on, e.g. after loading
+        records from somewhere other than this storage, such as a snapshot."""
+        self._reserve_ids(max_id)
+
+    def _reserve_ids(self, max_id: int) -> None:
+        with self._id_lock:
+            self._next_id = max(self._next_id, max_id + 1)
+
+    def _stamp(self, op: Dict) -> None:
+        if op.get("op") == "add" and op["record"].id is None:
+            op["record"].id = self.allocate_id()
+
+    def add(self, record: Student) -> int:
+        self.append({"op": "add", "record": record})
+        return record.id
+
+    def update(self, record_id: int, record: Student) -> None:
+        self.append({"op": "update", "id": record_id, "record": record})
+
+    def delete(self, record_id: int) -> None:
+        self.append({"op": "delete", "id": record_id})
+
+    def close(self) -> None:
+        pass
+
+
+class JournalStorage(StorageEngine):
+    """``storage.json`` snapshot plus an append-only journal of mutations.
+
+    Each mutation is a single line appended (and fsynced) to
+    ``storage.json.journal``. Once the journal holds ``compact_every``
+    entries it is rotated to ``.journal.1`` and a background thread folds it
+    into a new snapshot. Renaming the rotated journal to ``.folded`` is the
+    commit point of a compaction, so ``load`` can always either finish or
+    discard one that was interrupted.
+
+    Several processes may share the files: writes, recovery and compaction
+    commits hold ``storage.json.lock``, and before writing a process first
+    reads whatever the others appended so its version checks are current.
+    """
+
+    def __init__(self, path: str, compact_every: int = COMPACT_EVERY, fsync: bool = True) -> None:
+        super().__init__()
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.rotated_path = self.journal_path + ".1"
+        self.folded_path = self.rotated_path + ".folded"
+        self.tmp_path = path + ".tmp"
+        self.fold_path = f"{path}.tmp.{os.getpid()}"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.compaction_error: Optional[BaseException] = None
+
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + ".lock")
+        self._journal = None
+        self._entries = 0
+        self._compactor: Optional[threading.Thread] = None
+        # Current version of every record, and how far into which journal
+        # file they have been followed
+        self._versions: Optional[Dict[int, int]] = None
+        self._journal_ino: Optional[int] = None
+        self._journal_pos = 0
+
+    def revision(self) -> Optional[Tuple]:
+        # Every write appends to the journal, and compaction replaces files
+        stamps = []
+        for path in (self.path, self.journal_path, self.rotated_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stamps.append(None)
+                continue
+            stamps.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return ("journal",) + tuple(stamps)
+
+    # ---------------------- Load / Recovery ----------------------
+    def iter_records(self) -> Iterator[Student]:
+        with self._lock, self._file_lock:
+            self._recover()
+            if os.path.exists(self.rotated_path):
+                # A compaction was rotated but never committed: fold it now
+                students = _read_snapshot(self.path)
+                rotated, _ = _read_journal(self.rotated_path)
+                for op in rotated:
+                    apply_op(students, op)
+                self._commit_snapshot(students)
+                del students
+
+            ops, good = _read_journal(self.journal_path)
+            if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > good:
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good)
+            self._entries = len(ops)
+            journal_at = (_inode(self.journal_path), good)
+            # Opened before the file lock is let go: a compaction by another
+            # process after that replaces the path, not this file, so records
+            # already in the journal are not read again from its snapshot
+            snapshot = open(self.path, "r", encoding="utf-8") if os.path.exists(self.path) else io.StringIO()
+
+        # The journal is short next to the snapshot: fold it into an overlay
+        # and stream the snapshot through it
+        versions: Dict[int, int] = {}
+        changed: Dict[int, Optional[Student]] = {}
+        added: Dict[int, Student] = {}
+        for op in ops:
+            kind = op.get("op")
+            if kind == "add":
+                student = _decode_record(op)
+                added[student.id] = student
+            elif kind == "update":
+                target = added if op["id"] in added else changed
+                target[op["id"]] = _decode_record(op)
+            elif kind == "delete":
+                if added.pop(op["id"], None) is None:
+                    changed[op["id"]] = None
+
+        max_id = max(added, default=0)
+        with snapshot:
+            for record in _iter_snapshot(self.path, snapshot):
+                max_id = max(max_id, record.id)
+                if record.id in changed:
+                    record = changed[record.id]
+                    if record is None:
+                        continue
+                versions[record.id] = record.version
+                yield record
+        self._reserve_ids(max_id)
+        for record in added.values():
+            versions[record.id] = record.version
+            yield record
+        self._adopt_versions(versions, journal_at)
+
+    def _adopt_versions(self, versions: Dict[int, int], journal_at: Tuple[Optional[int], int]) -> None:
+        # Only a full pass over the records sets the version map; later
+        # writes keep it current from there
+        with self._lock:
+            if self._versions is None:
+                self._versions = versions
+                self._journal_ino, self._journal_pos = journal_at
+
+    def _recover(self) -> None:
+        if os.path.exists(self.folded_path):
+            # Crashed after the commit point: the temp snapshot is complete
+            if os.path.exists(self.tmp_path):
+                os.replace(self.tmp_path, self.path)
+            os.remove(self.folded_path)
+            _fsync_dir(self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    # ---------------------- Versions ----------------------
+    def _rebuild_versions(self) -> None:
+        # Caller holds both locks
+        self._recover()
+        versions = {student.id: student.version for student in _iter_snapshot(self.path)}
+        rotated, _ = _read_journal(self.rotated_path)
+        _track_versions(versions, rotated)
+        ops, good = _read_journal(self.journal_path)
+        _track_versions(versions, ops)
+        self._versions = versions
+        self._journal_ino, self._journal_pos = _inode(self.journal_path), good
+        self._entries = len(ops)
+        self._reserve_ids(max(versions, default=0))
+
+    def _follow(self, path: str) -> None:
+        """Track entries appended to ``path`` past the position reached so far."""
+        with open(path, "rb") as f:
+            f.seek(self._journal_pos)
+            ops = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                ops.append(json.loads(line))
+                self._journal_pos += len(line)
+        _track_versions(self._versions, ops)
+        self._entries += len(ops)
+        self._reserve_ids(max((op["record"].get("id", 0) for op in ops if op.get("op") == "add"), default=0))
+
+    def _catch_up(self) -> None:
+        """Fold in whatever other processes wrote since this one last looked."""
+        # Caller holds both locks
+        if self._versions is None:
+            self._rebuild_versions()
+            return
+        ino = _inode(self.journal_path)
+        if self._journal_ino is not None and ino != self._journal_ino:
+            # Another process rotated the journal this one was following
+            if _inode(self.rotated_path) != self._journal_ino:
+                self._rebuild_versions()  # ...and has already folded it away
+                return
+            self._follow(self.rotated_path)
+            self._journal_ino, self._journal_pos = None, 0
+            self._entries = 0
+        if ino is not None:
+            self._journal_ino = ino
+            self._follow(self.journal_path)
+
+    def _check(self, ops: List[Dict]) -> Dict[int, Optional[int]]:
+        """Stamp ids and new versions onto ``ops``; return the version changes.
+
+        Raises ``ConflictError`` before anything is written if any op was made
+        against a stale record.
+        """
+        changes: Dict[int, Optional[int]] = {}
+
+        def current(record_id: int) -> Optional[int]:
+            return changes[record_id] if record_id in changes else self._versions.get(record_id)
+
+        for op in ops:
+            kind = op.get("op")
+            if kind == "add":
+                self._stamp(op)
+                record = op["record"]
+                if current(record.id) is not None:
+                    raise ConflictError(record.id, "That record id was taken by someone else.")
+                changes[record.id] = record.version
+            elif kind in ("update", "delete"):
+                record_id = op["id"]
+                version = current(record_id)
+                expected = op.get("expected_version")
+                if expected is not None and version != expected:
+                    raise ConflictError(record_id)
+                if kind == "update":
+                    op["record"].version = (version or 0) + 1
+                    changes[record_id] = op["record"].version
+                else:
+                    changes[record_id] = None
+        return changes
+
+    # ---------------------- Writes ----------------------
+    def apply(self, ops: List[Dict]) -> None:
+        with self._lock, self._file_lock:
+            self._catch_up()
+            changes = self._check(ops)
+            lines = "".join(_encode_op(op) + "\n" for op in ops)
+            if self._journal is not None and os.fstat(self._journal.fileno()).st_ino != _inode(self.journal_path):
+                # The file this handle appends to was rotated by another process
+                self._journal.close()
+                self._journal = None
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(lines)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            stat = os.fstat(self._journal.fileno())
+            self._journal_ino, self._journal_pos = stat.st_ino, stat.st_size
+
+            for record_id, version in changes.items():
+                if version is None:
+                    self._versions.pop(record_id, None)
+                else:
+                    self._versions[record_id] = version
+            self._entries += len(ops)
+            if self._entries >= self.compact_every:
+                self._start_compaction()
+
+    # ---------------------- Compaction ----------------------
+    def compact(self, wait: bool = False) -> None:
+        with self._lock, self._file_lock:
+            if self._entries:
+                self._start_compaction()
+            compactor = self._compactor
+        if wait and compactor is not None:
+            compactor.join()
+
+    def _start_compaction(self) -> None:
+        # Caller holds both locks
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        if os.path.exists(self.rotated_path):
+            # A failed compaction is still pending; load() will fold it
+            return
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if not os.path.exists(self.journal_path):
+            return
+        os.replace(self.journal_path, self.rotated_path)
+        _fsync_dir(self.path)
+        self._entries = 0
+        self._journal_ino, self._journal_pos = None, 0
+        self._compactor = threading.Thread(target=self._run_compaction, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    def _run_compaction(self) -> None:
+        # Folding happens outside the file lock so writers are not held up;
+        # only the commit takes it
+        try:
+            rotated = _inode(self.rotated_path)
+            students = _read_snapshot(self.path)
+            ops, _ = _read_journal(self.rotated_path)
+            for op in ops:
+                apply_op(students, op)
+            self._write_snapshot(students, self.fold_path)
+            del students
+            with self._file_lock:
+                if _inode(self.rotated_path) != rotated:
+                    # Another process's load folded this journal first
+                    os.remove(self.fold_path)
+                else:
+                    os.replace(self.fold_path, self.tmp_path)
+                    self._commit_tmp()
+            self.compaction_error = None
+        except Exception as e:
+            self.compaction_error = e
+
+    def _commit_snapshot(self, students: Dict[int, Student]) -> None:
+        # Caller holds the file lock
+        self._write_snapshot(students, self.tmp_path)
+        self._commit_tmp()
+
+    def _write_snapshot(self, students: Dict[int, Student], path: str) -> None:
+        # One record per line, written as it is encoded
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[")
+            sep = "\n  "
+            for student in students.values():
+                f.write(sep)
+                f.write(json.dumps(student.to_json(), ensure_ascii=False))
+                sep = ",\n  "
+            f.write("\n]\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _commit_tmp(self) -> None:
+        os.replace(self.rotated_path, self.folded_path)  # commit point
+        _fsync_dir(self.path)
+        os.replace(self.tmp_path, self.path)
+        os.remove(self.folded_path)
+        _fsync_dir(self.path)
+
+    def close(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        self._file_lock.close()
+
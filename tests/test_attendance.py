@@ -0,0 +1,67 @@
+import random
+
+from attendance import (
+    AttendanceStore,
+    _low_byte,
+    bitmap_from_slots,
+    bitmap_slots,
+    decode_bitmap,
+    encode_bitmap,
+    popcount,
+)
+
+
+def test_bitmap_round_trip():
+    slots = sorted(random.Random(7).sample(range(5000), 300))
+    bitmap = bitmap_from_slots(slots)
+    assert bitmap_slots(bitmap) == slots
+    assert popcount(bitmap) == len(slots)
+    assert bitmap_slots(bitmap_from_slots([])) == []
+
+
+def test_encoded_bitmap_drops_leading_zero_bytes():
+    bitmap = bitmap_from_slots([8000, 8003, 9100])
+    offset = _low_byte(bitmap)
+    assert offset == 1000
+    assert decode_bitmap(encode_bitmap(bitmap, offset), offset) == bitmap
+
+
+def _store(tmp_path) -> AttendanceStore:
+    return AttendanceStore(str(tmp_path / "attendance.db"))
+
+
+def test_marks_are_stored_per_session(tmp_path):
+    store = _store(tmp_path)
+    store.mark("CS101", "2024-03-01", present=[1, 2], absent=[3])
+    store.mark("CS101", "2024-03-02", present=[1, 3], absent=[2])
+    store.mark("MA201", "2024-03-02", present=[2], absent=[])
+
+    assert store.session("CS101", "2024-03-01") == {1: True, 2: True, 3: False}
+    assert store.session("CS101", "2024-03-02") == {1: True, 2: False, 3: True}
+    assert store.session("MA201", "2024-03-02") == {2: True}
+    assert store.session("MA201", "2024-03-01") is None
+    assert store.days("CS101") == ["2024-03-01", "2024-03-02"]
+    store.close()
+
+
+def test_marking_again_replaces_and_clear_takes_back(tmp_path):
+    store = _store(tmp_path)
+    store.mark("CS101", "2024-03-01", present=[1, 2], absent=[3])
+    store.mark("CS101", "2024-03-01", present=[3], absent=[1, 2])
+    assert store.session("CS101", "2024-03-01") == {1: False, 2: False, 3: True}
+
+    store.clear("CS101", "2024-03-01")
+    assert store.session("CS101", "2024-03-01") is None
+    assert store.days("CS101") == []
+    store.close()
+
+
+def test_marks_survive_reopening(tmp_path):
+    store = _store(tmp_path)
+    store.mark("CS101", "2024-03-01", present=[10, 20], absent=[30])
+    store.close()
+
+    reopened = _store(tmp_path)
+    assert reopened.session("CS101", "2024-03-01") == {10: True, 20: True, 30: False}
+    assert reopened.student_ids() == [10, 20, 30]
+    reopened.close()
@@ -0,0 +1,60 @@
+import sqlite3
+
+from attendance import AttendanceStore
+
+
+def _store(tmp_path) -> AttendanceStore:
+    return AttendanceStore(str(tmp_path / "attendance.db"))
+
+
+def _mark_week(store: AttendanceStore) -> None:
+    store.mark("CS101", "2024-03-01", present=[1, 2], absent=[3])
+    store.mark("CS101", "2024-03-02", present=[1, 3], absent=[2])
+    store.mark("MA201", "2024-03-02", present=[2], absent=[])
+
+
+def _assert_week_totals(store: AttendanceStore) -> None:
+    assert store.summary("CS101") == {1: (2, 2), 2: (1, 2), 3: (1, 2)}
+    assert store.student_totals(2) == (2, 3)
+    assert store.day_totals("2024-03-02") == (3, 4)
+    assert store.course_totals() == {"CS101": (2, 4, 6), "MA201": (1, 1, 1)}
+
+
+def test_totals_follow_the_marks(tmp_path):
+    store = _store(tmp_path)
+    _mark_week(store)
+    _assert_week_totals(store)
+    assert store.student_totals(99) == (0, 0)
+    assert store.day_totals("2024-03-03") == (0, 0)
+    store.close()
+
+
+def test_marking_again_and_clearing_take_back_the_old_totals(tmp_path):
+    store = _store(tmp_path)
+    store.mark("CS101", "2024-03-01", present=[1, 2], absent=[3])
+    store.mark("CS101", "2024-03-01", present=[3], absent=[1, 2])
+    assert store.summary("CS101") == {1: (0, 1), 2: (0, 1), 3: (1, 1)}
+    assert store.day_totals("2024-03-01") == (1, 3)
+
+    store.clear("CS101", "2024-03-01")
+    assert store.summary("CS101") == {}
+    assert store.day_totals("2024-03-01") == (0, 0)
+    assert store.course_totals() == {}
+    store.close()
+
+
+def test_totals_are_rebuilt_for_an_older_file(tmp_path):
+    store = _store(tmp_path)
+    _mark_week(store)
+    store.close()
+    # As a file written before the current totals: sessions only
+    conn = sqlite3.connect(str(tmp_path / "attendance.db"))
+    for table in ("student_totals", "day_totals", "course_totals"):
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    reopened = _store(tmp_path)
+    _assert_week_totals(reopened)
+    reopened.close()
@@ -0,0 +1,118 @@
+import os
+
+import storage as storage_module
+from models import Student
+from storage import JournalStorage
+
+
+def _student(n: int) -> Student:
+    return Student(f"Student {n}", f"E{n:03d}", "CS101, MA201", "5550100")
+
+
+def _open(tmp_path, **kwargs) -> JournalStorage:
+    return JournalStorage(str(tmp_path / "storage.json"), fsync=False, **kwargs)
+
+
+def _write_some(storage: JournalStorage) -> None:
+    storage.apply([{"op": "add", "record": _student(n)} for n in range(1, 4)])
+    changed = _student(1)
+    changed.phone = "5550199"
+    storage.apply([{"op": "update", "id": 1, "record": changed}])
+    storage.apply([{"op": "delete", "id": 2}])
+
+
+def _expected() -> list:
+    first = _student(1)
+    first.id, first.phone, first.version = 1, "5550199", 2
+    third = _student(3)
+    third.id = 3
+    return [first, third]
+
+
+def test_journal_replays_writes(tmp_path):
+    storage = _open(tmp_path)
+    _write_some(storage)
+    storage.close()
+
+    reopened = _open(tmp_path)
+    assert sorted(reopened.iter_records(), key=lambda s: s.id) == _expected()
+    reopened.close()
+
+
+def test_journal_drops_torn_last_line(tmp_path):
+    storage = _open(tmp_path)
+    _write_some(storage)
+    storage.close()
+    journal = str(tmp_path / "storage.json.journal")
+    intact = os.path.getsize(journal)
+    # A crash in the middle of an append
+    with open(journal, "ab") as f:
+        f.write(b'{"op":"add","record":{"id":9,"na')
+
+    reopened = _open(tmp_path)
+    assert sorted(reopened.iter_records(), key=lambda s: s.id) == _expected()
+    assert os.path.getsize(journal) == intact
+    # Appends after recovery start on a line of their own
+    reopened.apply([{"op": "add", "record": _student(4)}])
+    reopened.close()
+
+    again = _open(tmp_path)
+    assert [s.id for s in sorted(again.iter_records(), key=lambda s: s.id)] == [1, 3, 4]
+    again.close()
+
+
+def test_journal_compaction_keeps_records(tmp_path):
+    storage = _open(tmp_path)
+    _write_some(storage)
+    storage.compact(wait=True)
+    assert storage.compaction_error is None
+    storage.close()
+    assert not os.path.exists(tmp_path / "storage.json.journal")
+    assert not os.path.exists(tmp_path / "storage.json.journal.1")
+
+    reopened = _open(tmp_path)
+    assert sorted(reopened.iter_records(), key=lambda s: s.id) == _expected()
+    reopened.close()
+
+
+def test_journal_finishes_interrupted_compaction(tmp_path):
+    storage = _open(tmp_path)
+    _write_some(storage)
+    storage.close()
+    # Rotated, but the process died before folding it into the snapshot
+    os.replace(tmp_path / "storage.json.journal", tmp_path / "storage.json.journal.1")
+
+    reopened = _open(tmp_path)
+    assert sorted(reopened.iter_records(), key=lambda s: s.id) == _expected()
+    assert not os.path.exists(tmp_path / "storage.json.journal.1")
+    reopened.close()
+
+
+
+def test_compaction_after_the_journal_is_read_adds_no_records(tmp_path, monkeypatch):
+    storage = _open(tmp_path)
+    storage.apply([{"op": "add", "record": _student(1)}])
+    storage.compact(wait=True)
+    storage.apply([{"op": "add", "record": _student(n)} for n in range(2, 4)])
+    storage.close()
+
+    iter_snapshot = storage_module._iter_snapshot
+    compacted = []
+
+    def compact_first(*args, **kwargs):
+        # Another process folds the journal into a new snapshot just after
+        # this reader has read the journal and let the file lock go
+        if not compacted:
+            compacted.append(True)
+            other = _open(tmp_path)
+            list(other.iter_records())
+            other.compact(wait=True)
+            assert other.compaction_error is None
+            other.close()
+        return iter_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(storage_module, "_iter_snapshot", compact_first)
+    reader = _open(tmp_path)
+    assert [s.id for s in reader.iter_records()] == [1, 2, 3]
+    assert compacted
+    reader.close()
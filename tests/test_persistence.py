@@ -0,0 +1,78 @@
+import threading
+
+from models import Student
+from persistence import PersistenceWorker
+from storage import DuplicateEnrollmentError, StorageEngine
+
+WAIT = 5  # seconds before a test that should not block gives up
+
+
+class RecordingStorage(StorageEngine):
+    """Keeps each ``apply`` batch; adding a taken enrollment fails the batch."""
+
+    def __init__(self, gate: threading.Event = None) -> None:
+        super().__init__()
+        self.gate = gate
+        self.batches = []
+        self.enrollments = set()
+
+    def apply(self, ops):
+        if self.gate is not None:
+            self.gate.wait(WAIT)
+        added = [op["record"].enrollment for op in ops if op["op"] == "add"]
+        if len(set(added)) < len(added) or self.enrollments.intersection(added):
+            raise DuplicateEnrollmentError("Enrollment number already exists.")
+        self.enrollments.update(added)
+        self.batches.append([op["record"].enrollment for op in ops])
+
+
+def _add(enrollment: str) -> dict:
+    return {"op": "add", "record": Student("N", enrollment, "CS101", "5550100")}
+
+
+def test_burst_is_written_as_one_batch():
+    storage = RecordingStorage()
+    worker = PersistenceWorker(storage, on_error=lambda op, e: None, coalesce_window=0.2)
+    for n in range(5):
+        worker.submit(_add(f"E{n}"))
+    worker.flush()
+    assert storage.batches == [["E0", "E1", "E2", "E3", "E4"]]
+    worker.close()
+
+
+def test_failed_batch_is_retried_one_op_at_a_time():
+    storage = RecordingStorage()
+    errors = []
+    worker = PersistenceWorker(storage, on_error=lambda op, e: errors.append((op["record"].enrollment, e)),
+                               coalesce_window=0.2)
+    for enrollment in ("E1", "E2", "E1", "E3"):
+        worker.submit(_add(enrollment))
+    worker.flush()
+    assert storage.batches == [["E1"], ["E2"], ["E3"]]
+    assert [(enrollment, type(e)) for enrollment, e in errors] == [("E1", DuplicateEnrollmentError)]
+    worker.close()
+
+
+def test_flush_waits_for_the_write():
+    gate = threading.Event()
+    storage = RecordingStorage(gate)
+    worker = PersistenceWorker(storage, on_error=lambda op, e: None, coalesce_window=0)
+    worker.submit(_add("E1"))
+    flushed = threading.Event()
+    flusher = threading.Thread(target=lambda: (worker.flush(), flushed.set()))
+    flusher.start()
+    assert not flushed.wait(0.1)
+    gate.set()
+    assert flushed.wait(WAIT)
+    assert storage.batches == [["E1"]]
+    worker.close()
+
+
+def test_close_writes_what_was_queued():
+    storage = RecordingStorage()
+    worker = PersistenceWorker(storage, on_error=lambda op, e: None, coalesce_window=0.2)
+    worker.submit(_add("E1"))
+    worker.submit(_add("E2"))
+    worker.close()
+    assert storage.batches == [["E1", "E2"]]
+    assert not worker._thread.is_alive()
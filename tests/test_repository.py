@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from models import Student
+from repository import SQLiteRepository, migrate_json
+from storage import DuplicateEnrollmentError, JournalStorage
+
+
+def _write_json(path: str, enrollments) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"id": i, "name": f"N{i}", "enrollment": e, "courses": "CS101", "phone": "5550100"}
+                   for i, e in enumerate(enrollments, 1)], f)
+
+
+def test_migration_drops_enrollments_the_validator_calls_equal(tmp_path):
+    json_path, db_path = str(tmp_path / "storage.json"), str(tmp_path / "storage.db")
+    _write_json(json_path, ["E1", "E2", "e 2"])
+    assert migrate_json(json_path, db_path) == (2, 1)
+    with open(json_path + ".duplicates.json", encoding="utf-8") as f:
+        assert [r["enrollment"] for r in json.load(f)] == ["e 2"]
+
+    storage = SQLiteRepository(db_path)
+    assert storage.find_by_enrollment("e2").id == 2
+    with pytest.raises(DuplicateEnrollmentError):
+        storage.apply([{"op": "add", "record": Student("X", " e1", "", "")}])
+    storage.close()
+
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="counts open files through /proc")
+def test_migration_streams_the_journal_and_closes_it(tmp_path):
+    json_path, db_path = str(tmp_path / "storage.json"), str(tmp_path / "storage.db")
+    _write_json(json_path, ["E1", "E2"])
+    journal = JournalStorage(json_path, fsync=False)
+    journal.apply([{"op": "add", "record": Student("N3", "E3", "MA201", "5550100")}])
+    journal.close()
+    open_files = len(os.listdir("/proc/self/fd"))
+
+    assert migrate_json(json_path, db_path) == (3, 0)
+    assert len(os.listdir("/proc/self/fd")) == open_files
+    storage = SQLiteRepository(db_path)
+    assert [s.enrollment for s in storage.scan(course="MA201")] == ["E3"]
+    storage.close()
+
+def test_upgrade_keys_an_older_database(tmp_path):
+    db_path = str(tmp_path / "storage.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        "CREATE TABLE students (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, enrollment TEXT NOT NULL, "
+        "courses TEXT NOT NULL DEFAULT '', phone TEXT NOT NULL DEFAULT '', version INTEGER NOT NULL DEFAULT 1);"
+        "INSERT INTO students (name, enrollment) VALUES ('a', 'E5'), ('b', 'e5'), ('c', 'E6');"
+    )
+    conn.commit()
+    conn.close()
+
+    storage = SQLiteRepository(db_path)
+    assert [s.enrollment for s in storage.iter_records()] == ["E5", "E6"]
+    assert os.path.exists(db_path + ".duplicates.json")
+    with pytest.raises(DuplicateEnrollmentError):
+        storage.apply([{"op": "update", "id": 3, "record": Student("c", "E 5", "", "")}])
+    storage.close()
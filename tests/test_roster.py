@@ -0,0 +1,49 @@
+import pytest
+
+from models import Student
+from roster import LAYOUTS, make_roster
+
+
+@pytest.fixture(params=sorted(LAYOUTS))
+def roster(request):
+    roster = make_roster(request.param)
+    # Older data may repeat an enrollment number
+    roster.extend([
+        Student("A", "E1", "CS101", "5550101", id=1),
+        Student("B", "e 1", "CS101", "5550102", id=2),
+        Student("C", "E1", "MA201", "5550103", id=3),
+    ])
+    return roster
+
+
+def test_repeated_enrollment_passes_to_a_surviving_record(roster):
+    assert roster.enrollment_id("E1") == 1
+    roster.remove(1)
+    assert roster.enrollment_id("E1") == 2
+    roster.remove(2)
+    assert roster.find_by_enrollment("e1").id == 3
+    roster.remove(3)
+    assert roster.find_by_enrollment("E1") is None
+
+
+def test_re_keyed_record_hands_over_its_enrollment(roster):
+    roster.update(Student("A", "E9", "CS101", "5550101", id=1, version=2))
+    assert roster.enrollment_id("E9") == 1
+    assert roster.enrollment_id("E1") == 2
+    # A waiting record that leaves no longer gets the key later
+    roster.remove(3)
+    roster.remove(2)
+    assert roster.enrollment_id("E1") is None
+
+
+def test_version_goes_up_with_every_change_only(roster):
+    seen = roster.version
+    roster.query(0, 10, "name", False, "a")
+    roster.find_by_enrollment("E1")
+    assert roster.version == seen
+    roster.add(Student("D", "E4", "CS101", "5550104", id=4))
+    assert roster.version == seen + 1
+    roster.update(Student("D", "E4", "MA201", "5550104", id=4, version=2))
+    assert roster.version == seen + 2
+    roster.remove(4)
+    assert roster.version == seen + 3
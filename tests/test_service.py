@@ -0,0 +1,66 @@
+import pytest
+
+from attendance_core import StudentService
+from repository import open_repository
+from snapshot import mapped_path, snapshot_path
+
+BACKENDS = ("sqlite", "journal")
+
+
+def _service(path: str, backend: str, background: bool = False) -> StudentService:
+    storage = open_repository(path, backend)
+    # Ids are handed out up front when writes go to a background writer
+    submit = (lambda op: storage.apply([op])) if background else None
+    return StudentService(storage, submit=submit, snapshot=snapshot_path(path), mapped=mapped_path(path))
+
+
+def _seed(path: str, backend: str) -> None:
+    service = _service(path, backend)
+    service.load()
+    service.add("Ada Lovelace", "E001", "CS101", "5550101")
+    service.add("Alan Turing", "E002", "CS101, MA201", "5550102")
+    service.load()
+    assert service.save_snapshot()
+    service.close()
+
+
+@pytest.mark.parametrize("background", (False, True))
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_add_after_loading_from_snapshot(tmp_path, backend, background):
+    path = str(tmp_path / "storage.json")
+    _seed(path, backend)
+
+    service = _service(path, backend, background)
+    assert service.load_snapshot()
+    record = service.add("Grace Hopper", "E003", "CS101", "5550103")
+    assert record.id == 3
+    assert [s.id for s in service.roster] == [1, 2, 3]
+    assert sorted(s.id for s in service.storage.iter_records()) == [1, 2, 3]
+    service.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_snapshot_ignored_after_another_write(tmp_path, backend):
+    path = str(tmp_path / "storage.json")
+    _seed(path, backend)
+    other = _service(path, backend)
+    other.load()
+    other.delete(1)
+    other.close()
+
+    service = _service(path, backend)
+    assert not service.load_snapshot()
+    service.load()
+    assert [s.id for s in service.roster] == [2]
+    service.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_reserved_ids_are_not_handed_out(tmp_path, backend):
+    storage = open_repository(str(tmp_path / "storage.json"), backend)
+    storage.reserve_ids(10)
+    # SQLite numbers the record itself here; the journal hands out the id
+    service = StudentService(storage)
+    assert service.add("Ada Lovelace", "E001", "CS101", "5550101").id == 11
+    assert storage.allocate_id() == 12
+    service.close()
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from attendance_core import StudentService
+from locks import RWLock
+from models import Student
+from repository import SQLiteRepository
+from roster import SharedRoster, make_roster
+
+WAIT = 5  # seconds before a test that should not block gives up
+
+
+def test_readers_share_the_lock():
+    lock = RWLock()
+    both_inside = threading.Barrier(2, timeout=WAIT)
+
+    def read() -> None:
+        with lock.read():
+            both_inside.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(WAIT)
+    assert not both_inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = RWLock()
+    events = []
+
+    def read() -> None:
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        events.append("write done")
+    reader.join(WAIT)
+    assert events == ["write done", "read"]
+
+
+def test_waiting_writer_holds_back_new_readers():
+    lock = RWLock()
+    events = []
+
+    def write() -> None:
+        with lock.write():
+            events.append("write")
+
+    def read() -> None:
+        with lock.read():
+            events.append("late read")
+
+    with lock.read():
+        writer = threading.Thread(target=write)
+        writer.start()
+        time.sleep(0.05)
+        # Arrives while the writer waits for the first reader to leave
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        assert events == []
+    writer.join(WAIT)
+    reader.join(WAIT)
+    assert events == ["write", "late read"]
+
+
+def test_reload_keeps_the_version_counting_up():
+    shared = SharedRoster(make_roster())
+    shared.roster.add(Student("A", "E1", "CS101", "5550101", id=1))
+    seen = shared.version
+    # A freshly loaded roster starts its own count from zero
+    shared.reload(make_roster())
+    assert shared.version > seen
+
+
+def test_services_sharing_a_roster_see_each_others_changes(tmp_path):
+    shared = SharedRoster(make_roster())
+    path = str(tmp_path / "storage.db")
+    first = StudentService(SQLiteRepository(path), shared)
+    second = StudentService(SQLiteRepository(path), shared)
+    first.load()
+    record = first.add("Ada Lovelace", "E001", "CS101", "5550101")
+    assert second.get(record.id).name == "Ada Lovelace"
+    second.delete(record.id)
+    assert first.get(record.id) is None
+    first.close()
+    second.close()
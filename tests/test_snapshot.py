@@ -0,0 +1,66 @@
+from models import Student
+from roster import make_roster
+from snapshot import load_snapshot, open_mapped, save_mapped, save_snapshot
+
+REVISION = ("sqlite", 7, 1)
+
+
+def _students() -> list:
+    return [
+        Student("Ada Lovelace", "E-001", "CS101", "5550101", id=1),
+        Student("Zoë Ünal", "e 010", "MA201, PH101", "5550110", id=4, version=3),
+        Student("", "E002", "", "", id=9),
+        Student("Alan Turing", "E003", "CS101", "5550103", id=12, version=2),
+    ]
+
+
+def test_mapped_round_trip(tmp_path):
+    path = str(tmp_path / "storage.roster")
+    students = _students()
+    save_mapped(path, REVISION, students)
+
+    mapped = open_mapped(path, REVISION)
+    assert mapped is not None
+    try:
+        assert len(mapped) == len(students)
+        assert list(mapped) == students
+        assert mapped.rows(1, 3) == [s.as_row() for s in students[1:3]]
+        assert mapped.get(12) == students[3]
+        assert mapped.get(5) is None
+        # Compared as the roster compares them: spaces dropped, upper case
+        assert mapped.find_by_enrollment("E010") == students[1]
+        assert mapped.find_by_enrollment("e002") == students[2]
+        assert mapped.find_by_enrollment("E004") is None
+    finally:
+        mapped.close()
+
+
+def test_mapped_empty_roster(tmp_path):
+    path = str(tmp_path / "storage.roster")
+    save_mapped(path, REVISION, [])
+    mapped = open_mapped(path, REVISION)
+    assert len(mapped) == 0 and mapped.find_by_enrollment("E001") is None
+    mapped.close()
+
+
+def test_mapped_refuses_stale_missing_or_truncated(tmp_path):
+    path = str(tmp_path / "storage.roster")
+    assert open_mapped(path, REVISION) is None
+    save_mapped(path, REVISION, _students())
+    assert open_mapped(path, ("sqlite", 8, 1)) is None
+    assert open_mapped(path, None) is None
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+    assert open_mapped(path, REVISION) is None
+
+
+def test_pickled_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "storage.snapshot")
+    roster = make_roster()
+    roster.extend(_students())
+    save_snapshot(path, REVISION, roster)
+
+    loaded = load_snapshot(path, REVISION)
+    assert list(loaded) == _students()
+    assert loaded.find_by_enrollment("E003").id == 12
+    assert load_snapshot(path, ("sqlite", 8, 1)) is None
@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+
+import pytest
+
+st = pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def page(tmp_path):
+    # The page keeps its data beside itself, so run a copy of it
+    shutil.copy(os.path.join(ROOT, "Stream.py"), tmp_path)
+    students = [
+        {"id": i, "name": f"Student {i:02}", "enrollment": f"E{i:03}", "courses": "CS101", "phone": "5550100"}
+        for i in range(1, 31)
+    ]
+    (tmp_path / "storage.json").write_text(json.dumps(students))
+    # The service is cached per process, not per page
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    at = AppTest.from_file(str(tmp_path / "Stream.py"), default_timeout=60)
+    at.run()
+    assert not at.exception
+    yield at
+    st.cache_resource.clear()
+
+
+def test_row_actions_are_paged(page):
+    assert len(page.dataframe[0].value) == 30
+    assert [b.key for b in page.button if b.key and b.key.startswith("edit_")][-1] == "edit_25"
+    page.number_input(key="actions_page").set_value(2).run()
+    assert [b.key for b in page.button if b.key and b.key.startswith("edit_")] == [f"edit_{i}" for i in range(26, 31)]
+
+
+def test_edit_button_opens_the_form_and_save_updates_the_table(page):
+    page.button(key="edit_3").click().run()
+    assert page.text_input(key="edit_name_3").value == "Student 03"
+    page.text_input(key="edit_name_3").set_value("Grace Hopper")
+    page.button(key="save_3").click().run()
+    assert not page.exception
+    assert "Grace Hopper" in list(page.dataframe[0].value["Student Name"])
+    assert page.session_state.edit_id is None
@@ -0,0 +1,48 @@
+import pytest
+
+from models import Student
+from repository import SQLiteRepository
+from storage import ConflictError, JournalStorage
+
+
+def _journal(tmp_path) -> JournalStorage:
+    return JournalStorage(str(tmp_path / "storage.json"), fsync=False)
+
+
+def _sqlite(tmp_path) -> SQLiteRepository:
+    return SQLiteRepository(str(tmp_path / "storage.db"))
+
+
+def _student(phone: str = "5550100") -> Student:
+    return Student("Ada Lovelace", "E001", "CS101", phone)
+
+
+@pytest.mark.parametrize("open_storage", (_journal, _sqlite))
+def test_update_bumps_version_and_stale_ops_are_rejected(tmp_path, open_storage):
+    storage = open_storage(tmp_path)
+    storage.apply([{"op": "add", "record": _student()}])
+    record = _student("5550199")
+    storage.apply([{"op": "update", "id": 1, "record": record, "expected_version": 1}])
+    assert record.version == 2
+
+    with pytest.raises(ConflictError):
+        storage.apply([{"op": "update", "id": 1, "record": _student("5550111"), "expected_version": 1}])
+    with pytest.raises(ConflictError):
+        storage.apply([{"op": "delete", "id": 1, "expected_version": 1}])
+    assert [s.phone for s in storage.iter_records()] == ["5550199"]
+    storage.close()
+
+
+@pytest.mark.parametrize("open_storage", (_journal, _sqlite))
+def test_stale_update_from_another_writer_is_rejected(tmp_path, open_storage):
+    first, second = open_storage(tmp_path), open_storage(tmp_path)
+    first.apply([{"op": "add", "record": _student()}])
+    list(second.iter_records())
+    first.apply([{"op": "update", "id": 1, "record": _student(), "expected_version": 1}])
+    with pytest.raises(ConflictError):
+        second.apply([{"op": "update", "id": 1, "record": _student(), "expected_version": 1}])
+    # Ids handed out by one writer are not reused by the other
+    second.apply([{"op": "add", "record": Student("Alan Turing", "E002", "CS101", "5550102")}])
+    assert sorted(s.id for s in first.iter_records()) == [1, 2]
+    first.close()
+    second.close()
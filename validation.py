@@ -0,0 +1,33 @@
+from typing import Optional, Tuple
+
+from roster import Roster
+
+
+class ValidationError(ValueError):
+    """A student's fields were rejected; the message says why."""
+
+
+def validate_student(
+    name: str,
+    enrollment: str,
+    courses: str,
+    phone: str,
+    roster: Optional[Roster] = None,
+    record_id: Optional[int] = None,
+) -> Tuple[bool, str]:
+    """Check a student's fields; with ``roster``, also reject an enrollment
+    number that already belongs to a student other than ``record_id``."""
+    if not name.strip():
+        return False, "Name is required."
+    if not enrollment.strip():
+        return False, "Enrollment number is required."
+    if not courses.strip():
+        return False, "Courses are required."
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    if len(digits) < 7:
+        return False, "Phone must have at least 7 digits."
+    if roster is not None:
+        owner = roster.enrollment_id(enrollment)
+        if owner is not None and owner != record_id:
+            return False, "Enrollment number already exists."
+    return True, ""